@@ -1,156 +1,155 @@
 import os
 import sys
 import json
-import random
 import subprocess
 import time
-import hashlib
+import atexit
 import logging
-import queue
-import requests
-import sounddevice as sd
-import vosk
-from gtts import gTTS
+import concurrent.futures
 import webbrowser
 import numpy as np
-from rapidfuzz import fuzz
 
 from settings import Settings
+from command_matcher import CommandMatcher
+from command_dispatcher import CommandDispatcher
+from command_spool import CommandSpool
+from tts_cache import TTSCache
+from tts_backends import get_backend, pcm_to_wav
+from audio_player import AudioPlayer
+from echo_gate import EchoGate
+from echo_canceller import EchoCanceller
+import prompts
+# Pure helpers, kept in their own module so they can be used without the side effects above
+from text_helpers import EXIT_PHRASES, GREETING_PHRASES, generate_chat_response, turkish_number_to_digit, is_exit_command
 url = "http://192.168.1.19:5000/endpoint"
-
-# Initialize settings and queues
-settings = Settings()
-q = queue.Queue()
-passive_q = queue.Queue()
-with open("ayarlar.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
-commands = config.get("commands", {})
-# State flags
-tts_cache = {}
-
-# Ensure cache directory exists
+dispatcher = CommandDispatcher(url)
+# Commands are journaled and delivered in the background, also after an outage
+SPOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'command_spool.db')
+command_spool = CommandSpool(SPOOL_PATH, dispatcher)
+atexit.register(dispatcher.close)
+atexit.register(command_spool.close)
+
+# Initialize settings; shared with main.py/mainpc.py and reloaded when ayarlar.json changes
+settings = Settings().watch()
+# Command index kept in sync with add_command/remove_command and file reloads
+command_matcher = CommandMatcher().attach(settings)
+
+# Persistent TTS cache (LRU eviction past CACHE_MAX_BYTES, purge after CACHE_TTL)
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'tts_cache')
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
+CACHE_MAX_BYTES = 100 * 1024 * 1024
+CACHE_TTL = 7 * 24 * 3600
+tts_cache = TTSCache(CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL)
+atexit.register(tts_cache.flush)
+tts_backend = get_backend(settings.get("tts_backend"))
+
+def _on_settings_change(event, key, value):
+    global tts_backend
+    if event == "set" and key == "tts_backend":
+        tts_backend = get_backend(value)
+    elif event == "set" and key == "echo_cancel":
+        echo_canceller.reset()
+        echo_canceller.enabled = value
+        echo_gate.enabled = _gate_enabled()
+    elif event == "set" and key == "echo_gate":
+        echo_gate.enabled = _gate_enabled()
+
+settings.subscribe(_on_settings_change)
+
+# Either the echo canceller keeps the microphone open during replies (barge-in),
+# or the gate silences it; both are shared with the AudioHub in main.py/mainpc.py
+def _gate_enabled():
+    return settings.get("echo_gate") and not settings.get("echo_cancel")
+
+echo_canceller = EchoCanceller(enabled=settings.get("echo_cancel"))
+echo_gate = EchoGate(enabled=_gate_enabled())
+
+# Long-lived in-process player; the output device is applied by
+# apply_audio_device_settings in main.py/mainpc.py
+player = AudioPlayer(echo_gate=echo_gate, echo_canceller=echo_canceller)
+atexit.register(player.close)
+
+def set_output_device(device):
+    player.set_device(device)
+
+def play_pcm_stream(chunks, sample_rate, block=True):
+    """Play mono int16 PCM chunks as they are produced; with block, wait until done."""
+    return player.play_stream(chunks, sample_rate, block)
+
+def play_audio(filepath, block=True):
+    """Play an audio file through the in-process player (decoded buffers are kept in memory)."""
+    return player.play_file(filepath, block)
+
+def stop_speaking():
+    """Interrupt the current reply and drop queued ones (barge-in)."""
+    player.interrupt()
 
-def play_audio(filepath):
+# Text-to-speech helper with caching
+def _voice_params(lang):
+    snapshot = settings.snapshot
+    return lang or snapshot.language, snapshot.voice_speed, snapshot.voice_pitch
+
+def synthesize_to_cache(text, lang=None):
+    """Synthesize text into the TTS cache if missing and return the audio path."""
+    lang, speed, pitch = _voice_params(lang)
+    path = tts_cache.get(text, lang, speed, pitch, backend=tts_backend.name)
+    if path is None:
+        wav = tts_backend.synthesize(text, lang, speed, pitch)
+        path = tts_cache.put(text, lang, speed, pitch, wav, ext="wav", backend=tts_backend.name)
+    return path
+
+def say_response(text, lang=None, block=True):
     """
-    Raspberry Pi ve diğer platformlarda playsound yerine subprocess ile ses dosyası oynatır.
+    Text-to-speech helper: plays from cache, otherwise streams while synthesizing.
+    With block=False the PlaybackItem is returned at once, so the caller keeps
+    listening and the reply can be interrupted (barge-in).
     """
-    import shutil
-    import subprocess
-
-    # Önce mpg123 var mı kontrol et (MP3 için)
-    if shutil.which("mpg123"):
-        subprocess.run(["mpg123", "-q", filepath])
-    # Eğer yoksa aplay ile (WAV için)
-    elif shutil.which("aplay"):
-        subprocess.run(["aplay", filepath])
-    # MacOS için afplay
-    elif shutil.which("afplay"):
-        subprocess.run(["afplay", filepath])
-    else:
-        raise RuntimeError("Ses oynatıcı bulunamadı (mpg123, aplay veya afplay gereklidir)")
-
-# Text-to-speech helper with caching
-def say_response(text, lang=None):
-    """Text-to-speech helper function with caching."""
-    # Compute cache key
-    if lang is None:
-        lang = settings.get("language")
-    key = hashlib.md5((text + lang).encode('utf-8')).hexdigest()
-    cache_path = os.path.join(CACHE_DIR, f"{key}.mp3")
-    # Generate if not cached
-    if key not in tts_cache or not os.path.exists(cache_path):
-        tts = gTTS(text=text, lang=lang)
-        tts.save(cache_path)
-        tts_cache[key] = cache_path
-    # Play and cleanup
-    play_audio(tts_cache[key])
-    try:
-        os.remove(cache_path)
-    except Exception:
-        pass
-    tts_cache.pop(key, None)
-
-# Chat response generator
-def generate_chat_response(query):
-    """Generate a simple AI chat response based on the query."""
-    # Exit check
-    exit_keywords = ["görüşürüz", "hoşça kal", "teşekkürler", "çıkış", "bay bay"]
-    if any(keyword in query.lower() for keyword in exit_keywords):
-        responses = [
-            "Görüşürüz! İyi günler!",
-            "Hoşça kalın! Tekrar görüşmek üzere!",
-            "Teşekkür ederim, başka bir zaman görüşürüz.",
-            "İyi günler! Başka bir sorunuz olursa beni çağırabilirsiniz."
-        ]
-        return random.choice(responses), True
-    # Greetings
-    greetings = ["merhaba", "selam", "hey", "nasılsın"]
-    if any(g in query.lower() for g in greetings):
-        return random.choice([
-            "Merhaba! Size nasıl yardımcı olabilirim?",
-            "Selam! Bugün ne yapmak istersiniz?"
-        ]), False
-    # Default
-    return random.choice([
-        "Anladım, başka nasıl yardımcı olabilirim?",
-        "Devam edin, sizi dinliyorum."
-    ]), False
+    lang, speed, pitch = _voice_params(lang)
+    backend = tts_backend
+    path = tts_cache.get(text, lang, speed, pitch, backend=backend.name)
+    if path is not None:
+        return play_audio(path, block)
+    def produce():
+        pcm = []
+        for chunk in backend.stream(text, lang, speed, pitch):
+            pcm.append(chunk)
+            yield chunk
+        # Only reached once the player consumed the whole reply, not after an interrupt;
+        # runs on the player thread, so a cache failure must not end the playback
+        try:
+            wav = pcm_to_wav(b"".join(pcm), backend.sample_rate)
+            tts_cache.put(text, lang, speed, pitch, wav, ext="wav", backend=backend.name)
+        except Exception as e:
+            logging.warning(f"TTS önbelleğe yazılamadı: {e}")
+    return play_pcm_stream(produce(), backend.sample_rate, block)
+
+def _log_warmup_failure(text, future):
+    if future.exception() is not None:
+        logging.warning(f"TTS ön hazırlık hatası ({text[:40]}): {future.exception()}")
+
+def warm_up_tts(texts, lang=None, max_workers=4):
+    """Pre-render prompts into the TTS cache on a background thread pool."""
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-warmup")
+    futures = []
+    for text in texts:
+        future = pool.submit(synthesize_to_cache, text, lang)
+        future.add_done_callback(lambda f, t=text: _log_warmup_failure(t, f))
+        futures.append(future)
+    pool.shutdown(wait=False)
+    return futures
 
 # Command processing with fuzzy matching
 def process_command(text, threshold=75):
-    text_lower = text.lower()
-
-    for keyword, details in commands.items():
-        if keyword in text_lower:
-            send_command(details)
-            return keyword
-
-    best_keyword = None
-    best_score = 0
-    for keyword, details in commands.items():
-        score = fuzz.ratio(text_lower, keyword)
-        if score > best_score:
-            best_keyword, best_score = keyword, score
-
-    if best_score >= threshold:
-        send_command(commands[best_keyword])
-        return best_keyword
-    else:
-        print("Komut eşleşmedi")
+    match = command_matcher.match(text, threshold)
+    if match is not None:
+        send_command(match.details)
+        return match.keyword
+    print("Komut eşleşmedi")
     return None
 
 def send_command(details):
-    try:
-        data = {"cmd_type": details["type"], "target": details["target"]}
-        response = requests.post(url, json=data)
-        print("Sunucudan yanıt:", response.json())
-    except Exception as e:
-        print("İstek gönderilirken hata:", e)
-
-
-# Add Turkish number conversion helper
-def turkish_number_to_digit(text):
-    number_dict = {
-        'sıfır': 0, 'bir': 1, 'iki': 2, 'üç': 3, 'dört': 4, 
-        'beş': 5, 'altı': 6, 'yedi': 7, 'sekiz': 8, 'dokuz': 9,
-        'on': 10, 'yirmi': 20, 'otuz': 30, 'kırk': 40, 'elli': 50, 
-        'altmış': 60, 'yetmiş': 70, 'seksen': 80, 'doksan': 90,
-        'yüz': 100, 'bin': 1000
-    }
-    text = text.lower()
-    if text in number_dict:
-        return number_dict[text]
-    if text.isdigit():
-        return int(text)
-    words = text.split()
-    if len(words) == 2 and words[0] in number_dict and words[1] in number_dict:
-        tens, units = number_dict[words[0]], number_dict[words[1]]
-        if tens % 10 == 0 and tens < 100 and units < 10:
-            return tens + units
-    return None
+    """Journal the command for the PC endpoint; returns its spool id without waiting."""
+    return command_spool.enqueue(details["type"], details["target"])
+
 
 # Add cleanup listening state helper
 def stop_listening_and_cleanup():
@@ -158,13 +157,4 @@ def stop_listening_and_cleanup():
     logging.info("Dinleme sonlandırılıyor...")
     is_listening = False
     is_chatting = False
-    try:
-        sd.stop()
-    except Exception as e:
-        logging.error(f"Ses durdurma hatası: {e}")
     return
-
-# Add exit command checker
-def is_exit_command(query):
-    exit_keywords = ["görüşürüz", "hoşça kal", "teşekkürler", "çıkış", "bay bay"]
-    return any(keyword in query.lower() for keyword in exit_keywords)
\ No newline at end of file
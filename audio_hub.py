@@ -0,0 +1,178 @@
+"""
+Single always-on microphone capture.
+The hub owns one input stream for the lifetime of the application and fans
+every captured block out to named subscribers (each with its own ring
+buffer) and taps (plain callables such as the volume meter), so switching
+between wake-word and command listening never reopens the device.
+A rolling pre-roll history lets a new subscriber start from a point in the
+recent past, e.g. right after the wake word.
+With an EchoCanceller, the assistant's own voice is subtracted from every
+block; with an EchoGate, frames captured while it is speaking are silenced.
+Both run before the fan-out.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from audio_ring import FrameRingBuffer, PreRollBuffer
+
+
+def _default_stream_factory(device, sample_rate, block_frames, callback):
+    import sounddevice as sd
+    stream = sd.RawInputStream(device=device, samplerate=sample_rate, blocksize=block_frames,
+                               dtype='int16', channels=1, callback=callback)
+    stream.start()
+    return stream
+
+
+class AudioHub:
+    def __init__(self, sample_rate: int = 16000, block_frames: int = 8000, device=None,
+                 buffer_seconds: float = 10.0, preroll_seconds: float = 5.0, stream_factory=None,
+                 echo_gate=None, echo_canceller=None):
+        self.sample_rate = sample_rate
+        self.echo_gate = echo_gate
+        self.echo_canceller = echo_canceller
+        self.block_frames = block_frames
+        self.device = device
+        self.buffer_frames = int(sample_rate * buffer_seconds)
+        self._stream_factory = stream_factory or _default_stream_factory
+        self._stream = None
+        self._lock = threading.RLock()
+        self._subscribers = {}
+        self._taps = {}
+        self.preroll = PreRollBuffer(int(sample_rate * preroll_seconds))
+
+    @property
+    def position(self) -> int:
+        """Absolute number of frames captured so far."""
+        return self.preroll.position
+
+    def set_preroll_seconds(self, seconds: float):
+        frames = int(self.sample_rate * seconds)
+        with self._lock:
+            if frames != self.preroll.capacity:
+                old = self.preroll
+                self.preroll = PreRollBuffer(frames)
+                self.preroll.position = old.position
+
+    # Stream lifecycle
+    def start(self):
+        with self._lock:
+            if self._stream is None:
+                self._stream = self._stream_factory(self.device, self.sample_rate, self.block_frames,
+                                                    self._callback)
+                if self.echo_canceller is not None:
+                    self.echo_canceller.set_stream_latency(input=getattr(self._stream, "latency", None))
+                logging.info(f"Mikrofon akışı açıldı (cihaz={self.device})")
+
+    def stop(self):
+        # PortAudio's stop waits for a running callback, which needs the lock
+        # in feed(), so the stream is only detached under the lock
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                logging.error(f"Mikrofon akışı kapatma hatası: {e}")
+
+    @property
+    def running(self) -> bool:
+        return self._stream is not None
+
+    def set_device(self, device):
+        """Switch the input device, restarting the stream if it is running."""
+        with self._lock:
+            if device == self.device:
+                return
+            self.device = device
+            running = self._stream is not None
+        if running:
+            self.stop()
+            self.start()
+
+    # Fan-out
+    def subscribe(self, name: str, start_position: int = None) -> FrameRingBuffer:
+        """
+        Return a fresh ring buffer that receives every block captured from now on.
+        With start_position, it is first seeded from the pre-roll history so no
+        audio between that position and the subscription is lost.
+        """
+        with self._lock:
+            if start_position is None:
+                ring = FrameRingBuffer(self.buffer_frames, origin=self.position)
+            else:
+                history = self.preroll.since(start_position)
+                ring = FrameRingBuffer(self.buffer_frames, origin=self.position - len(history))
+                ring.write(history)
+            old = self._subscribers.get(name)
+            self._subscribers[name] = ring
+        if old is not None:
+            old.close()
+        self.start()
+        return ring
+
+    def unsubscribe(self, name: str, ring: FrameRingBuffer = None):
+        """Remove a subscriber; when ring is given, only if it is still the registered one."""
+        with self._lock:
+            current = self._subscribers.get(name)
+            if current is None or (ring is not None and current is not ring):
+                return
+            del self._subscribers[name]
+            ring = current
+        ring.close()
+        stats = ring.stats()
+        if stats["overruns"]:
+            logging.warning(f"'{name}' tamponu taştı: {stats['dropped_frames']} çerçeve atlandı "
+                            f"({stats['overruns']} kez)")
+
+    @contextmanager
+    def subscription(self, name: str, start_position: int = None):
+        ring = self.subscribe(name, start_position)
+        try:
+            yield ring
+        finally:
+            self.unsubscribe(name, ring)
+
+    def add_tap(self, name: str, fn):
+        """Call fn(frames) with every captured int16 block (runs on the audio thread)."""
+        with self._lock:
+            self._taps[name] = fn
+
+    def remove_tap(self, name: str):
+        with self._lock:
+            self._taps.pop(name, None)
+
+    def feed(self, data, now: float = None):
+        """Distribute one captured block to all subscribers and taps; now is its capture time for the echo gate."""
+        frames = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.int16)
+        if len(frames) == 0:
+            return
+        if self.echo_canceller is not None:
+            frames = self.echo_canceller.process(frames, self.position, now)
+        if self.echo_gate is not None:
+            frames = self.echo_gate.process(frames, self.sample_rate, now)
+        # Writes happen under the lock so a subscriber seeded from the pre-roll
+        # sees a gapless stream
+        with self._lock:
+            self.preroll.write(frames)
+            for ring in self._subscribers.values():
+                ring.write(frames)
+            taps = list(self._taps.values())
+        for tap in taps:
+            try:
+                tap(frames)
+            except Exception as e:
+                logging.error(f"Ses dinleyici hatası: {e}")
+
+    def _callback(self, indata, frames, time, status):
+        if status:
+            logging.warning(f"Ses yakalama durumu: {status}")
+        if indata is None or len(indata) == 0:
+            logging.warning("Uyarı: Ses verisi boş geldi!")
+            return
+        self.feed(indata)
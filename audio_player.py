@@ -0,0 +1,210 @@
+"""
+In-process audio playback.
+A single long-lived output stream is fed from a playback queue by a worker
+thread, so each reply costs a buffer write instead of a process spawn.
+Decoded files are kept in memory and playback can be interrupted (barge-in).
+An optional EchoGate is told when each item actually starts and stops
+playing, so the microphone side can ignore the assistant's own voice; an
+optional EchoCanceller receives every block written as its echo reference.
+"""
+
+import os
+import wave
+import queue
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tts_backends import decode_mp3
+
+
+def resample_linear(pcm: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample mono int16 PCM with linear interpolation."""
+    if src_rate == dst_rate or len(pcm) == 0:
+        return pcm
+    n_out = int(round(len(pcm) * dst_rate / src_rate))
+    positions = np.arange(n_out) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(pcm)), pcm).astype(np.int16)
+
+
+def _default_stream_factory(device, sample_rate, block_frames):
+    import sounddevice as sd
+    stream = sd.RawOutputStream(samplerate=sample_rate, channels=1, dtype='int16',
+                                device=device, blocksize=block_frames)
+    stream.start()
+    return stream
+
+
+class PlaybackItem:
+    def __init__(self, chunks, sample_rate, generation=0):
+        self.chunks = chunks
+        self.sample_rate = sample_rate
+        self.generation = generation
+        self.done = threading.Event()
+        self.interrupted = False
+        self.completed = False
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class AudioPlayer:
+    def __init__(self, device=None, sample_rate: int = 24000, block_frames: int = 1024,
+                 buffer_cache_size: int = 64, stream_factory=None, echo_gate=None,
+                 echo_canceller=None):
+        self.device = device
+        self.echo_gate = echo_gate
+        self.echo_canceller = echo_canceller
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames
+        self.buffer_cache_size = buffer_cache_size
+        self._stream_factory = stream_factory or _default_stream_factory
+        self._stream = None
+        self._stream_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._buffers = OrderedDict()
+        self._buffers_lock = threading.Lock()
+        self._current = None
+        self._generation = 0
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name="audio-player", daemon=True)
+        self._worker.start()
+
+    # Stream management
+    def _ensure_stream(self):
+        with self._stream_lock:
+            if self._stream is None:
+                self._stream = self._stream_factory(self.device, self.sample_rate, self.block_frames)
+                if self.echo_canceller is not None:
+                    self.echo_canceller.set_stream_latency(output=getattr(self._stream, "latency", None))
+            return self._stream
+
+    def _close_stream(self):
+        with self._stream_lock:
+            if self._stream is not None:
+                try:
+                    self._stream.stop()
+                    self._stream.close()
+                except Exception as e:
+                    logging.error(f"Ses çıkış akışı kapatma hatası: {e}")
+                self._stream = None
+
+    def set_device(self, device):
+        """Switch the output device; the stream is reopened on the next playback."""
+        if device != self.device:
+            self.device = device
+            self._close_stream()
+
+    # Buffers
+    def load(self, path: str) -> np.ndarray:
+        """Decode an audio file to int16 PCM at the player rate, memoized in memory."""
+        key = (path, os.path.getmtime(path))
+        with self._buffers_lock:
+            if key in self._buffers:
+                self._buffers.move_to_end(key)
+                return self._buffers[key]
+        if path.endswith(".wav"):
+            with wave.open(path, 'rb') as wf:
+                rate = wf.getframerate()
+                pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        else:
+            with open(path, 'rb') as f:
+                rate = self.sample_rate
+                pcm = np.frombuffer(decode_mp3(f.read(), rate), dtype=np.int16)
+        pcm = resample_linear(pcm, rate, self.sample_rate)
+        with self._buffers_lock:
+            self._buffers[key] = pcm
+            while len(self._buffers) > self.buffer_cache_size:
+                self._buffers.popitem(last=False)
+        return pcm
+
+    # Playback queue
+    def enqueue(self, chunks, sample_rate: int) -> PlaybackItem:
+        """Queue an iterable of PCM chunks (bytes or int16 arrays) for playback."""
+        item = PlaybackItem(chunks, sample_rate, self._generation)
+        self._queue.put(item)
+        return item
+
+    def play(self, pcm, sample_rate: int, block: bool = True) -> PlaybackItem:
+        item = self.enqueue([pcm], sample_rate)
+        if block:
+            item.wait()
+        return item
+
+    def play_file(self, path: str, block: bool = True) -> PlaybackItem:
+        return self.play(self.load(path), self.sample_rate, block)
+
+    def play_stream(self, chunks, sample_rate: int, block: bool = True) -> PlaybackItem:
+        item = self.enqueue(chunks, sample_rate)
+        if block:
+            item.wait()
+        return item
+
+    def interrupt(self):
+        """Stop the current utterance and drop everything queued (barge-in)."""
+        self._generation += 1
+        current = self._current
+        if current is not None:
+            current.interrupted = True
+
+    @property
+    def is_playing(self) -> bool:
+        return self._current is not None or not self._queue.empty()
+
+    def close(self):
+        self._running = False
+        self.interrupt()
+        self._queue.put(None)
+        self._worker.join(timeout=2)
+        self._close_stream()
+
+    def _run(self):
+        while self._running:
+            item = self._queue.get()
+            if item is None:
+                break
+            if item.generation != self._generation:
+                item.interrupted = True
+                item.done.set()
+                continue
+            self._current = item
+            try:
+                self._play_item(item)
+            except Exception as e:
+                logging.error(f"Ses oynatma hatası: {e}")
+                self._close_stream()
+            finally:
+                self._current = None
+                item.done.set()
+
+    def _play_item(self, item):
+        stream = self._ensure_stream()
+        gate = self.echo_gate
+        started = False
+        try:
+            for chunk in item.chunks:
+                if item.interrupted:
+                    return
+                pcm = chunk if isinstance(chunk, np.ndarray) else np.frombuffer(chunk, dtype=np.int16)
+                pcm = resample_linear(pcm, item.sample_rate, self.sample_rate)
+                # Write in blocks so an interrupt takes effect within one block
+                for start in range(0, len(pcm), self.block_frames):
+                    if item.interrupted:
+                        return
+                    if not started and gate is not None:
+                        # From the first written block, not from enqueue or synthesis
+                        gate.playback_started()
+                    started = True
+                    block = pcm[start:start + self.block_frames]
+                    if self.echo_canceller is not None:
+                        self.echo_canceller.playback(block, self.sample_rate)
+                    stream.write(block.tobytes())
+            item.completed = True
+        finally:
+            if started and gate is not None:
+                gate.playback_stopped()
+            # Release streaming producers (e.g. a running synthesis subprocess)
+            if hasattr(item.chunks, "close"):
+                item.chunks.close()
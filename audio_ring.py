@@ -0,0 +1,187 @@
+"""
+Preallocated ring buffer for microphone frames.
+The capture callback copies frames into a fixed int16 array under a single
+lock; consumers block on a condition variable instead of polling. When a
+consumer falls behind, the oldest frames are overwritten and counted.
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+
+def waveform_view(block: np.ndarray):
+    """Return a byte view of block that Vosk's AcceptWaveform accepts without copying."""
+    try:
+        from vosk import _ffi
+        return _ffi.from_buffer(block)
+    except ImportError:
+        return memoryview(block).cast('B')
+
+
+class FrameRingBuffer:
+    def __init__(self, capacity_frames: int, dtype=np.int16, origin: int = 0):
+        self.capacity = capacity_frames
+        self.dtype = np.dtype(dtype)
+        self._buf = np.zeros(capacity_frames, dtype=self.dtype)
+        self._cond = threading.Condition()
+        # Absolute frame positions (starting at origin); index into _buf is position % capacity
+        self._read_pos = origin
+        self._write_pos = origin
+        self.last_read_position = origin
+        self._closed = False
+        self.overruns = 0
+        self.dropped_frames = 0
+
+    @property
+    def available(self) -> int:
+        with self._cond:
+            return self._write_pos - self._read_pos
+
+    @property
+    def write_position(self) -> int:
+        with self._cond:
+            return self._write_pos
+
+    def write(self, data):
+        """Copy frames from a buffer (bytes, cffi buffer or ndarray) into the ring."""
+        frames = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=self.dtype)
+        n = len(frames)
+        if n == 0:
+            return
+        with self._cond:
+            if n > self.capacity:
+                # Only the newest frames fit
+                skipped = n - self.capacity
+                self._write_pos += skipped
+                frames = frames[skipped:]
+                n = self.capacity
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._buf[start:start + first] = frames[:first]
+            if first < n:
+                self._buf[:n - first] = frames[first:]
+            self._write_pos += n
+            overflow = self._write_pos - self._read_pos - self.capacity
+            if overflow > 0:
+                self._read_pos += overflow
+                self.overruns += 1
+                self.dropped_frames += overflow
+            self._cond.notify_all()
+
+    def read_into(self, out: np.ndarray, timeout: float = None) -> int:
+        """
+        Wait until len(out) frames are available and copy them into out.
+        Returns the number of frames copied: 0 on timeout, fewer than
+        len(out) only after close().
+        """
+        n = len(out)
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._write_pos - self._read_pos >= n or self._closed, timeout):
+                return 0
+            n = min(n, self._write_pos - self._read_pos)
+            self.last_read_position = self._read_pos
+            start = self._read_pos % self.capacity
+            first = min(n, self.capacity - start)
+            out[:first] = self._buf[start:start + first]
+            if first < n:
+                out[first:n] = self._buf[:n - first]
+            self._read_pos += n
+            return n
+
+    def clear(self):
+        """Discard unread frames."""
+        with self._cond:
+            self._read_pos = self._write_pos
+
+    def close(self):
+        """Wake up blocked readers."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._closed = False
+            self._read_pos = self._write_pos
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"overruns": self.overruns, "dropped_frames": self.dropped_frames,
+                    "buffered_frames": self._write_pos - self._read_pos}
+
+
+class PreRollBuffer:
+    """Rolling history of the most recent frames, addressable by absolute position."""
+
+    def __init__(self, capacity_frames: int, dtype=np.int16):
+        self.capacity = capacity_frames
+        self._buf = np.zeros(capacity_frames, dtype=dtype)
+        self._lock = threading.Lock()
+        self.position = 0
+
+    def write(self, frames: np.ndarray):
+        n = len(frames)
+        with self._lock:
+            if n > self.capacity:
+                self.position += n - self.capacity
+                frames = frames[n - self.capacity:]
+                n = self.capacity
+            start = self.position % self.capacity
+            first = min(n, self.capacity - start)
+            self._buf[start:start + first] = frames[:first]
+            if first < n:
+                self._buf[:n - first] = frames[first:]
+            self.position += n
+
+    def since(self, position: int) -> np.ndarray:
+        """
+        Copy of the frames from position up to now. Frames already overwritten
+        are logged as lost and the copy starts at the oldest kept frame.
+        """
+        with self._lock:
+            oldest = max(self.position - self.capacity, 0)
+            if position < oldest:
+                logging.warning(f"Ön kayıt yetersiz: istenen sesin {oldest - position} karesi "
+                                f"çoktan silinmişti, komutun başı kaybolmuş olabilir")
+            start = max(position, oldest)
+            n = self.position - start
+            out = np.empty(n, dtype=self._buf.dtype)
+            offset = start % self.capacity
+            first = min(n, self.capacity - offset)
+            out[:first] = self._buf[offset:offset + first]
+            if first < n:
+                out[first:] = self._buf[:n - first]
+            return out
+
+
+class BlockReader:
+    """Reads fixed-size blocks from a ring buffer into one preallocated array."""
+
+    def __init__(self, ring: FrameRingBuffer, block_frames: int):
+        self.ring = ring
+        self.block = np.empty(block_frames, dtype=ring.dtype)
+        self._waveform = waveform_view(self.block)
+
+    @property
+    def position(self) -> int:
+        """Absolute capture position of the first frame of the last block read."""
+        return self.ring.last_read_position
+
+    def read(self, timeout: float = None):
+        """Return a zero-copy byte view of the next block, or None on timeout."""
+        n = self.ring.read_into(self.block, timeout)
+        if n == 0:
+            return None
+        if n == len(self.block):
+            return self._waveform
+        # cffi buffers reject slices without an explicit start
+        return self._waveform[0:n * self.block.itemsize]
+
+    def read_frames(self, timeout: float = None):
+        """Like read(), but return the next block as an int16 array view (valid until the next read)."""
+        n = self.ring.read_into(self.block, timeout)
+        if n == 0:
+            return None
+        return self.block[:n]
@@ -0,0 +1,145 @@
+"""
+Latency benchmark for the command pipeline.
+Synthetic command tables of 10 to 10,000 Turkish keywords are matched
+against a corpus of transcripts (exact hits, misrecognized keywords and
+plain chat), and the text helpers (text_helpers, which assistant_logic
+re-exports) run over the same corpus. Each stage reports p50/p99 latency;
+--fail-above-ms turns the run into a regression check. Nothing here
+imports assistant_logic, so running the benchmark does not load settings
+or open the command spool.
+
+The normalization cache is cleared before every timed call, so each call
+pays for normalizing its transcript like a freshly recognized utterance.
+The command_match[size] stages time CommandMatcher.match alone, the lookup
+process_command runs before it journals the matched command; the spool
+write is not included.
+
+    python benchmarks/bench_commands.py --sizes 10 100 1000 10000 --json results.json
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+
+from command_matcher import CommandMatcher
+import normalization
+import text_helpers
+
+SYLLABLES = ["ka", "şe", "gü", "lı", "mü", "zi", "ço", "ğa", "ör", "ne", "ta", "bi", "ıl", "da", "se",
+             "yü", "rü", "çi", "pa", "ke", "ön", "sı", "ha", "ve", "iş", "tü", "lü", "mo", "ra", "ca"]
+FILLERS = ["aç", "lütfen", "başlat", "bana", "şunu", "göster", "hemen", "çalıştır"]
+CHAT = ["bugün hava nasıl", "merhaba nasılsın", "görüşürüz", "bana bir şaka anlat", "teşekkürler",
+        "yirmi üç", "kırk beş", "doksan dokuz", "bir şey sormak istiyorum", "hoşça kal"]
+
+
+def make_commands(size: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    commands = {}
+    while len(commands) < size:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+                 for _ in range(rng.choice((1, 1, 1, 2)))]
+        keyword = " ".join(words)
+        commands[keyword] = {"type": rng.choice(["url", "exe"]), "target": f"hedef-{len(commands)}"}
+    return commands
+
+
+def _misspell(word: str, rng) -> str:
+    i = rng.randrange(len(word))
+    if rng.random() < 0.5:
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice("aeıioöuü") + word[i + 1:]
+
+
+def make_transcripts(commands: dict, count: int = 500, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    keywords = list(commands)
+    transcripts = []
+    for _ in range(count):
+        kind = rng.random()
+        keyword = rng.choice(keywords)
+        if kind < 0.4:
+            text = f"{keyword} {rng.choice(FILLERS)}"
+        elif kind < 0.7:
+            text = f"{rng.choice(FILLERS)} {_misspell(keyword, rng)} {rng.choice(FILLERS)}"
+        else:
+            text = rng.choice(CHAT)
+        transcripts.append(text)
+    return transcripts
+
+
+def measure(fn, inputs, repeat: int = 3) -> dict:
+    fn(inputs[0])
+    timings = []
+    for _ in range(repeat):
+        for text in inputs:
+            # Every recognized utterance is new text: normalize it again instead
+            # of serving the transcript from the memoized previous run
+            normalization.clear_cache()
+            started = time.perf_counter()
+            fn(text)
+            timings.append(time.perf_counter() - started)
+    timings = np.array(timings) * 1000
+    return {"n": len(timings), "p50_ms": float(np.percentile(timings, 50)),
+            "p99_ms": float(np.percentile(timings, 99)), "max_ms": float(timings.max())}
+
+
+def run(sizes, transcripts_per_size: int = 500, repeat: int = 3) -> dict:
+    results = {}
+    for size in sizes:
+        commands = make_commands(size)
+        transcripts = make_transcripts(commands, transcripts_per_size)
+        started = time.perf_counter()
+        matcher = CommandMatcher(commands)
+        matcher.match(transcripts[0])
+        build_ms = (time.perf_counter() - started) * 1000
+        stats = measure(matcher.match, transcripts, repeat)
+        stats["build_ms"] = build_ms
+        results[f"command_match[{size}]"] = stats
+
+    # Text helpers run per utterance in recognize/chat_mode; their cost does not
+    # depend on the command table
+    transcripts = make_transcripts(make_commands(100), transcripts_per_size)
+    results["turkish_number_to_digit"] = measure(text_helpers.turkish_number_to_digit, transcripts, repeat)
+    results["generate_chat_response"] = measure(text_helpers.generate_chat_response, transcripts, repeat)
+    results["is_exit_command"] = measure(text_helpers.is_exit_command, transcripts, repeat)
+    return results
+
+
+def report(results: dict):
+    print(f"{'aşama':<32}{'n':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'kurulum ms':>12}")
+    for name, stats in results.items():
+        build = f"{stats['build_ms']:.1f}" if "build_ms" in stats else "-"
+        print(f"{name:<32}{stats['n']:>8}{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+              f"{stats['max_ms']:>10.3f}{build:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Komut işleme hattı gecikme ölçümü")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--transcripts", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--fail-above-ms", type=float, help="exit with status 1 if any p99 exceeds this")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.transcripts, args.repeat)
+    report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    if args.fail_above_ms is not None:
+        slow = [name for name, stats in results.items() if stats["p99_ms"] > args.fail_above_ms]
+        if slow:
+            print(f"p99 sınırı ({args.fail_above_ms} ms) aşıldı: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
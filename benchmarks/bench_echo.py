@@ -0,0 +1,181 @@
+"""
+Echo canceller benchmark on a synthetic room.
+A speech-like reference (noise shaped by a syllable-rate envelope) is
+played through a random decaying echo path with a bulk delay; the capture
+is that echo plus a little noise, and optionally near-end speech during the
+last quarter (double talk). Reports ERLE (echo return loss enhancement, in
+dB, measured after the filter converged and outside double talk), the
+near-end speech to residual ratio during double talk before and after
+cancellation, and processing time per capture block.
+--path cancel feeds cancel() an aligned reference; --path process runs the
+application path instead: the reference is written block by block through
+playback() and the capture handed to process() on a simulated clock, with
+the output stream playing output-latency after each write and the input
+stream delivering input-latency after capture. It also reports the ERLE
+without latency compensation.
+
+    python benchmarks/bench_echo.py --seconds 10 --block-frames 8000
+    python benchmarks/bench_echo.py --path process --output-latency-ms 100 --input-latency-ms 50
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+import argparse
+
+import numpy as np
+
+from echo_canceller import EchoCanceller
+
+SAMPLE_RATE = 16000
+
+
+def speech_like(n, rng, syllable_hz=4.0):
+    t = np.arange(n) / SAMPLE_RATE
+    envelope = np.clip(np.sin(2 * np.pi * syllable_hz * t + rng.uniform(0, np.pi)), 0, None) ** 2
+    noise = np.convolve(rng.standard_normal(n), np.hanning(12), mode="same")
+    signal = noise * envelope
+    return 0.5 * signal / np.abs(signal).max()
+
+
+def echo_path(rng, delay_ms=20.0, length=1024, gain=0.4):
+    delay = int(SAMPLE_RATE * delay_ms / 1000)
+    taps = rng.standard_normal(length) * np.exp(-np.arange(length) / (length / 6))
+    h = np.zeros(delay + length)
+    h[delay:] = taps
+    # Unit energy, so gain is roughly the echo level relative to the reference
+    return gain * h / np.sqrt(np.sum(taps ** 2))
+
+
+def erle_db(capture, residual):
+    return float(10 * np.log10(np.sum(capture ** 2) / max(np.sum(residual ** 2), 1e-20)))
+
+
+def make_signals(seconds, delay_ms, double_talk, seed):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    reference = speech_like(n, rng)
+    echo = np.convolve(reference, echo_path(rng, delay_ms))[:n]
+    near = np.zeros(n)
+    talk_start = int(n * 0.75)
+    if double_talk:
+        near[talk_start:] = speech_like(n - talk_start, rng, syllable_hz=3.0) * 0.8
+    noise = rng.standard_normal(n) * 1e-4
+    return reference, echo, near, noise, talk_start
+
+
+def summarize(aec, echo, near, capture, out, talk_start, block_ms, block_frames, double_talk):
+    n = len(capture)
+    sub_block = aec.block
+    # Undo the one sub-block output delay
+    out = np.concatenate([out[sub_block:], np.zeros(sub_block)])
+    converged = int(SAMPLE_RATE * 2)
+    single_talk_end = talk_start if double_talk else n
+    result = {
+        "erle_db": erle_db(echo[converged:single_talk_end], out[converged:single_talk_end]),
+        "block_frames": block_frames,
+        "block_ms_p50": float(np.percentile(block_ms, 50)),
+        "block_ms_p99": float(np.percentile(block_ms, 99)),
+        "block_budget_ms": block_frames * 1000 / SAMPLE_RATE,
+        **{f"aec_{key}": value for key, value in aec.stats().items()},
+    }
+    if double_talk:
+        # Near-end speech against everything else in the signal, before and after cancellation
+        talk = slice(talk_start, n - sub_block)
+        result["near_end_snr_in_db"] = erle_db(near[talk], capture[talk] - near[talk])
+        result["near_end_snr_out_db"] = erle_db(near[talk], out[talk] - near[talk])
+    return result
+
+
+def run(seconds=10.0, block_frames=8000, sub_block=256, filter_length=2048, delay_ms=20.0,
+        double_talk=True, seed=0) -> dict:
+    reference, echo, near, noise, talk_start = make_signals(seconds, delay_ms, double_talk, seed)
+    capture = echo + near + noise
+    n = len(capture)
+
+    aec = EchoCanceller(SAMPLE_RATE, block=sub_block, filter_length=filter_length, budget=10.0)
+    out = np.zeros(n)
+    block_ms = []
+    for offset in range(0, n, block_frames):
+        started = time.perf_counter()
+        chunk = aec.cancel(capture[offset:offset + block_frames], reference[offset:offset + block_frames])
+        block_ms.append((time.perf_counter() - started) * 1000)
+        out[offset:offset + len(chunk)] = chunk
+    return {"path": "cancel", "seconds": seconds,
+            **summarize(aec, echo, near, capture, out, talk_start, block_ms, block_frames, double_talk)}
+
+
+def run_process(seconds=10.0, block_frames=8000, sub_block=256, filter_length=2048, delay_ms=20.0,
+                double_talk=True, seed=0, output_latency_ms=100.0, input_latency_ms=50.0,
+                player_block=1024, compensate=True) -> dict:
+    reference, echo, near, noise, talk_start = make_signals(seconds, delay_ms, double_talk, seed)
+    n = len(reference)
+    # What the microphone picks up at each capture position: the echo of what was
+    # written output-latency earlier
+    lag = int(SAMPLE_RATE * output_latency_ms / 1000)
+    echo = np.concatenate([np.zeros(lag), echo])[:n]
+    capture = echo + near + noise
+    to_pcm = lambda x: np.clip(x * 32768, -32768, 32767).astype(np.int16)
+
+    clock = [1000.0]
+    aec = EchoCanceller(SAMPLE_RATE, block=sub_block, filter_length=filter_length, budget=10.0,
+                        clock=lambda: clock[0])
+    if compensate:
+        aec.set_stream_latency(output=output_latency_ms / 1000, input=input_latency_ms / 1000)
+    # Player writes, then microphone callbacks, in time order
+    events = [(offset / SAMPLE_RATE, 0, offset) for offset in range(0, n, player_block)]
+    events += [((offset + block_frames) / SAMPLE_RATE + input_latency_ms / 1000, 1, offset)
+               for offset in range(0, n, block_frames)]
+    out = np.zeros(n)
+    block_ms = []
+    for t, kind, offset in sorted(events):
+        clock[0] = 1000.0 + t
+        if kind == 0:
+            aec.playback(to_pcm(reference[offset:offset + player_block]), SAMPLE_RATE)
+            continue
+        started = time.perf_counter()
+        chunk = aec.process(to_pcm(capture[offset:offset + block_frames]), offset, now=clock[0])
+        block_ms.append((time.perf_counter() - started) * 1000)
+        out[offset:offset + len(chunk)] = chunk.astype(np.float64) / 32768
+    result = {"path": "process", "seconds": seconds, "output_latency_ms": output_latency_ms,
+              "input_latency_ms": input_latency_ms, "compensated": compensate,
+              **summarize(aec, echo, near, capture, out, talk_start, block_ms, block_frames, double_talk)}
+    if compensate:
+        uncompensated = run_process(seconds, block_frames, sub_block, filter_length, delay_ms, double_talk,
+                                    seed, output_latency_ms, input_latency_ms, player_block, compensate=False)
+        result["erle_uncompensated_db"] = uncompensated["erle_db"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Yankı giderici ERLE ve işlem süresi ölçümü")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--block-frames", type=int, default=8000, help="capture block size (AudioHub)")
+    parser.add_argument("--sub-block", type=int, default=256)
+    parser.add_argument("--filter-length", type=int, default=2048)
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="bulk delay of the echo path")
+    parser.add_argument("--no-double-talk", action="store_true")
+    parser.add_argument("--path", choices=("cancel", "process"), default="cancel")
+    parser.add_argument("--output-latency-ms", type=float, default=100.0, help="process path only")
+    parser.add_argument("--input-latency-ms", type=float, default=50.0, help="process path only")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    if args.path == "process":
+        result = run_process(args.seconds, args.block_frames, args.sub_block, args.filter_length, args.delay_ms,
+                             not args.no_double_talk, output_latency_ms=args.output_latency_ms,
+                             input_latency_ms=args.input_latency_ms)
+    else:
+        result = run(args.seconds, args.block_frames, args.sub_block, args.filter_length, args.delay_ms,
+                     not args.no_double_talk)
+    print(json.dumps(result, indent=4))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
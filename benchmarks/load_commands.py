@@ -0,0 +1,116 @@
+"""
+Load generator for the command delivery path.
+Fires a stream of commands at the endpoint (by default a local dry-run
+command_server started in-process) and reports throughput and latency
+percentiles for:
+  dispatcher  one POST per command through CommandDispatcher.submit
+              (latency is submit to reply, including queueing in the burst)
+  spool       journaled commands drained by CommandSpool in batches
+              (enqueue latency, and total time until the journal is empty)
+
+    python benchmarks/load_commands.py --commands 2000 --concurrency 8
+    python benchmarks/load_commands.py --url http://192.168.1.19:5000/endpoint
+"""
+
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import time
+import argparse
+import tempfile
+import concurrent.futures
+
+import numpy as np
+
+from command_dispatcher import CommandDispatcher
+from command_spool import CommandSpool
+from command_server import serve_in_background
+
+CMD_TYPES = [("url", "https://www.youtube.com/"), ("exe", "notepad.exe"), ("url", "https://www.google.com")]
+
+
+def _percentiles(latencies_ms) -> dict:
+    values = np.array(latencies_ms)
+    return {"p50_ms": float(np.percentile(values, 50)), "p99_ms": float(np.percentile(values, 99)),
+            "max_ms": float(values.max())}
+
+
+def bench_dispatcher(url: str, count: int, concurrency: int) -> dict:
+    dispatcher = CommandDispatcher(url, max_workers=concurrency)
+    latencies = []
+
+    def record(started):
+        return lambda future: latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    futures = []
+    for i in range(count):
+        cmd_type, target = CMD_TYPES[i % len(CMD_TYPES)]
+        future = dispatcher.submit(cmd_type, target, result="xxx")
+        future.add_done_callback(record(time.perf_counter()))
+        futures.append(future)
+    done, _ = concurrent.futures.wait(futures)
+    elapsed = time.perf_counter() - started
+    dispatcher.close()
+    errors = sum(1 for f in done if f.exception() is not None)
+    return {"commands": count, "errors": errors, "seconds": elapsed,
+            "throughput_per_s": count / elapsed, **_percentiles(latencies)}
+
+
+def bench_spool(url: str, count: int, batch_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        dispatcher = CommandDispatcher(url)
+        spool = CommandSpool(os.path.join(tmp, "spool.db"), dispatcher, batch_size=batch_size)
+        enqueue_ms = []
+        started = time.perf_counter()
+        for i in range(count):
+            cmd_type, target = CMD_TYPES[i % len(CMD_TYPES)]
+            t = time.perf_counter()
+            spool.enqueue(cmd_type, target, result="xxx")
+            enqueue_ms.append((time.perf_counter() - t) * 1000)
+        drained = spool.flush(timeout=300)
+        elapsed = time.perf_counter() - started
+        spool.close()
+        dispatcher.close()
+    stats = _percentiles(enqueue_ms)
+    return {"commands": count, "drained": drained, "seconds": elapsed, "throughput_per_s": count / elapsed,
+            "enqueue_p50_ms": stats["p50_ms"], "enqueue_p99_ms": stats["p99_ms"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Komut gönderim hattı için yük üreteci")
+    parser.add_argument("--url", help="target endpoint; a local dry-run server is started when omitted")
+    parser.add_argument("--commands", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated execution time of the local server")
+    parser.add_argument("--mode", choices=["dispatcher", "spool", "both"], default="both")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    url = args.url
+    if url is None:
+        server = serve_in_background(latency=args.latency_ms / 1000)
+        url = f"http://127.0.0.1:{server.server_address[1]}/endpoint"
+
+    results = {}
+    if args.mode in ("dispatcher", "both"):
+        results["dispatcher"] = bench_dispatcher(url, args.commands, args.concurrency)
+    if args.mode in ("spool", "both"):
+        results["spool"] = bench_spool(url, args.commands, args.batch_size)
+    if server is not None:
+        results["server_requests"] = server.requests
+        server.shutdown()
+        server.server_close()
+
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Non-blocking delivery of commands to the remote PC endpoint.
+All requests share one requests.Session, so the TCP connection is kept alive
+between commands, and every request has connect/read timeouts. Only failures
+to connect are retried (with exponential backoff): once a POST has reached
+the server the command may already have run, so read errors are not retried.
+submit() returns a future immediately and the voice loop never waits on the
+network.
+"""
+
+import time
+import logging
+import concurrent.futures
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class CommandDispatcher:
+    def __init__(self, url: str, connect_timeout: float = 2.0, read_timeout: float = 5.0,
+                 retries: int = 2, backoff: float = 0.5, max_workers: int = 4, session=None,
+                 batch_url: str = None):
+        self.url = url
+        self.batch_url = batch_url or url.rstrip("/") + "/batch"
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = session or requests.Session()
+        retry = Retry(total=retries, connect=retries, read=0, status=0, other=0,
+                      backoff_factor=backoff, allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                               thread_name_prefix="dispatcher")
+
+    def _post(self, url, body):
+        response = self.session.post(url, json=body, timeout=self.timeout)
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            return response.text
+
+    def send(self, payload: dict):
+        """POST one payload and return the decoded reply (JSON if possible, else text)."""
+        return self._post(self.url, payload)
+
+    def send_batch(self, payloads: list):
+        """POST several payloads in one request as {"commands": [...]}."""
+        return self._post(self.batch_url, {"commands": payloads})
+
+    def _run(self, payload, delay):
+        if delay:
+            time.sleep(delay)
+        started = time.perf_counter()
+        try:
+            reply = self.send(payload)
+        except Exception as e:
+            logging.error(f"Komut gönderilemedi ({payload.get('cmd_type')}): {e}")
+            raise
+        logging.info(f"Sunucudan yanıt ({(time.perf_counter() - started) * 1000:.0f} ms): {reply}")
+        return reply
+
+    def submit(self, cmd_type: str, target: str, delay: float = 0, **extra) -> concurrent.futures.Future:
+        """
+        Queue a command and return a future for the server reply.
+        delay postpones sending, e.g. until a spoken confirmation has finished.
+        """
+        payload = {"cmd_type": cmd_type, "target": target, **extra}
+        return self._executor.submit(self._run, payload, delay)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
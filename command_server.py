@@ -0,0 +1,190 @@
+"""
+Local stand-in for the command endpoint running on the PC.
+It accepts the same {"cmd_type", "target"} JSON the assistant posts, on
+/endpoint (and the older /komut) plus /endpoint/batch, and hands
+each command to a dry-run executor that only reports what it would do.
+A command whose "command_id" was already executed (a retry after a read
+timeout) gets the original reply again instead of running twice. Useful
+for testing the client and measuring dispatcher throughput on one machine.
+
+    python command_server.py --port 5000
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _open_url(target):
+    return f"tarayıcıda açılacak: {target}"
+
+
+def _run_exe(target):
+    return f"çalıştırılacak: {target}"
+
+
+def _sleep(target):
+    return "bilgisayar uyku moduna alınacak"
+
+
+def _shutdown(target):
+    return "bilgisayar kapatılacak"
+
+
+EXECUTORS = {
+    "url": _open_url,
+    "exe": _run_exe,
+    "uyku modu": _sleep,
+    "bilgisayarı kapat": _shutdown,
+}
+
+
+class CommandServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.0, remember: int = 1024):
+        super().__init__(address, CommandHandler)
+        # Simulated execution time per command
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.executed = []
+        self.requests = 0
+        self.duplicates = 0
+        # command_id -> reply of the most recently executed commands
+        self.remember = remember
+        self._replies = OrderedDict()
+        # command_id -> Event set when the request running it has finished
+        self._running = {}
+
+    def _reserve(self, command_id):
+        """
+        Claim command_id for this request and return None, or the reply of the
+        request that already ran it; a duplicate of a command still running
+        waits for it to finish.
+        """
+        while True:
+            with self.lock:
+                reply = self._replies.get(command_id)
+                if reply is not None:
+                    self.duplicates += 1
+                    return reply
+                running = self._running.get(command_id)
+                if running is None:
+                    self._running[command_id] = threading.Event()
+                    return None
+            running.wait()
+
+    def execute(self, command: dict) -> dict:
+        cmd_type = command.get("cmd_type")
+        executor = EXECUTORS.get(cmd_type)
+        if executor is None or "target" not in command:
+            raise ValueError(f"bilinmeyen komut: {cmd_type}")
+        command_id = command.get("command_id")
+        if command_id is not None:
+            reply = self._reserve(command_id)
+            if reply is not None:
+                logging.info(f"[dry-run] tekrar gönderilen komut atlandı: {command_id}")
+                return reply
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            action = executor(command["target"])
+        except Exception:
+            if command_id is not None:
+                # Let a retry run it again
+                with self.lock:
+                    self._running.pop(command_id).set()
+            raise
+        reply = {"status": "ok", "cmd_type": cmd_type, "action": action}
+        with self.lock:
+            self.executed.append(command)
+            if command_id is not None:
+                self._replies[command_id] = reply
+                self._running.pop(command_id).set()
+                if len(self._replies) > self.remember:
+                    self._replies.popitem(last=False)
+        logging.info(f"[dry-run] {action}")
+        return reply
+
+
+class CommandHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # replies stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        with self.server.lock:
+            self.server.requests += 1
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        except ValueError:
+            return self._reply(400, {"status": "error", "error": "geçersiz JSON"})
+        path = self.path.rstrip("/")
+        try:
+            if path in ("/endpoint", "/komut"):
+                return self._reply(200, self.server.execute(body))
+            if path in ("/endpoint/batch", "/komut/batch"):
+                # Each command succeeds or fails on its own
+                results = []
+                for command in body["commands"]:
+                    try:
+                        results.append(self.server.execute(command))
+                    except (ValueError, TypeError, AttributeError) as e:
+                        results.append({"status": "error", "error": str(e)})
+                return self._reply(200, {"status": "ok", "results": results})
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return self._reply(400, {"status": "error", "error": str(e)})
+        self._reply(404, {"status": "error", "error": "bulunamadı"})
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.lock:
+                return self._reply(200, {"requests": self.server.requests, "executed": len(self.server.executed),
+                                         "duplicates": self.server.duplicates})
+        self._reply(404, {"status": "error", "error": "bulunamadı"})
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+
+def serve_in_background(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0) -> CommandServer:
+    """Start a server on a daemon thread; port 0 picks a free port (see server_address)."""
+    server = CommandServer((host, port), latency)
+    threading.Thread(target=server.serve_forever, name="command-server", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Komut uç noktası için yerel deneme sunucusu (dry-run)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated execution time per command")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    server = CommandServer((args.host, args.port), args.latency_ms / 1000)
+    logging.info(f"Komut sunucusu dinleniyor: http://{args.host}:{server.server_address[1]}/endpoint")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Durable outbound queue for remote commands.
+Commands are appended to a local SQLite journal and the voice loop returns
+immediately. A background worker drains the journal through the
+CommandDispatcher: bursts are coalesced into one batch POST (falling back to
+single posts when the server has no batch endpoint), and while the PC is
+unreachable the commands stay on disk and are retried with backoff, also
+across restarts. Several spools may share one journal file; each only
+drains the rows addressed to its dispatcher's URL. Delivery is
+at-least-once: a POST that timed out may already have run on the PC, so
+every command carries a "command_id" idempotency key that stays the same
+across retries, and the server ignores ids it has already executed.
+Commands older than max_age are dropped instead of firing long after they
+were spoken.
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+
+import requests
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL,
+    not_before REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Server replies meaning "no batch endpoint here"
+_BATCH_UNSUPPORTED = (404, 405, 501)
+
+
+def _status(error):
+    response = getattr(error, "response", None)
+    return response.status_code if response is not None else None
+
+
+class CommandSpool:
+    def __init__(self, path: str, dispatcher, batch_size: int = 20, linger: float = 0.05,
+                 retry_interval: float = 1.0, max_retry_interval: float = 60.0, max_age: float = 3600.0):
+        self.path = path
+        self.dispatcher = dispatcher
+        self.url = dispatcher.url
+        self.batch_size = batch_size
+        self.linger = linger
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.max_age = max_age
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Condition()
+        self._batch_supported = None
+        self.delivered = 0
+        self.dropped = 0
+        self._worker = threading.Thread(target=self._run, name="command-spool", daemon=True)
+        self._worker.start()
+
+    # Producer side
+    def enqueue(self, cmd_type: str, target: str, delay: float = 0, **extra) -> int:
+        """Journal a command for delivery and return its id; never waits on the network."""
+        payload = json.dumps({"cmd_type": cmd_type, "target": target, **extra, "command_id": uuid.uuid4().hex},
+                             ensure_ascii=False)
+        now = time.time()
+        with self._db_lock:
+            cursor = self._db.execute("INSERT INTO commands (url, payload, created, not_before) VALUES (?, ?, ?, ?)",
+                                      (self.url, payload, now, now + delay))
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    def pending_count(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM commands WHERE url = ?", (self.url,)).fetchone()[0]
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until the journal is empty; returns False on timeout."""
+        self._wakeup.set()
+        with self._idle:
+            return self._idle.wait_for(lambda: self.pending_count() == 0, timeout)
+
+    def close(self):
+        """Stop the worker and close the journal; commands not sent yet stay on disk."""
+        self._stop.set()
+        self._wakeup.set()
+        # The worker may be inside a POST (read timeout plus retries) and still
+        # has to record its outcome, so the journal stays open until it is done
+        self._worker.join()
+        with self._db_lock:
+            self._db.close()
+
+    # Worker side
+    def _due(self, now):
+        with self._db_lock:
+            expired = self._db.execute("DELETE FROM commands WHERE url = ? AND created < ?",
+                                       (self.url, now - self.max_age)).rowcount
+            rows = self._db.execute("SELECT id, payload FROM commands WHERE url = ? AND not_before <= ? "
+                                    "ORDER BY id LIMIT ?", (self.url, now, self.batch_size)).fetchall()
+            next_due = self._db.execute("SELECT MIN(not_before) FROM commands WHERE url = ? AND not_before > ?",
+                                        (self.url, now)).fetchone()[0]
+        if expired:
+            self.dropped += expired
+            logging.warning(f"Süresi dolan {expired} komut gönderilmeden silindi")
+        return rows, next_due
+
+    def _remove(self, ids):
+        with self._db_lock:
+            self._db.executemany("DELETE FROM commands WHERE id = ?", [(i,) for i in ids])
+
+    def _mark_failed(self, ids):
+        with self._db_lock:
+            self._db.executemany("UPDATE commands SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+
+    @staticmethod
+    def _rejected_in_batch(payloads, reply) -> int:
+        """Log the commands a batch reply reports as failed; retrying them will not help."""
+        results = reply.get("results") if isinstance(reply, dict) else None
+        if not isinstance(results, list):
+            return 0
+        rejected = 0
+        for payload, result in zip(payloads, results):
+            if isinstance(result, dict) and result.get("status") == "error":
+                logging.error(f"Komut reddedildi ve silindi ({payload.get('cmd_type')}): {result.get('error')}")
+                rejected += 1
+        return rejected
+
+    def _deliver(self, rows) -> bool:
+        """Send rows; True when all of them were handled, False to back off and retry."""
+        ids = [row_id for row_id, _ in rows]
+        payloads = [json.loads(payload) for _, payload in rows]
+        if len(rows) > 1 and self._batch_supported is not False:
+            try:
+                reply = self.dispatcher.send_batch(payloads)
+                self._batch_supported = True
+                self._remove(ids)
+                rejected = self._rejected_in_batch(payloads, reply)
+                self.dropped += rejected
+                self.delivered += len(ids) - rejected
+                return True
+            except requests.HTTPError as e:
+                status = _status(e)
+                if status in _BATCH_UNSUPPORTED:
+                    logging.info("Sunucu toplu gönderimi desteklemiyor, komutlar tek tek gönderilecek")
+                    self._batch_supported = False
+                elif status is None or status >= 500:
+                    logging.error(f"Toplu komut gönderimi başarısız: {e}")
+                    self._mark_failed(ids)
+                    return False
+                else:
+                    # The batch was rejected as a whole: send the commands one by one
+                    # so only the offending ones are dropped
+                    logging.warning(f"Toplu gönderim reddedildi, komutlar tek tek gönderilecek: {e}")
+            except requests.RequestException as e:
+                logging.warning(f"Sunucuya ulaşılamadı, {len(ids)} komut bekletiliyor: {e}")
+                self._mark_failed(ids)
+                return False
+        for row_id, payload in zip(ids, payloads):
+            if self._stop.is_set():
+                return False
+            try:
+                self.dispatcher.send(payload)
+                self.delivered += 1
+            except requests.HTTPError as e:
+                status = _status(e)
+                if status is None or status >= 500:
+                    self._mark_failed([row_id])
+                    return False
+                # The server rejected this command; retrying will not help
+                logging.error(f"Komut reddedildi ve silindi ({payload.get('cmd_type')}): {e}")
+                self.dropped += 1
+            except requests.RequestException as e:
+                logging.warning(f"Sunucuya ulaşılamadı, komut bekletiliyor: {e}")
+                self._mark_failed([row_id])
+                return False
+            self._remove([row_id])
+        return True
+
+    def _run(self):
+        backoff = self.retry_interval
+        while not self._stop.is_set():
+            rows, next_due = self._due(time.time())
+            if not rows:
+                with self._idle:
+                    self._idle.notify_all()
+                timeout = max(0.0, next_due - time.time()) if next_due is not None else None
+                self._wakeup.wait(timeout)
+                self._wakeup.clear()
+                continue
+            if len(rows) < self.batch_size and self.linger:
+                # Let a burst of commands arrive so they travel in one request
+                time.sleep(self.linger)
+                rows, _ = self._due(time.time())
+                if not rows:
+                    continue
+            if self._deliver(rows):
+                backoff = self.retry_interval
+            else:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_retry_interval)
@@ -1,45 +1,20 @@
-from fuzzywuzzy import fuzz
-import requests
+# Ayarlar ve komut eşleştirici assistant_logic ile ortak: ayarlar.json'u tek bir
+# örnek izler, dosya değiştiğinde eşleştirici kendini günceller
+from assistant_logic import command_spool, settings, command_matcher
 import webbrowser
 import subprocess
-import json
-
-# Komutları ayarlar.json'dan yükle
-with open("ayarlar.json", "r", encoding="utf-8") as f:
-    config = json.load(f)
-commands = config.get("commands", {})
-
-url = "http://192.168.1.19:5000/komut"  # Bilgisayar IP'si
 
 def process_command(text, threshold=75):
-    text_lower = text.lower()
-
-    for keyword, details in commands.items():
-        if keyword in text_lower:
-            send_command(details)
-            return keyword
-
-    best_keyword = None
-    best_score = 0
-    for keyword, details in commands.items():
-        score = fuzz.ratio(text_lower, keyword)
-        if score > best_score:
-            best_keyword, best_score = keyword, score
-
-    if best_score >= threshold:
-        send_command(commands[best_keyword])
-        return best_keyword
-    else:
-        print("Komut eşleşmedi")
+    match = command_matcher.match(text, threshold)
+    if match is not None:
+        send_command(match.details)
+        return match.keyword
+    print("Komut eşleşmedi")
     return None
 
 def send_command(details):
-    try:
-        data = {"cmd_type": details["type"], "target": details["target"]}
-        response = requests.post(url, json=data)
-        print("Sunucudan yanıt:", response.json())
-    except Exception as e:
-        print("İstek gönderilirken hata:", e)
+    """Journal the command in the shared spool; it is delivered once the PC is reachable."""
+    return command_spool.enqueue(details["type"], details["target"])
 
 # Örnek test
 if __name__ == "__main__":
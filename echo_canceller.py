@@ -0,0 +1,249 @@
+"""
+Acoustic echo cancellation for full-duplex barge-in.
+The TTS playback that AudioPlayer writes is recorded on a 16 kHz timeline
+(PlaybackReference); AudioHub hands every captured block to the canceller,
+which looks up the reference played at the same time and subtracts its
+estimated echo with a partitioned-block frequency-domain NLMS filter
+(overlap-save, one vectorized update for all partitions per sub-block). A
+Geigel double-talk detector freezes adaptation while the user talks over
+the reply, so "iptal" survives. The reference is stamped when a block is
+written to the output stream, so a captured block is matched with the
+reference written input latency + output latency (as reported by the two
+streams) + delay earlier; the filter then only has to cover the room's
+echo path. While nothing has been played for a whole filter length the
+stage is a plain delay line. Adaptation is thinned out when a block takes
+longer than budget times its duration, keeping the CPU cost per block
+bounded on slow machines. The output lags the input by one sub-block
+(16 ms by default).
+"""
+
+import time
+import threading
+
+import numpy as np
+
+from audio_player import resample_linear
+
+
+class PlaybackReference:
+    """Played PCM on a sample timeline anchored to the clock; silence where nothing played."""
+
+    def __init__(self, sample_rate: int = 16000, seconds: float = 5.0, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self.clock = clock
+        self.capacity = int(sample_rate * seconds)
+        self._buf = np.zeros(self.capacity, dtype=np.float32)
+        self._lock = threading.Lock()
+        self._origin = clock()
+        # Timeline index just past the last written sample
+        self._end = 0
+
+    def index(self, t: float) -> int:
+        return int(round((t - self._origin) * self.sample_rate))
+
+    def _put(self, start, samples):
+        n = len(samples)
+        offset = start % self.capacity
+        first = min(n, self.capacity - offset)
+        self._buf[offset:offset + first] = samples[:first]
+        if first < n:
+            self._buf[:n - first] = samples[first:]
+
+    def push(self, pcm: np.ndarray, sample_rate: int, now: float = None):
+        """Record a block handed to the output stream; it plays after whatever is still queued."""
+        pcm = resample_linear(pcm, sample_rate, self.sample_rate)
+        samples = pcm.astype(np.float32) / 32768.0
+        if len(samples) > self.capacity:
+            samples = samples[-self.capacity:]
+        with self._lock:
+            start = max(self._end, self.index(self.clock() if now is None else now))
+            gap = start - self._end
+            if gap > 0:
+                self._put(self._end, np.zeros(min(gap, self.capacity), dtype=np.float32))
+            self._put(start, samples)
+            self._end = start + len(samples)
+
+    def read(self, start: int, n: int) -> np.ndarray:
+        """Samples [start, start + n) of the timeline; zeros where nothing (retained) was played."""
+        out = np.zeros(n, dtype=np.float32)
+        with self._lock:
+            lo = max(start, self._end - self.capacity)
+            hi = min(start + n, self._end)
+            if lo < hi:
+                offset = lo % self.capacity
+                first = min(hi - lo, self.capacity - offset)
+                out[lo - start:lo - start + first] = self._buf[offset:offset + first]
+                if first < hi - lo:
+                    out[lo - start + first:hi - start] = self._buf[:hi - lo - first]
+        return out
+
+
+class EchoCanceller:
+    def __init__(self, sample_rate: int = 16000, block: int = 256, filter_length: int = 2048,
+                 mu: float = 0.5, delay: float = 0.0, dtd_threshold: float = 0.6, dtd_hangover: int = 8,
+                 budget: float = 0.5, enabled: bool = True, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self.block = block
+        self.partitions = max(1, -(-filter_length // block))
+        self.mu = mu
+        # Bulk delay from writing a block until its echo is captured, on top of the stream latencies
+        self.delay = delay
+        # Reported by AudioPlayer and AudioHub when they open their streams
+        self.output_latency = 0.0
+        self.input_latency = 0.0
+        self.dtd_threshold = dtd_threshold
+        self.dtd_hangover = dtd_hangover
+        self.budget = budget
+        self.enabled = enabled
+        self.clock = clock
+        self.reference = PlaybackReference(sample_rate, clock=clock)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget the echo path and all buffered audio."""
+        with self._lock:
+            bins = self.block + 1
+            self._W = np.zeros((self.partitions, bins), dtype=np.complex128)
+            self._X = np.zeros((self.partitions, bins), dtype=np.complex128)
+            self._power = np.full(bins, 1e-6)
+            self._ref_prev = np.zeros(self.block)
+            # Recent reference peaks, one per sub-block, for the double-talk detector
+            self._ref_peaks = np.zeros(self.partitions)
+            self._silent_blocks = self.partitions
+            self._double_talk = 0
+            self._adapt_stride = 1
+            self._block_count = 0
+            self._pending_capture = np.zeros(0, dtype=np.float32)
+            self._pending_ref = np.zeros(0, dtype=np.float32)
+            # Output delay line, primed with one sub-block of silence
+            self._out = np.zeros(self.block, dtype=np.float32)
+            self._capture_origin = None
+            self.stats_blocks = 0
+            self.stats_adapted = 0
+            self.stats_double_talk = 0
+            self.stats_bypassed = 0
+            self.stats_over_budget = 0
+            self.processing_seconds = 0.0
+
+    def set_stream_latency(self, output: float = None, input: float = None):
+        """Record a stream's reported latency in seconds; the echo path is relearned when it changes."""
+        changed = False
+        if output is not None and output != self.output_latency:
+            self.output_latency = output
+            changed = True
+        if input is not None and input != self.input_latency:
+            self.input_latency = input
+            changed = True
+        if changed:
+            self.reset()
+
+    @property
+    def total_delay(self) -> float:
+        """Seconds between writing a reference sample and capturing its echo, before the room's echo path."""
+        return self.output_latency + self.input_latency + self.delay
+
+    # Player side
+    def playback(self, pcm: np.ndarray, sample_rate: int):
+        if self.enabled:
+            self.reference.push(pcm, sample_rate)
+
+    # Capture side
+    def process(self, frames: np.ndarray, position: int, now: float = None) -> np.ndarray:
+        """Cancel the echo in a captured int16 block starting at absolute capture position."""
+        if not self.enabled:
+            return frames
+        n = len(frames)
+        if now is None:
+            now = self.clock()
+        with self._lock:
+            # Capture positions are mapped to the clock once and re-anchored only on a jump
+            # (device change, overrun), so per-callback jitter does not move the alignment
+            origin = self._capture_origin
+            if origin is None or abs(origin + (position + n) / self.sample_rate - now) > 0.1:
+                self._capture_origin = now - (position + n) / self.sample_rate
+            start_time = self._capture_origin + position / self.sample_rate - self.total_delay
+            reference = self.reference.read(self.reference.index(start_time), n)
+            out = self._cancel(frames.astype(np.float32) / 32768.0, reference)
+        return np.clip(out * 32768.0, -32768, 32767).astype(np.int16)
+
+    def cancel(self, capture: np.ndarray, reference: np.ndarray) -> np.ndarray:
+        """Cancel with an already aligned reference (both float in [-1, 1]); output lags by one sub-block."""
+        with self._lock:
+            return self._cancel(np.asarray(capture, dtype=np.float32), np.asarray(reference, dtype=np.float32))
+
+    def _cancel(self, capture, reference):
+        started = time.perf_counter()
+        B = self.block
+        n = len(capture)
+        capture = np.concatenate([self._pending_capture, capture])
+        reference = np.concatenate([self._pending_ref, reference])
+        usable = len(capture) // B * B
+        processed = [self._out]
+        for offset in range(0, usable, B):
+            processed.append(self._process_block(capture[offset:offset + B], reference[offset:offset + B]))
+        self._pending_capture = capture[usable:]
+        self._pending_ref = reference[usable:]
+        out = np.concatenate(processed)
+        self._out = out[n:]
+        elapsed = time.perf_counter() - started
+        self.processing_seconds += elapsed
+        # Keep the cost per block within budget by adapting less often
+        if elapsed > self.budget * n / self.sample_rate:
+            self.stats_over_budget += 1
+            self._adapt_stride = min(self._adapt_stride * 2, 8)
+        elif self._adapt_stride > 1 and elapsed < self.budget * n / self.sample_rate / 4:
+            self._adapt_stride //= 2
+        return out[:n]
+
+    def _process_block(self, d, x):
+        B = self.block
+        self.stats_blocks += 1
+        self._block_count += 1
+        peak = float(np.abs(x).max())
+        self._ref_peaks = np.roll(self._ref_peaks, 1)
+        self._ref_peaks[0] = peak
+        if peak == 0.0:
+            self._silent_blocks += 1
+            if self._silent_blocks > self.partitions:
+                # Nothing played within the filter length: no echo to remove
+                self._ref_prev[:] = 0.0
+                self.stats_bypassed += 1
+                return d.astype(np.float32)
+        else:
+            self._silent_blocks = 0
+
+        X = np.fft.rfft(np.concatenate([self._ref_prev, x]))
+        self._ref_prev = x.astype(np.float64)
+        self._X = np.roll(self._X, 1, axis=0)
+        self._X[0] = X
+        Y = np.einsum("pk,pk->k", self._W, self._X)
+        e = d - np.fft.irfft(Y, 2 * B)[B:]
+
+        # Geigel double-talk detector: near-end speech louder than the echo can be
+        ref_peak = self._ref_peaks.max()
+        if np.abs(d).max() > self.dtd_threshold * ref_peak:
+            self._double_talk = self.dtd_hangover
+        if self._double_talk:
+            self._double_talk -= 1
+            self.stats_double_talk += 1
+        elif ref_peak > 0 and self._block_count % self._adapt_stride == 0:
+            self._power = 0.9 * self._power + 0.1 * (X.real ** 2 + X.imag ** 2)
+            # Never normalize below the power held in all partitions: when the newest block is quiet
+            # but older ones are loud (speech onsets, a misaligned reference), the step would explode
+            held = (self._X.real ** 2 + self._X.imag ** 2).sum(axis=0)
+            E = np.fft.rfft(np.concatenate([np.zeros(B), e]))
+            G = self.mu * np.conj(self._X) * (E / (np.maximum(self._power * self.partitions, held) + 1e-6))
+            # Gradient constraint: keep each partition a causal B-tap filter
+            g = np.fft.irfft(G, 2 * B, axis=1)[:, :B]
+            self._W += np.fft.rfft(g, 2 * B, axis=1)
+            self.stats_adapted += 1
+        return e.astype(np.float32)
+
+    def stats(self) -> dict:
+        with self._lock:
+            audio_seconds = self.stats_blocks * self.block / self.sample_rate
+            return {"blocks": self.stats_blocks, "adapted": self.stats_adapted,
+                    "double_talk": self.stats_double_talk, "bypassed": self.stats_bypassed,
+                    "over_budget": self.stats_over_budget,
+                    "rtf": self.processing_seconds / audio_seconds if audio_seconds else 0.0}
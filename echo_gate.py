@@ -0,0 +1,98 @@
+"""
+Half-duplex gate that keeps the assistant from transcribing its own voice.
+The AudioPlayer reports when each reply actually starts and stops playing;
+AudioHub asks the gate which frames of every captured block fall inside a
+playback interval (widened by a short lead before the start and a tail
+guard after the end for output latency and room echo) and silences them
+before they reach any subscriber. Silenced frames keep their place in the
+stream, so absolute capture positions stay valid, and the VAD discards
+them before the recognizer. Counters report how much audio was suppressed.
+"""
+
+import math
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class EchoGate:
+    def __init__(self, tail: float = 0.3, lead: float = 0.05, enabled: bool = True, clock=time.monotonic):
+        self.tail = tail
+        self.lead = lead
+        self.enabled = enabled
+        self.clock = clock
+        self._lock = threading.Lock()
+        # [start, stop] playback intervals in clock seconds; stop is None while playing
+        self._intervals = deque(maxlen=32)
+        self.total_frames = 0
+        self.suppressed_frames = 0
+        self.suppressed_blocks = 0
+        self.playbacks = 0
+
+    # Player side
+    def playback_started(self):
+        with self._lock:
+            self._intervals.append([self.clock(), None])
+            self.playbacks += 1
+
+    def playback_stopped(self):
+        with self._lock:
+            for interval in reversed(self._intervals):
+                if interval[1] is None:
+                    interval[1] = self.clock()
+                    break
+
+    @property
+    def active(self) -> bool:
+        """Whether captured audio is being suppressed right now."""
+        now = self.clock()
+        with self._lock:
+            return any(stop is None or stop + self.tail > now for _, stop in self._intervals)
+
+    # Capture side
+    def process(self, frames: np.ndarray, sample_rate: int, now: float = None) -> np.ndarray:
+        """
+        Return frames with the playback overlap silenced (a copy if anything was
+        silenced). now is the capture time of the last frame, default the clock.
+        """
+        n = len(frames)
+        if now is None:
+            now = self.clock()
+        block_start = now - n / sample_rate
+        spans = []
+        with self._lock:
+            self.total_frames += n
+            if not self.enabled:
+                return frames
+            while self._intervals and self._intervals[0][1] is not None \
+                    and self._intervals[0][1] + self.tail < block_start:
+                self._intervals.popleft()
+            for start, stop in self._intervals:
+                end = math.inf if stop is None else stop + self.tail
+                a = max(0, math.ceil((start - self.lead - block_start) * sample_rate))
+                b = n if end == math.inf else min(n, math.ceil((end - block_start) * sample_rate))
+                if a < b:
+                    spans.append((a, b))
+        if not spans:
+            return frames
+        gated = frames.copy()
+        mask = np.zeros(n, dtype=bool)
+        for a, b in spans:
+            mask[a:b] = True
+        gated[mask] = 0
+        with self._lock:
+            self.suppressed_frames += int(mask.sum())
+            self.suppressed_blocks += 1
+        return gated
+
+    @property
+    def suppressed_ratio(self) -> float:
+        return self.suppressed_frames / self.total_frames if self.total_frames else 0.0
+
+    def stats(self, sample_rate: int = 16000) -> dict:
+        with self._lock:
+            return {"playbacks": self.playbacks, "suppressed_blocks": self.suppressed_blocks,
+                    "suppressed_seconds": self.suppressed_frames / sample_rate,
+                    "suppressed_ratio": self.suppressed_frames / self.total_frames if self.total_frames else 0.0}
@@ -0,0 +1,168 @@
+"""
+Two-pass decoding for the command loop.
+Next to the free-form recognizer, a second recognizer on the same model is
+restricted to a grammar of the live vocabulary: the user command keywords
+and the intent trigger phrases, plus "[unk]" for anything else. Both are
+fed every block. When either reaches the end of an utterance the other is
+flushed, so they always decide on the same audio. A grammar result without
+"[unk]" whose word confidences all reach min_confidence is taken as is;
+only otherwise is the full language model result used (free-form requests,
+search queries, a command followed by free text). The grammar is rebuilt
+from the CommandMatcher whenever its table changed, and recognizers built
+for a stale grammar are dropped from the pool.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+
+from normalization import spoken_forms
+
+UNK = "[unk]"
+
+
+class CommandGrammar:
+    """Vosk grammar (a JSON phrase list) for the command keywords and fixed phrases."""
+
+    def __init__(self, command_matcher=None, phrases=()):
+        self.command_matcher = command_matcher
+        self.phrases = tuple(phrases)
+        self._lock = threading.Lock()
+        self._version = None
+        self._json = None
+        self.builds = 0
+
+    def words(self) -> list:
+        phrases = list(self.phrases)
+        if self.command_matcher is not None:
+            phrases.extend(self.command_matcher.keywords())
+        # Every lowercase spelling the model may know ("ınstagram" and "instagram");
+        # Vosk drops the ones missing from its vocabulary
+        words = {" ".join(form.split()) for phrase in phrases for form in spoken_forms(phrase)}
+        words.discard("")
+        return sorted(words) + [UNK]
+
+    @property
+    def json(self) -> str:
+        version = self.command_matcher.version if self.command_matcher is not None else 0
+        with self._lock:
+            if self._json is None or version != self._version:
+                self._version = version
+                self._json = json.dumps(self.words(), ensure_ascii=False)
+                self.builds += 1
+            return self._json
+
+
+class DecodeResult:
+    def __init__(self, text, source, confidence=None, end=None):
+        self.text = text
+        # "grammar" or "full"
+        self.source = source
+        self.confidence = confidence
+        # Seconds into the session where the last word ended; None without word timings
+        self.end = end
+
+    def __repr__(self):
+        return f"DecodeResult({self.text!r}, source={self.source!r})"
+
+
+def grammar_hit(result: dict, min_confidence: float):
+    """(text, confidence) of a grammar pass result, text None unless it is a confident in-grammar phrase."""
+    words = result.get("text", "").split()
+    if not words or UNK in words:
+        return None, 0.0
+    confidences = [word.get("conf", 1.0) for word in result.get("result", [])]
+    confidence = min(confidences) if confidences else 1.0
+    if confidence < min_confidence:
+        return None, confidence
+    return " ".join(words), confidence
+
+
+def last_word_end(result: dict):
+    words = result.get("result", [])
+    return words[-1].get("end") if words else None
+
+
+class HybridSession:
+    def __init__(self, decoder, full, fast=None):
+        self.decoder = decoder
+        self.full = full
+        self.fast = fast
+
+    def accept(self, data):
+        """Feed a block; returns a DecodeResult when an utterance ended with text, else None."""
+        if self.fast is None:
+            if self.full.AcceptWaveform(data):
+                return self._full_result(self.full.Result())
+            return None
+        fast_final = self.fast.AcceptWaveform(data)
+        full_final = self.full.AcceptWaveform(data)
+        if not (fast_final or full_final):
+            return None
+        # The pass that has not reached an endpoint yet is flushed: both decide on the same audio
+        fast = json.loads(self.fast.Result() if fast_final else self.fast.FinalResult())
+        text, confidence = grammar_hit(fast, self.decoder.min_confidence)
+        if text is not None:
+            if full_final:
+                self.full.Result()
+            else:
+                self.full.Reset()
+            self.decoder._count("grammar_hits")
+            return DecodeResult(text, "grammar", confidence, last_word_end(fast))
+        return self._full_result(self.full.Result() if full_final else self.full.FinalResult(), fallback=True)
+
+    def _full_result(self, raw, fallback=False):
+        result = json.loads(raw)
+        text = result.get("text", "")
+        if not text:
+            return None
+        if fallback:
+            self.decoder._count("fallbacks")
+        return DecodeResult(text, "full", end=last_word_end(result))
+
+    def partial(self) -> str:
+        return json.loads(self.full.PartialResult()).get("partial", "")
+
+
+class HybridDecoder:
+    def __init__(self, pool, grammar: CommandGrammar, sample_rate: int = 16000, min_confidence: float = 0.7):
+        self.pool = pool
+        self.grammar = grammar
+        self.sample_rate = sample_rate
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        # model -> grammar its pooled recognizers were last built with
+        self._grammars = {}
+        self.grammar_hits = 0
+        self.fallbacks = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @contextmanager
+    def session(self, model, hybrid: bool = True):
+        """Recognizers for one listening session; hybrid=False decodes with the full model only."""
+        fast = full = None
+        try:
+            if hybrid:
+                grammar = self.grammar.json
+                with self._lock:
+                    stale = self._grammars.get(model)
+                    self._grammars[model] = grammar
+                if stale is not None and stale != grammar:
+                    self.pool.discard(model, self.sample_rate, stale)
+                fast = self.pool.acquire(model, self.sample_rate, grammar)
+                fast.SetWords(True)
+            full = self.pool.acquire(model, self.sample_rate)
+            yield HybridSession(self, full, fast)
+        finally:
+            self.pool.release(fast)
+            self.pool.release(full)
+
+    def stats(self) -> dict:
+        with self._lock:
+            decoded = self.grammar_hits + self.fallbacks
+            return {"grammar_hits": self.grammar_hits, "fallbacks": self.fallbacks,
+                    "grammar_ratio": self.grammar_hits / decoded if decoded else 0.0,
+                    "grammar_builds": self.grammar.builds}
@@ -0,0 +1,193 @@
+"""
+Declarative intents for the command loop in main.py and mainpc.py.
+An intent is a set of trigger phrases, a priority (lower wins) and the
+dialogue context it is active in (a tuple for several): None while waiting
+for a request, "confirm" after a command ran, "search" after asking for a
+video. Phrases are matched on whole normalized tokens (Turkish
+casefolding, diacritics folded, so "hayır" also covers "hayir"), and "dur"
+does not fire on "durum"; a token ending in "*" matches any word starting
+with it ("video*" also matches "videoyu"). All phrases are compiled into a
+table keyed by their first token, so one pass over the utterance's tokens
+finds every candidate with dictionary lookups, however many intents exist.
+Intents backed by a matcher function (the user command table) are only
+consulted when no phrase of a higher priority matched. Each context can
+have a fallback intent for utterances nothing matched. The actions are
+registered as handlers by the application; a handler returns the next
+context (END finishes the session).
+"""
+
+import logging
+
+from normalization import normalize, phrase_pattern, token_matches
+
+# name, context, priority, phrases
+INTENT_TABLE = [
+    ("confirm_yes", "confirm", 0, ["evet"]),
+    ("confirm_no", "confirm", 1, ["hayır"]),
+    ("search_no", "search", 0, ["hayır"]),
+    # Also while a reply to a command or a video question is still playing
+    ("cancel", (None, "confirm", "search"), 0, ["iptal*", "dur", "durdur*"]),
+    # Stems keep the inflected forms the old substring checks caught
+    # ("selamlar", "sohbete", "uyku moduna", "kapatır mısın")
+    ("chat", None, 10, ["sohbet*", "konuş*"]),
+    ("greeting", None, 30, ["merhaba*", "selam*"]),
+    ("video", None, 40, ["video*"]),
+    ("how_are_you", None, 50, ["nasılsın*"]),
+    ("sleep", None, 60, ["uyku modu*"]),
+    ("shutdown", None, 70, ["bilgisayarı kapat*"]),
+]
+# User commands rank between switching to chat and small talk
+COMMAND_PRIORITY = 20
+# Context returned by a handler that ended the listening session
+END = "end"
+# name, context: what an utterance nothing matched means
+FALLBACKS = [
+    ("not_understood", None),
+    ("confirm_repeat", "confirm"),
+    ("search_query", "search"),
+]
+
+
+class Intent:
+    def __init__(self, name, context=None, priority=100, phrases=(), matcher=None):
+        self.name = name
+        self.context = context
+        self.priority = priority
+        self.phrases = tuple(phrases)
+        # matcher(text) returns a truthy slot value or None
+        self.matcher = matcher
+        self.handler = None
+
+    def __repr__(self):
+        return f"Intent({self.name!r}, context={self.context!r}, priority={self.priority})"
+
+
+class IntentMatch:
+    def __init__(self, intent, utterance, start=None, end=None, slots=None):
+        self.intent = intent
+        self.name = intent.name
+        self.utterance = utterance
+        self.text = utterance.raw
+        # Token span of the trigger phrase (None for matcher and fallback intents)
+        self.start = start
+        self.end = end
+        self.slots = slots or {}
+
+    def __repr__(self):
+        return f"IntentMatch({self.name!r}, slots={self.slots!r})"
+
+
+class IntentEngine:
+    def __init__(self):
+        self._intents = {}
+        # context -> first token -> [(phrase tokens, intent)]
+        self._exact = {}
+        # context -> first-token prefix -> [(phrase tokens, intent)]
+        self._prefix = {}
+        self._prefix_lengths = {}
+        # context -> matcher intents by priority
+        self._matchers = {}
+        self._fallbacks = {}
+
+    def add(self, name, phrases=(), context=None, priority=100, matcher=None) -> Intent:
+        if name in self._intents:
+            raise ValueError(f"intent already defined: {name}")
+        intent = Intent(name, context, priority, phrases, matcher)
+        self._intents[name] = intent
+        contexts = context if isinstance(context, tuple) else (context,)
+        for phrase in intent.phrases:
+            tokens = phrase_pattern(phrase)
+            if not tokens:
+                continue
+            first = tokens[0]
+            for context in contexts:
+                if first.endswith("*"):
+                    prefix = first[:-1]
+                    self._prefix.setdefault(context, {}).setdefault(prefix, []).append((tokens, intent))
+                    self._prefix_lengths.setdefault(context, set()).add(len(prefix))
+                else:
+                    self._exact.setdefault(context, {}).setdefault(first, []).append((tokens, intent))
+        if matcher is not None:
+            for context in contexts:
+                matchers = self._matchers.setdefault(context, [])
+                matchers.append(intent)
+                matchers.sort(key=lambda i: i.priority)
+        return intent
+
+    def add_fallback(self, name, context=None) -> Intent:
+        intent = self.add(name, context=context)
+        self._fallbacks[context] = intent
+        return intent
+
+    def on(self, name, handler=None):
+        """Register the action for an intent; usable as a decorator."""
+        def register(func):
+            self._intents[name].handler = func
+            return func
+        return register(handler) if handler is not None else register
+
+    def __contains__(self, name):
+        return name in self._intents
+
+    def vocabulary(self) -> list:
+        """Every trigger phrase, a trailing "*" dropped ("video*" gives "video")."""
+        return [" ".join(word.rstrip("*") for word in phrase.split())
+                for intent in self._intents.values() for phrase in intent.phrases]
+
+    def _phrase_candidates(self, token, context):
+        candidates = self._exact.get(context, {}).get(token, [])
+        lengths = self._prefix_lengths.get(context)
+        if lengths:
+            prefixes = self._prefix[context]
+            for length in lengths:
+                if length <= len(token):
+                    candidates = candidates + prefixes.get(token[:length], [])
+        return candidates
+
+    def match(self, text, context=None):
+        """Best intent for text (str or Utterance) in the given context (lowest priority, then earliest), or None."""
+        utterance = normalize(text)
+        tokens = utterance.folded_tokens
+        best = None
+        for i, token in enumerate(tokens):
+            for phrase, intent in self._phrase_candidates(token, context):
+                end = i + len(phrase)
+                if end > len(tokens) or (best is not None and intent.priority >= best[0]):
+                    continue
+                if all(token_matches(p, t) for p, t in zip(phrase[1:], tokens[i + 1:end])):
+                    best = (intent.priority, i, end, intent)
+        for intent in self._matchers.get(context, []):
+            if best is not None and intent.priority >= best[0]:
+                break
+            value = intent.matcher(utterance)
+            if value:
+                return IntentMatch(intent, utterance, slots={intent.name: value})
+        if best is not None:
+            _, start, end, intent = best
+            return IntentMatch(intent, utterance, start, end, {"rest": " ".join(utterance.tokens[end:])})
+        fallback = self._fallbacks.get(context)
+        if fallback is not None:
+            return IntentMatch(fallback, utterance, slots={"query": utterance.raw})
+        return None
+
+    def handle(self, text, context=None, **kwargs):
+        """Match text and run the winning intent's handler(match, **kwargs); returns its result."""
+        match = self.match(text, context)
+        if match is None:
+            return None
+        if match.intent.handler is None:
+            logging.warning(f"İşleyicisi olmayan niyet: {match.name}")
+            return None
+        return match.intent.handler(match, **kwargs)
+
+
+def build_engine(command_matcher=None) -> IntentEngine:
+    """Engine with the built-in intents; command_matcher(utterance) adds the user command table as "command"."""
+    engine = IntentEngine()
+    for name, context, priority, phrases in INTENT_TABLE:
+        engine.add(name, phrases, context, priority)
+    if command_matcher is not None:
+        engine.add("command", priority=COMMAND_PRIORITY, matcher=command_matcher)
+    for name, context in FALLBACKS:
+        engine.add_fallback(name, context)
+    return engine
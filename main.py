@@ -1,7 +1,5 @@
 import threading
 import sounddevice as sd
-import queue
-import vosk
 import json
 import os
 from gtts import gTTS
@@ -17,16 +15,25 @@ import random
 import time
 import hashlib
 import logging
-from settings import Settings
+from audio_ring import BlockReader
+from audio_hub import AudioHub
+from wake_word import WakeWordDetector, wake_grammar
+from recognizer_pool import RecognizerPool
+from hybrid_decoder import HybridDecoder, CommandGrammar
+from model_loader import ModelLoader
+from vad import EnergyVAD
 import concurrent.futures
-import requests
 
 url = "http://192.168.1.19:5000/endpoint"
 executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
 
-from assistant_logic import say_response, generate_chat_response
+# Same endpoint as assistant_logic, so its spool (and its single drain worker) is shared
+from assistant_logic import say_response, generate_chat_response, set_output_device, stop_speaking, warm_up_tts, command_spool, settings, echo_gate, echo_canceller, EXIT_PHRASES
+import prompts
 
-from deneme import process_command
+from deneme import command_matcher, send_command
+from intents import build_engine, END
+from normalization import normalize, turkish_lower
 
 logging.basicConfig(
     level=logging.INFO,
@@ -44,63 +51,34 @@ except ImportError:
     WAKE_WORD_AVAILABLE = False
     logging.warning("Uyarı: Pasif dinleme için gerekli modüller yüklenmemiş. 'pip install pyaudio numpy' komutunu çalıştırın.")
 
-q = queue.Queue()
-passive_q = queue.Queue()
+# Single always-on microphone stream shared by all listeners
+BLOCK_FRAMES = 8000
+audio_hub = AudioHub(sample_rate=16000, block_frames=BLOCK_FRAMES, echo_gate=echo_gate,
+                     echo_canceller=echo_canceller)
+
+# Vosk recognizers reused across listening sessions
+recognizer_pool = RecognizerPool()
 
 is_listening = False
 passive_listening_active = False
-is_speaking = False
+# Echo gate and decoder counters when the current listening session started
+session_start_stats = None
+# Grammar of the wake-word recognizer last taken from the pool
+last_wake_grammar = None
 app_running = True
 border_effect_process = None
 is_chatting = False
 
-CACHE_DIR = os.path.join(os.path.dirname(__file__), 'tts_cache')
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
-CACHE_TTL = 7 * 24 * 3600
-_now = time.time()
-for _file in os.listdir(CACHE_DIR):
-    _path = os.path.join(CACHE_DIR, _file)
-    if os.path.isfile(_path) and _now - os.path.getmtime(_path) > CACHE_TTL:
-        try:
-            os.remove(_path)
-        except Exception:
-            pass
-
-tts_cache = {}
-
 audio_input_device = None
 audio_output_device = None
 
 # ...UI-related classes and functions removed...
 
-model_path = "models/vosk-model-small-tr-0.3"
-if not os.path.exists(model_path):
-    logging.error("Model bulunamadı. Lütfen 'models/vosk-model-small-tr-0.3' dizinine Türkçe modeli indiriniz.")
-    exit(1)
-
-model = vosk.Model(model_path)
-
-model_path2 = "models/vosk-model-small-en-us-0.15"
-if not os.path.exists(model_path2):
-    logging.error("Model bulunamadı. Lütfen 'models/vosk-model-small-en-us-0.15' dizinine English modeli indiriniz.")
-    exit(1)
-
-model_en = vosk.Model(model_path2)
-
-def callback(indata, frames, time, status):
-    global is_speaking
-    if status:
-        logging.warning(f"Ses yakalama durumu: {status}")
-    if is_speaking:
-        return
-    if indata is None or len(indata) == 0:
-        logging.warning("Uyarı: Ses verisi boş geldi!")
-        return
-    try:
-        q.put(bytes(indata))
-    except Exception as e:
-        logging.error(f"Callback hatası: {e}")
+# Vosk models load in the background; the wake-word model goes first
+models = ModelLoader({
+    "tr": "models/vosk-model-small-tr-0.3",
+    "en": "models/vosk-model-small-en-us-0.15",
+})
 
 border_effect_active = False
 
@@ -136,7 +114,7 @@ def turkish_number_to_digit(text):
         'altmış': 60, 'yetmiş': 70, 'seksen': 80, 'doksan': 90,
         'yüz': 100, 'bin': 1000
     }
-    text = text.lower()
+    text = turkish_lower(text)
     if text in number_dict:
         return number_dict[text]
     if text.isdigit():
@@ -150,9 +128,23 @@ def turkish_number_to_digit(text):
                 return tens + units
     return None
 
+def session_stats():
+    return echo_gate.stats(audio_hub.sample_rate), hybrid_decoder.stats()
+
 def stop_listening_and_cleanup():
     global is_listening, is_chatting
     logging.info("Dinleme sonlandırılıyor...")
+    # The counters are cumulative; log what changed since start_recognition()
+    gate_stats, decoder_stats = session_stats()
+    gate_start, decoder_start = session_start_stats or ({}, {})
+    playbacks = gate_stats['playbacks'] - gate_start.get('playbacks', 0)
+    suppressed = gate_stats['suppressed_seconds'] - gate_start.get('suppressed_seconds', 0.0)
+    logging.info(f"Yankı kapısı: bu oturumda {playbacks} yanıt boyunca {suppressed:.1f} s "
+                 f"mikrofon sesi bastırıldı")
+    grammar_hits = decoder_stats['grammar_hits'] - decoder_start.get('grammar_hits', 0)
+    fallbacks = decoder_stats['fallbacks'] - decoder_start.get('fallbacks', 0)
+    logging.info(f"Gramer geçişi: bu oturumda {grammar_hits} komut doğrudan, "
+                 f"{fallbacks} tam model ile çözüldü")
     is_listening = False
     is_chatting = False
     try:
@@ -162,8 +154,7 @@ def stop_listening_and_cleanup():
         logging.error(f"Ses durdurma hatası: {e}")
 
 def is_exit_command(query):
-    exit_keywords = ["görüşürüz", "hoşça kal", "teşekkürler", "çıkış", "bay bay"]
-    return any(keyword in query.lower() for keyword in exit_keywords)
+    return normalize(query).contains_any(EXIT_PHRASES)
 
 def chat_mode():
     global is_listening, is_chatting
@@ -171,29 +162,25 @@ def chat_mode():
     if is_chatting:
         logging.info("Zaten sohbet modundayız, tekrar başlatılmıyor.")
         return
-    with q.mutex:
-        q.queue.clear()
+    rec = None
     try:
-        rec = vosk.KaldiRecognizer(model, 16000)
+        rec = recognizer_pool.acquire(models.get("tr"))
         is_chatting = True
         is_listening = True
-        say_response("Sohbet modu aktif. İstediğiniz zaman Görüşürüz veya Teşekkürler diyerek sonlandırabilirsiniz.")
-        with sd.RawInputStream(device=audio_input_device, samplerate=16000, blocksize=8000, dtype='int16',
-                              channels=1, callback=callback):
+        say_response(prompts.CHAT_MODE_ACTIVE)
+        with audio_hub.subscription("chat") as mic:
+            reader = BlockReader(mic, BLOCK_FRAMES)
             logging.info("Sohbet modu başladı...")
             while is_chatting and is_listening:
-                try:
-                    data = q.get(timeout=0.1)
-                except queue.Empty:
-                    continue
-                if not data:
+                data = reader.read(timeout=0.1)
+                if data is None:
                     continue
                 if rec.AcceptWaveform(data):
                     result = json.loads(rec.Result())
                     text = result.get("text", "")
                     if text:
                         logging.info(f"Sohbet modunda algılanan: {text}")
-                        chat_response, end_chat = generate_chat_response(text)
+                        chat_response, end_chat = generate_chat_response(normalize(text))
                         say_response(chat_response)
                         if end_chat:
                             logging.info("Sohbet sonlandırıldı.")
@@ -207,166 +194,135 @@ def chat_mode():
         import traceback; traceback.print_exc()
         is_chatting = False
         stop_listening_and_cleanup()
+    finally:
+        recognizer_pool.release(rec)
+
+# Intent handlers for recognize(); each returns the next dialogue context
+intent_engine = build_engine(command_matcher.match)
+# Handlers reply without blocking: decoding goes on while a reply plays, so "iptal"
+# can interrupt it when the echo canceller keeps the microphone open
+# Grammar pass over the command and intent vocabulary, full model only for anything else
+hybrid_decoder = HybridDecoder(recognizer_pool, CommandGrammar(command_matcher, intent_engine.vocabulary()))
+
+@intent_engine.on("confirm_yes")
+def on_confirm_yes(match, mic):
+    say_response(prompts.WHAT_DO_YOU_WANT, block=False)
+    return None
+
+@intent_engine.on("confirm_no")
+def on_confirm_no(match, mic):
+    say_response(prompts.GOODBYE.format(wake_word=settings.snapshot.wake_word), block=False)
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("confirm_repeat")
+def on_confirm_repeat(match, mic):
+    say_response(prompts.ASK_YES_NO, block=False)
+    return "confirm"
+
+@intent_engine.on("search_no")
+def on_search_no(match, mic):
+    command_spool.enqueue("url", "https://www.youtube.com/", result="xxx")
+    say_response(prompts.YOUTUBE_ONLY.format(wake_word=settings.snapshot.wake_word), block=False)
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("search_query")
+def on_search_query(match, mic):
+    query = match.slots["query"]
+    command_spool.enqueue("url", f"https://www.youtube.com/results?search_query={query}", result="xxx")
+    say_response(prompts.YOUTUBE_SEARCH.format(query=query, wake_word=settings.snapshot.wake_word), block=False)
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("cancel")
+def on_cancel(match, mic):
+    stop_speaking()
+    say_response(prompts.CANCELLED, settings.snapshot.language, block=False)
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("chat")
+def on_chat(match, mic):
+    # Runs after recognize() has left its subscription, so the command ring
+    # does not keep filling for the whole chat session
+    executor.submit(chat_mode)
+    return END
+
+@intent_engine.on("command")
+def on_command(match, mic):
+    command = match.slots["command"]
+    send_command(command.details)
+    say_response(prompts.COMMAND_OPENING.format(keyword=command.keyword), block=False)
+    mic.clear()
+    return "confirm"
+
+def _reply_in_background(mic, message):
+    mic.clear()
+    say_response(message, block=False)
+
+@intent_engine.on("greeting")
+def on_greeting(match, mic):
+    _reply_in_background(mic, prompts.GREETING)
+    return None
+
+@intent_engine.on("video")
+def on_video(match, mic):
+    _reply_in_background(mic, prompts.ASK_VIDEO)
+    return "search"
 
-def recognize():
+@intent_engine.on("how_are_you")
+def on_how_are_you(match, mic):
+    _reply_in_background(mic, prompts.HOW_ARE_YOU)
+    return None
+
+@intent_engine.on("sleep")
+def on_sleep(match, mic):
+    _reply_in_background(mic, prompts.SLEEP_MODE)
+    command_spool.enqueue("uyku modu", "bilgisayarı uyku moduna al", delay=3, result="xxx")
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("shutdown")
+def on_shutdown(match, mic):
+    _reply_in_background(mic, prompts.SHUTDOWN)
+    command_spool.enqueue("bilgisayarı kapat", "bilgisayarı kapat", delay=3, result="xxx")
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("not_understood")
+def on_not_understood(match, mic):
+    say_response(prompts.NOT_UNDERSTOOD, block=False)
+    mic.clear()
+    return None
+
+def recognize(preroll_position=None):
     global is_listening, is_chatting
     logging.info("Dinleme başlatılıyor...")
-    rec = vosk.KaldiRecognizer(model, 16000)
     is_listening = True
-    wait_for_yes_no = False
-    wait_for_search = False
-    with q.mutex:
-        q.queue.clear()
+    context = None
     try:
         device_info = sd.query_devices(None, 'input')
         logging.info(f"Kullanılan mikrofon: {device_info['name']}")
         logging.info(f"Örnekleme Hızı: {device_info['default_samplerate']}")
         logging.info(f"Maksimum Giriş Kanalları: {device_info['max_input_channels']}")
-        with sd.RawInputStream(device=audio_input_device, samplerate=16000, blocksize=8000, dtype='int16',
-                              channels=1, callback=callback):
+        with hybrid_decoder.session(models.get("tr"), settings.snapshot.hybrid_decoding) as decoder, \
+                audio_hub.subscription("command", start_position=preroll_position) as mic:
+            reader = BlockReader(mic, BLOCK_FRAMES)
             logging.info("Mikrofon akışı başlatıldı, dinleniyor...")
             while is_listening:
-                try:
-                    data = q.get(timeout=0.1)
-                except queue.Empty:
-                    continue
-                if not data:
+                data = reader.read(timeout=0.1)
+                if data is None:
                     continue
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    text = result.get("text", "")
-                    if text:
-                        logging.info(f"Algılanan metin: {text}")
-                        if wait_for_yes_no:
-                            if "evet" in text.lower():
-                                wait_for_yes_no = False
-                                response = "Ne istersiniz?"
-                                say_response(response)
-                                continue
-                            elif "hayır" in text.lower() or "hayir" in text.lower():
-                                wait_for_yes_no = False
-                                wake_word = settings.get("wake_word")
-                                response = f"Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
-                                say_response(response)
-                                stop_listening_and_cleanup()
-                                break
-                            else:
-                                say_response("Lütfen evet veya hayır deyin.")
-                                continue
-                        if wait_for_search:
-                            if "hayır" in text.lower() or "hayir" in text.lower():
-                                wait_for_search = False
-                                wake_word = settings.get("wake_word")
-                                response = f"Tamamdır sadece Youtube açıyorum. Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
-                                data = {"result": "xxx", "cmd_type": "url", "target": "https://www.youtube.com/"}
-                                try:
-                                    response = requests.post(url, json=data)
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-                                say_response(response)
-                                stop_listening_and_cleanup()
-                                break
-                            else:
-                                wait_for_search = False
-                                wake_word = settings.get("wake_word")
-                                response = f"Tamamdır, {text} aratıyorum. Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
-                                url2 = f"https://www.youtube.com/results?search_query={text}"
-                                data = {"result": "xxx", "cmd_type": "url", "target": url2}
-                                try:
-                                    response = requests.post(url, json=data)
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-                                say_response(response)
-                                stop_listening_and_cleanup()
-                                break
-                        if "iptal" in text.lower() or "dur" in text.lower():
-                            say_response("İptal edildi", settings.get("language"))
-                            stop_listening_and_cleanup()
-                            break
-                        if any(x in text.lower() for x in ["sohbet", "konuş", "konuşalım"]):
-                            chat_mode()
-                            break
-                        command_found = process_command(text)
-                        command_keyword = text if command_found else None
-                        command_keyword = None
-                        for keyword in settings.get_all_commands():
-                            if keyword in text.lower():
-                                command_keyword = keyword
-                                break
-                        if not command_keyword:
-                            for word in text.lower().split():
-                                if word in settings.get_all_commands():
-                                    command_keyword = word
-                                    break
-                        if command_found and command_keyword:
-                            response = f"Tamamdır, {command_keyword} açıyorum. Başka bir işlem ister misiniz?"
-                            say_response(response)
-                            wait_for_yes_no = True
-                            with q.mutex:
-                                q.queue.clear()
-                            continue
-                        if "merhaba" in text.lower() or "selam" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-                            help_msg = "Merhaba! Nasılsınız? Size nasıl yardımcı olabilirim?"
-                            executor.submit(say_response, help_msg)
-                            time.sleep(0.5)
-                            continue
-                        if "video" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-                            help_msg = "İzlemek istediğin bir video var mı? Varsa söyle Youtube'da aratayım yoksa sadece aç diyebilirsin."
-                            executor.submit(say_response, help_msg)
-                            wait_for_search = True
-                            time.sleep(0.5)
-                            continue
-                        if "nasılsın" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-                            help_msg = "Ben bir yapay zeka asistanıyım, duygularım yok ama size yardımcı olmak için buradayım!"
-                            executor.submit(say_response, help_msg)
-                            time.sleep(0.5)
-                            continue
-                        if "uyku modu" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-                            help_msg = "Bilgisayarınızı uyku moduna alıyorum."
-                            executor.submit(say_response, help_msg)
-                            def sleep_computer():
-                                time.sleep(3)
-                                data = {"result": "xxx", "cmd_type": "uyku modu", "target": "bilgisayarı uyku moduna al"}
-                                try:
-                                    response = requests.post(url, json=data)
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-                            executor.submit(sleep_computer)
-                            time.sleep(0.5)
-                            stop_listening_and_cleanup()
-                            break
-                        if "bilgisayarı kapat" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-                            help_msg = "Tamamdır, bilgisayar kapanıyor. Görüşürüz!"
-                            executor.submit(say_response, help_msg)
-                            def shutdown_computer():
-                                time.sleep(3)
-                                data = {"result": "xxx", "cmd_type": "bilgisayarı kapat", "target": "bilgisayarı kapat"}
-                                try:
-                                    response = requests.post(url, json=data)
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-                            executor.submit(shutdown_computer)
-                            time.sleep(0.5)
-                            stop_listening_and_cleanup()
-                            break
-                        help_msg = "Dediğinizi anlayamadım. Lütfen tekrar deneyin."
-                        say_response(help_msg)
-                        with q.mutex:
-                            q.queue.clear()
-                        continue
+                decoded = decoder.accept(data)
+                if decoded is not None:
+                    text = decoded.text
+                    logging.info(f"Algılanan metin ({decoded.source}): {text}")
+                    context = intent_engine.handle(normalize(text), context, mic=mic)
+                    if context == END:
+                        break
                 elif random.randint(1, 500) == 1:
-                    partial = json.loads(rec.PartialResult())
-                    partial_text = partial.get("partial", "")
+                    partial_text = decoder.partial()
                     if partial_text:
                         logging.info(f"Kısmi algılama: {partial_text}")
     except Exception as e:
@@ -374,66 +330,64 @@ def recognize():
         import traceback; traceback.print_exc()
         stop_listening_and_cleanup()
 
-def start_recognition():
-    global passive_listening_active, is_listening
+def start_recognition(preroll_position=None):
+    global passive_listening_active, is_listening, session_start_stats
+    if is_listening:
+        logging.info("Zaten dinleniyor, tekrar başlatılmıyor.")
+        return
     logging.info("Manuel dinleme başlatılıyor...")
     was_passive_active = passive_listening_active
     if was_passive_active:
         passive_listening_active = False
-    is_listening = False
-    sd.stop()
-    with q.mutex:
-        q.queue.clear()
-    time.sleep(0.5)
     is_listening = True
-    executor.submit(recognize)
-
-def passive_callback(indata, frames, time, status):
-    global is_speaking
-    if status:
-        logging.warning(status)
-    if is_speaking:
-        return
-    passive_q.put(bytes(indata))
+    session_start_stats = session_stats()
+    executor.submit(recognize, preroll_position)
 
 def passive_listen_loop():
-    global passive_listening_active
+    global passive_listening_active, last_wake_grammar
     logging.info("Pasif dinleme başlatılıyor...")
+    rec = None
     try:
-        rec = vosk.KaldiRecognizer(model_en, 16000, '["jarvis", "carviz", "çervis"]')
-        with passive_q.mutex:
-            passive_q.queue.clear()
-        with sd.RawInputStream(device=audio_input_device, samplerate=16000, blocksize=8000, dtype='int16',
-                              channels=1, callback=passive_callback):
-            wake_word = settings.get("wake_word")
+        snapshot = settings.snapshot
+        wake_word = snapshot.wake_word
+        grammar = wake_grammar(wake_word)
+        model = models.get("en")
+        if last_wake_grammar not in (None, grammar):
+            # The wake word changed: recognizers built for the old one are not needed again
+            recognizer_pool.discard(model, 16000, last_wake_grammar)
+        last_wake_grammar = grammar
+        rec = recognizer_pool.acquire(model, 16000, grammar)
+        with audio_hub.subscription("wake_word") as mic:
+            reader = BlockReader(mic, BLOCK_FRAMES)
+            detector = WakeWordDetector(rec, wake_word)
+            vad = EnergyVAD(audio_hub.sample_rate) if snapshot.vad_enabled else None
             logging.info(f"Pasif dinleme başlatıldı... ('{wake_word}' komutunu bekliyor)")
             while passive_listening_active:
-                if passive_q.empty():
-                    sd.sleep(10)
+                frames = reader.read_frames(timeout=0.1)
+                if frames is None:
                     continue
-                data = passive_q.get()
-                if len(data) == 0:
+                event = detector.accept_frames(frames, reader.position, vad)
+                if event is None:
                     continue
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    text = result.get("text", "").lower()
-                    if text:
-                        logging.info(f"Pasif dinleme duydu: {text}")
-                        # Split recognized text into words and check for exact match
-                        recognized_words = text.split()
-                        if wake_word.lower() in recognized_words:
-                            logging.info(f"WAKE WORD ALGILANDI: {wake_word}")
-                            say_response("Sizi dinliyorum ne yapmak istersiniz?", settings.get("language"))
-                            passive_listening_active = False
-                            time.sleep(1.5)
-                            start_recognition()
-                            break
+                logging.info(f"WAKE WORD ALGILANDI: {wake_word}")
+                passive_listening_active = False
+                if event.has_trailing_speech:
+                    # Command spoken in the same breath: decode it from the pre-roll
+                    start_recognition(preroll_position=event.end_position)
+                else:
+                    say_response(prompts.LISTENING, settings.snapshot.language)
+                    start_recognition()
+                break
+            if vad is not None:
+                logging.info(f"VAD: sesin %{vad.skipped_ratio * 100:.0f} kadarı tanıyıcıya gönderilmeden atlandı")
     except Exception as e:
         if not app_running:
             return
         logging.error(f"Pasif dinleme hatası: {e}")
         import traceback; traceback.print_exc()
         passive_listening_active = False
+    finally:
+        recognizer_pool.release(rec)
 
 def apply_audio_device_settings():
     logging.info("Applying audio device settings...")
@@ -459,12 +413,18 @@ def apply_audio_device_settings():
             break
     audio_input_device = input_idx
     audio_output_device = output_idx
+    set_output_device(audio_output_device)
+    audio_hub.set_device(audio_input_device)
+    audio_hub.set_preroll_seconds(settings.get("preroll_seconds"))
     logging.info(f"Selected devices: input={audio_input_device}, output={audio_output_device}")
 
-settings = Settings()
+def start_tts_warmup():
+    wake_word = settings.get("wake_word")
+    warm_up_tts(prompts.static_prompts(wake_word, settings.snapshot.commands))
 
 def check_autostart_passive():
     apply_audio_device_settings()
+    audio_hub.start()
     if settings.get("passive_listening"):
         update_passive_listening_state()
 
@@ -498,6 +458,17 @@ def start_passive_listening():
         apply_audio_device_settings()
         executor.submit(passive_listen_loop)
 
+def on_settings_change(event, key, value):
+    """Apply changes made to ayarlar.json while running, without a restart."""
+    if event != "set":
+        return
+    if key in ("input_device", "output_device", "preroll_seconds"):
+        apply_audio_device_settings()
+    elif key == "passive_listening" or (key == "wake_word" and passive_listening_active):
+        update_passive_listening_state()
+
+settings.subscribe(on_settings_change)
+
 def on_closing():
     global app_running, passive_listening_active, is_listening
     logging.info("Application closing, cleaning up resources...")
@@ -506,9 +477,12 @@ def on_closing():
     is_listening = False
     try: sd.stop()
     except: pass
+    audio_hub.stop()
     hide_border_effect()
 
 if __name__ == "__main__":
+    models.start(["en", "tr"])
+    start_tts_warmup()
     check_autostart_passive()
     try:
         while app_running:
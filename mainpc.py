@@ -2,12 +2,9 @@ import tkinter as tk
 from tkinter import ttk, filedialog
 import threading
 import sounddevice as sd
-import queue
-import vosk
 import json
 import os
 from gtts import gTTS
-from playsound import playsound
 import tempfile
 from PIL import Image, ImageTk
 import io
@@ -23,16 +20,28 @@ import random
 import time
 import hashlib
 import logging
-from settings import Settings
+from audio_ring import BlockReader
+from audio_hub import AudioHub
+from wake_word import WakeWordDetector, wake_grammar
+from recognizer_pool import RecognizerPool
+from hybrid_decoder import HybridDecoder, CommandGrammar
+from model_loader import ModelLoader
+from command_dispatcher import CommandDispatcher
+from command_spool import CommandSpool
+from vad import EnergyVAD
+from intents import build_engine, END
+from normalization import normalize, turkish_lower
 import concurrent.futures
 import tkinter.messagebox as messagebox
-import requests
 
 url = "http://192.168.1.11:5000/endpoint"
+dispatcher = CommandDispatcher(url)
+command_spool = CommandSpool(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'command_spool.db'), dispatcher)
 # Executor for asynchronous tasks
 executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
 
-from assistant_logic import say_response, generate_chat_response, process_command
+from assistant_logic import say_response, generate_chat_response, set_output_device, stop_speaking, send_command, warm_up_tts, settings, command_matcher, echo_gate, echo_canceller, EXIT_PHRASES
+import prompts
 
 # Set up structured logging to file and console
 logging.basicConfig(
@@ -52,15 +61,21 @@ except ImportError:
     WAKE_WORD_AVAILABLE = False
     logging.warning("Uyarı: Pasif dinleme için gerekli modüller yüklenmemiş. 'pip install pyaudio numpy' komutunu çalıştırın.")
 
-# Ses verisini almak için bir kuyruk oluştur
-q = queue.Queue()
-# Pasif dinleme için ayrı bir kuyruk oluştur
-passive_q = queue.Queue()
+# Tüm dinleyicilerin paylaştığı, sürekli açık tek mikrofon akışı
+BLOCK_FRAMES = 8000
+audio_hub = AudioHub(sample_rate=16000, block_frames=BLOCK_FRAMES, echo_gate=echo_gate,
+                     echo_canceller=echo_canceller)
+
+# Dinleme oturumları arasında yeniden kullanılan Vosk tanıyıcıları
+recognizer_pool = RecognizerPool()
 
 # Dinleme, sohbet ve konuşma durumu
 is_listening = False
 passive_listening_active = False
-is_speaking = False  # Sesli yanıt sırasında dinlemeyi engellemek için flag
+# Geçerli dinleme oturumu başladığında yankı kapısı ve çözücü sayaçları
+session_start_stats = None
+# Havuzdan en son alınan uyandırma kelimesi tanıyıcısının grameri
+last_wake_grammar = None
 app_running = True
 
 # Global variable for border effect process - use subprocess instead of direct integration
@@ -69,25 +84,6 @@ border_effect_process = None
 # Add a global variable to track chat mode
 is_chatting = False
 
-# Create directory for cached TTS files
-CACHE_DIR = os.path.join(os.path.dirname(__file__), 'tts_cache')
-if not os.path.exists(CACHE_DIR):
-    os.makedirs(CACHE_DIR)
-# Purge old cache files (>7 days)
-import time
-CACHE_TTL = 7 * 24 * 3600  # 7 days in seconds
-_now = time.time()
-for _file in os.listdir(CACHE_DIR):
-    _path = os.path.join(CACHE_DIR, _file)
-    if os.path.isfile(_path) and _now - os.path.getmtime(_path) > CACHE_TTL:
-        try:
-            os.remove(_path)
-        except Exception:
-            pass
-
-# In-memory mapping from text hash to file path
-tts_cache = {}
-
 # Store selected input/output device indices
 audio_input_device = None  # store selected input device index
 audio_output_device = None # store selected output device index
@@ -312,29 +308,25 @@ class SettingsDialog(tk.Toplevel):
         old_wake_word = settings.get("wake_word") 
         new_wake_word = self.temp_settings["wake_word"]
         wake_word_changed = old_wake_word != new_wake_word
-        
-        # Ayarları kaydet
-        for key, value in self.temp_settings.items():
-            self.settings.set(key, value)
-        self.settings.save()
-        
-        # Pasif dinleme durumunu kontrol et ve gerekirse başlat/durdur
-        old_passive = passive_listening_active
+        old_passive_setting = settings.get("passive_listening")
         new_passive = bool(self.temp_settings.get("passive_listening", False))
         
+        # Ayarları tek işlemde kaydet (dosya arka planda bir kez yazılır); ses cihazı,
+        # pasif dinleme ve tetikleme kelimesi değişiklikleri on_settings_change ile uygulanır
+        with self.settings.batch():
+            for key, value in self.temp_settings.items():
+                self.settings.set(key, value)
+        
         # Signal that we need to update UI elements
         window.after(100, update_ui_from_settings)
         
-        # Pasif dinleme veya tetikleme kelimesi değiştiğinde güncelle
-        if old_passive != new_passive or (wake_word_changed and passive_listening_active):
+        # Ayar değişmediği halde durum farklıysa (ör. hata sonrası durmuşsa) yeniden uygula
+        if old_passive_setting == new_passive and passive_listening_active != new_passive:
             window.after(200, update_passive_listening_state)
-            
-            # Wake word değiştiyse ve pasif dinleme aktifse yeni kelimeyi göster
-            if wake_word_changed and passive_listening_active:
-                result_text.set(f"Pasif dinleme aktif. '{new_wake_word}' diyerek beni çağırabilirsiniz.")
         
-        # Ayarları kaydettikten sonra ses cihazı değişikliklerini uygula
-        apply_audio_device_settings()
+        # Wake word değiştiyse ve pasif dinleme aktifse yeni kelimeyi göster
+        if wake_word_changed and passive_listening_active:
+            result_text.set(f"Pasif dinleme aktif. '{new_wake_word}' diyerek beni çağırabilirsiniz.")
         
         self.destroy()
 
@@ -714,59 +706,26 @@ class CommandAddDialog(tk.Toplevel):
         # Pencereyi kapat
         self.destroy()
 
-# Model yükleme
-model_path = "models/vosk-model-small-tr-0.3"
-if not os.path.exists(model_path):
-    logging.error("Model bulunamadı. Lütfen 'models/vosk-model-small-tr-0.3' dizinine Türkçe modeli indiriniz.")
-    exit(1)
+# Model yükleme: modeller arka planda yüklenir, önce uyandırma kelimesi modeli
+models = ModelLoader({
+    "tr": "models/vosk-model-small-tr-0.3",
+    "en": "models/vosk-model-small-en-us-0.15",
+})
 
-model = vosk.Model(model_path)
 
-model_path2 = "models/vosk-model-small-en-us-0.15"
-if not os.path.exists(model_path2):
-    logging.error("Model bulunamadı. Lütfen 'models/vosk-model-small-en-us-0.15' dizinine English modeli indiriniz.")
-    exit(1)
 
-model_en = vosk.Model(model_path2)
 
-
-
-
-# Ses seviyesi göstergesi için fonksiyon (callback fonksiyonundan önce tanımlanmalı)
+# Ses seviyesi göstergesi için fonksiyon (volume_meter_tap'ten önce tanımlanmalı)
 def update_volume_meter(volume):
     volume_bar['value'] = volume
 
-# Mikrofon callback fonksiyonu
-def callback(indata, frames, time, status):
-    """
-    SoundDevice kütüphanesi için callback fonksiyonu.
-    Bu fonksiyon ses verilerini q kuyruğuna ekler.
-    """
-    global is_speaking
-    if status:
-        # Status değeri ses yakalamada sorun olduğunu gösterir (overflow dahil)
-        logging.warning(f"Ses yakalama durumu: {status}")
-    # Konuşma sırasında gelen sesleri yoksay
-    if is_speaking:
-        return
-    
-    # Indata içerisinde veri olup olmadığını kontrol et
-    if indata is None or len(indata) == 0:
-        logging.warning("Uyarı: Ses verisi boş geldi!")
-        return
-    
-    # Ses verisinin byte dizisine dönüştürülmesi
-    try:
-        # Ses verisini kuyruğa ekle (bytes olarak)
-        q.put(bytes(indata))
-        
-        # Ses seviyesini hesapla (0-100 arası)
-        volume_norm = min(100, int(np.linalg.norm(indata) * 10))
-        
-        # GUI'yi güncellemek için window.after kullan
-        window.after(0, update_volume_meter, volume_norm)
-    except Exception as e:
-        logging.error(f"Callback hatası: {e}")
+# Ses seviyesi göstergesi; mikrofon akışına bağlı bir dinleyici olarak çalışır
+def volume_meter_tap(frames):
+    # Ses seviyesini hesapla (0-100 arası, normalize RMS)
+    rms = np.sqrt(np.mean((frames / 32768.0) ** 2))
+    volume_norm = min(100, int(rms * 1000))
+    # GUI'yi güncellemek için window.after kullan
+    window.after(0, update_volume_meter, volume_norm)
 
 # Function to show border effect - using subprocess to avoid GUI framework conflicts
 border_effect_active = False
@@ -808,7 +767,7 @@ def turkish_number_to_digit(text):
     }
     
     # Convert text to lowercase for easier matching
-    text = text.lower()
+    text = turkish_lower(text)
     
     # First, try to match the entire text as a number
     if text in number_dict:
@@ -832,9 +791,23 @@ def turkish_number_to_digit(text):
     return None
 
 # Add a helper function to cleanup listening state
+def session_stats():
+    return echo_gate.stats(audio_hub.sample_rate), hybrid_decoder.stats()
+
 def stop_listening_and_cleanup():
     global is_listening, is_chatting
     logging.info("Dinleme sonlandırılıyor...")
+    # The counters are cumulative; log what changed since start_recognition()
+    gate_stats, decoder_stats = session_stats()
+    gate_start, decoder_start = session_start_stats or ({}, {})
+    playbacks = gate_stats['playbacks'] - gate_start.get('playbacks', 0)
+    suppressed = gate_stats['suppressed_seconds'] - gate_start.get('suppressed_seconds', 0.0)
+    logging.info(f"Yankı kapısı: bu oturumda {playbacks} yanıt boyunca {suppressed:.1f} s "
+                 f"mikrofon sesi bastırıldı")
+    grammar_hits = decoder_stats['grammar_hits'] - decoder_start.get('grammar_hits', 0)
+    fallbacks = decoder_stats['fallbacks'] - decoder_start.get('fallbacks', 0)
+    logging.info(f"Gramer geçişi: bu oturumda {grammar_hits} komut doğrudan, "
+                 f"{fallbacks} tam model ile çözüldü")
     is_listening = False
     is_chatting = False
     
@@ -861,8 +834,7 @@ def stop_listening_and_cleanup():
 # Add a helper function to check for exit commands
 def is_exit_command(query):
     """Check if the query contains exit-related keywords."""
-    exit_keywords = ["görüşürüz", "hoşça kal", "teşekkürler", "çıkış", "bay bay"]
-    return any(keyword in query.lower() for keyword in exit_keywords)
+    return normalize(query).contains_any(EXIT_PHRASES)
 
 # Add a function for continuous chat mode
 def chat_mode():
@@ -872,36 +844,28 @@ def chat_mode():
     if is_chatting:
         logging.info("Zaten sohbet modundayız, tekrar başlatılmıyor.")
         return  # Zaten sohbet modundaysa tekrar başlatma
-        
-    # Ses kuyruğunu temizle
-    with q.mutex:
-        q.queue.clear()
     
+    rec = None
     try:
-        rec = vosk.KaldiRecognizer(model, 16000)
+        rec = recognizer_pool.acquire(models.get("tr"))
         is_chatting = True
         is_listening = True
         
         # Sohbet modu aktif olduğunu bildir
         window.after(0, result_text.set, "🤖 Sohbet modu aktif. 'Görüşürüz' diyerek çıkabilirsiniz.")
-        say_response("Sohbet modu aktif. İstediğiniz zaman Görüşürüz veya Teşekkürler diyerek sonlandırabilirsiniz.")
+        say_response(prompts.CHAT_MODE_ACTIVE)
         
         # Border efekti göster
         window.after(100, show_border_effect)
         
-        with sd.RawInputStream(device=audio_input_device, samplerate=16000, blocksize=8000, dtype='int16',
-                              channels=1, callback=callback):
+        with audio_hub.subscription("chat") as mic:
+            reader = BlockReader(mic, BLOCK_FRAMES)
             
             logging.info("Sohbet modu başladı...")
             
             while is_chatting and is_listening:
-                try:
-                    # Use blocking get with timeout instead of busy polling
-                    data = q.get(timeout=0.1)
-                except queue.Empty:
-                    continue
-
-                if not data:
+                data = reader.read(timeout=0.1)
+                if data is None:
                     continue
 
                 # Optional debug logging on occasion (disabled by default)
@@ -918,7 +882,7 @@ def chat_mode():
                         window.after(0, result_text.set, f"Siz: {text}")
                         
                         # Sohbet yanıtı oluştur
-                        chat_response, end_chat = generate_chat_response(text)
+                        chat_response, end_chat = generate_chat_response(normalize(text))
                         
                         # Yanıtı göster ve seslendir
                         window.after(500, lambda r=chat_response: result_text.set(f"🤖 {r}"))
@@ -941,29 +905,144 @@ def chat_mode():
         window.after(0, lambda: messagebox.showerror("Hata", f"Sohbet modunda hata: {e}"))
         is_chatting = False
         stop_listening_and_cleanup()
+    finally:
+        recognizer_pool.release(rec)
 
 # Modify the recognize function to handle chat mode
-def recognize():
+# recognize() için niyet işleyicileri; her biri sonraki diyalog bağlamını döndürür
+intent_engine = build_engine(command_matcher.match)
+# Handlers reply without blocking: decoding goes on while a reply plays, so "iptal"
+# can interrupt it when the echo canceller keeps the microphone open
+# Grammar pass over the command and intent vocabulary, full model only for anything else
+hybrid_decoder = HybridDecoder(recognizer_pool, CommandGrammar(command_matcher, intent_engine.vocabulary()))
+
+def _show(message):
+    window.after(0, result_text.set, message)
+
+@intent_engine.on("confirm_yes")
+def on_confirm_yes(match, mic):
+    _show(prompts.WHAT_DO_YOU_WANT)
+    say_response(prompts.WHAT_DO_YOU_WANT, block=False)
+    return None
+
+@intent_engine.on("confirm_no")
+def on_confirm_no(match, mic):
+    response = prompts.GOODBYE.format(wake_word=settings.snapshot.wake_word)
+    _show(response)
+    say_response(response, block=False)
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("confirm_repeat")
+def on_confirm_repeat(match, mic):
+    # Yanıt evet ya da hayır değilse tekrar sor
+    _show(prompts.ASK_YES_NO)
+    say_response(prompts.ASK_YES_NO, block=False)
+    return "confirm"
+
+@intent_engine.on("search_no")
+def on_search_no(match, mic):
+    response = prompts.YOUTUBE_ONLY.format(wake_word=settings.snapshot.wake_word)
+    _show(response)
+    say_response(response, block=False)
+    command_spool.enqueue("url", "https://www.youtube.com/", result="xxx")
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("search_query")
+def on_search_query(match, mic):
+    query = match.slots["query"]
+    response = prompts.YOUTUBE_SEARCH.format(query=query, wake_word=settings.snapshot.wake_word)
+    _show(response)
+    say_response(response, block=False)
+    command_spool.enqueue("url", f"https://www.youtube.com/results?search_query={query}", result="xxx")
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("cancel")
+def on_cancel(match, mic):
+    stop_speaking()
+    _show("İşlem iptal edildi.")
+    say_response(prompts.CANCELLED, settings.snapshot.language, block=False)
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("chat")
+def on_chat(match, mic):
+    # Sohbet moduna geçiş
+    window.after(0, chat_mode)
+    return END
+
+@intent_engine.on("command")
+def on_command(match, mic):
+    command = match.slots["command"]
+    send_command(command.details)
+    response = prompts.COMMAND_OPENING.format(keyword=command.keyword)
+    _show(response)
+    say_response(response, block=False)
+    # Kuyruğu temizle ve evet/hayır yanıtını bekle
+    mic.clear()
+    return "confirm"
+
+def _reply_in_background(mic, message):
+    mic.clear()
+    _show(message)
+    say_response(message, block=False)
+
+@intent_engine.on("greeting")
+def on_greeting(match, mic):
+    _reply_in_background(mic, prompts.GREETING)
+    return None
+
+@intent_engine.on("video")
+def on_video(match, mic):
+    _reply_in_background(mic, prompts.ASK_VIDEO)
+    return "search"
+
+@intent_engine.on("how_are_you")
+def on_how_are_you(match, mic):
+    _reply_in_background(mic, prompts.HOW_ARE_YOU)
+    return None
+
+@intent_engine.on("sleep")
+def on_sleep(match, mic):
+    _reply_in_background(mic, prompts.SLEEP_MODE)
+    # Give time for the speech to complete before sleep
+    command_spool.enqueue("uyku modu", "bilgisayarı uyku moduna al", delay=3, result="xxx")
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("shutdown")
+def on_shutdown(match, mic):
+    _reply_in_background(mic, prompts.SHUTDOWN)
+    command_spool.enqueue("bilgisayarı kapat", "bilgisayarı kapat", delay=3, result="xxx")
+    stop_listening_and_cleanup()
+    return END
+
+@intent_engine.on("not_understood")
+def on_not_understood(match, mic):
+    # Komut bulunamadı
+    _show(prompts.NOT_UNDERSTOOD)
+    say_response(prompts.NOT_UNDERSTOOD, block=False)
+    # Kuyruğu temizle ve yeni yanıtı bekle
+    mic.clear()
+    return None
+
+def recognize(preroll_position=None):
     global is_listening, is_chatting
     
     logging.info("Dinleme başlatılıyor...")
-    rec = vosk.KaldiRecognizer(model, 16000)
     window.after(100, show_border_effect)
     
     # Dinleme durumlarını ayarla
     is_listening = True
-    wait_for_yes_no = False  # Evet/hayır yanıtı bekleme durumu
-    wait_for_search = False
+    context = None  # Diyalog bağlamı: None, "confirm" (evet/hayır) veya "search" (video araması)
     window.after(0, listening_label.config, {"text": "Dinleniyor"})
     window.after(0, status_indicator.config, {"bg": "#facc15"})
     window.after(0, animate_listening)
     
     # Debug çıktısı
-    logging.info("SoundDevice RawInputStream başlatılıyor...")
-    
-    # Kuyruğu temizle
-    with q.mutex:
-        q.queue.clear()
+    logging.info("Mikrofon aboneliği başlatılıyor...")
     
     # Mikrofon akışını başlat - hata ayıklama için daha fazla log
     try:
@@ -973,20 +1052,16 @@ def recognize():
         logging.info(f"Örnekleme Hızı: {device_info['default_samplerate']}")
         logging.info(f"Maksimum Giriş Kanalları: {device_info['max_input_channels']}")
         
-        # Akış başlatma
-        with sd.RawInputStream(device=audio_input_device, samplerate=16000, blocksize=8000, dtype='int16',
-                              channels=1, callback=callback):
+        # Akış başlatma; model henüz yükleniyorsa hazır olana kadar bekler
+        with hybrid_decoder.session(models.get("tr"), settings.snapshot.hybrid_decoding) as decoder, \
+                audio_hub.subscription("command", start_position=preroll_position) as mic:
+            reader = BlockReader(mic, BLOCK_FRAMES)
             logging.info("Mikrofon akışı başlatıldı, dinleniyor...")
             
             # Ana dinleme döngüsü
             while is_listening:
-                try:
-                    # Use blocking get with timeout instead of busy polling
-                    data = q.get(timeout=0.1)
-                except queue.Empty:
-                    continue
-
-                if not data:
+                data = reader.read(timeout=0.1)
+                if data is None:
                     continue
 
                 # Optional debug logging on occasion (disabled by default)
@@ -995,224 +1070,19 @@ def recognize():
                 #     logging.info(f"Ses seviyesi: {volume}")
 
                 # VOSK modeline ses verisini gönder
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    text = result.get("text", "")
-                    if text:
-                        logging.info(f"Algılanan metin: {text}")
-                        window.after(0, result_text.set, text)
-                        
-                        # Evet/hayır yanıtı bekliyorsak
-                        if wait_for_yes_no:
-                            if "evet" in text.lower():
-                                wait_for_yes_no = False
-                                response = "Ne istersiniz?"
-                                window.after(0, result_text.set, response)
-                                say_response(response)
-                                continue
-                            elif "hayır" in text.lower() or "hayir" in text.lower():
-                                wait_for_yes_no = False
-                                wake_word = settings.get("wake_word")
-                                response = f"Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
-                                window.after(0, result_text.set, response)
-                                say_response(response)
-                                stop_listening_and_cleanup()
-                                break
-                            else:
-                                # Yanıt evet ya da hayır değilse tekrar sor
-                                window.after(0, result_text.set, "Lütfen evet veya hayır deyin.")
-                                say_response("Lütfen evet veya hayır deyin.")
-                                continue
-                        
-                        if wait_for_search:
-                            if "hayır" in text.lower() or "hayir" in text.lower():
-                                wait_for_search = False
-                                wake_word = settings.get("wake_word")
-                                response = f"Tamamdır sadece Youtube açıyorum. Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
-                                window.after(0, result_text.set, response)
-                                say_response(response)
-                                data = {"result": "xxx", "cmd_type": "url", "target": "https://www.youtube.com/"}
-                                try:
-                                    response = requests.post(url, json=data)
-                                    print("Sunucudan gelen cevap:", response.text)
-                                    print(response.content.decode('utf-8'))
-                                    print(response.json())
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-                                stop_listening_and_cleanup()
-                                break
-                            else:
-                                wait_for_search = False
-                                wake_word = settings.get("wake_word")
-                                response = f"Tamamdır, {text} aratıyorum. Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
-                                url = f"https://www.youtube.com/results?search_query={text}"
-                                say_response(response)
-                                window.after(0, result_text.set, response)
-                                data = {"result": "xxx", "cmd_type": "url", "target": url}
-                                try:
-                                    response = requests.post(url, json=data)
-                                    print("Sunucudan gelen cevap:", response.text)
-                                    print(response.content.decode('utf-8'))
-                                    print(response.json())
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-                                stop_listening_and_cleanup()
-                                break
-                        
-                        # İptal komutu
-                        if "iptal" in text.lower() or "dur" in text.lower():
-                            window.after(0, result_text.set, "İşlem iptal edildi.")
-                            window.after(0, lambda: say_response("İptal edildi", settings.get("language")))
-                            stop_listening_and_cleanup()
-                            break
-                        # Sohbet moduna geçiş
-                        if any(x in text.lower() for x in ["sohbet", "konuş", "konuşalım"]):
-                            window.after(0, chat_mode)
-                            break
-                        # Komut işle
-                        command_found = process_command(text)
-                        command_keyword = text if command_found else None
-                        # Get the exact command keyword from the text
-                        command_keyword = None
-                        for keyword in settings.get_all_commands():
-                            if keyword in text.lower():
-                                command_keyword = keyword
-                                break
-                        
-                        if not command_keyword:
-                            # Check individual words
-                            for word in text.lower().split():
-                                if word in settings.get_all_commands():
-                                    command_keyword = word
-                                    break
-                        
-                        if command_found and command_keyword:
-                            # Komut bulundu, sesli yanıt ver
-                            response = f"Tamamdır, {command_keyword} açıyorum. Başka bir işlem ister misiniz?"
-                            window.after(0, result_text.set, response)
-                            say_response(response)
-                            
-                            # Evet/hayır yanıtı bekleme moduna geç
-                            wait_for_yes_no = True
-
-                            # Kuyruğu temizle ve yeni yanıtı bekle
-                            with q.mutex:
-                                q.queue.clear()
-                            continue
-                        
-                        # Yardım isteği
-                        if "merhaba" in text.lower() or "selam" in text.lower():
-                            # Stop processing input temporarily so we don't hear our own speech
-                            with q.mutex:
-                                q.queue.clear()
-                            
-                            help_msg = "Merhaba! Nasılsınız? Size nasıl yardımcı olabilirim?"
-                            window.after(0, result_text.set, help_msg)
-                            
-                            # Use a separate thread for speech to avoid blocking the main thread
-                            executor.submit(say_response, help_msg)
-                            
-                            # Short pause to avoid picking up the start of our own speech
-                            time.sleep(0.5)
-                            continue
-
-                        if "video" in text.lower():
-                            # Stop processing input temporarily so we don't hear our own speech
-                            with q.mutex:
-                                q.queue.clear()
-                            
-                            help_msg = "İzlemek istediğin bir video var mı? Varsa söyle Youtube'da aratayım yoksa sadece aç diyebilirsin."
-                            window.after(0, result_text.set, help_msg)
-                            
-                            # Use a separate thread for speech to avoid blocking the main thread
-                            executor.submit(say_response, help_msg)
-                            wait_for_search = True
-                            # Short pause to avoid picking up the start of our own speech
-                            time.sleep(0.5)
-                            continue
-
-                        if "nasılsın" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-                                
-                            help_msg = "Ben bir yapay zeka asistanıyım, duygularım yok ama size yardımcı olmak için buradayım!"
-                            window.after(0, result_text.set, help_msg)
-                            
-                            # Use a separate thread for speech to avoid blocking the main thread
-                            executor.submit(say_response, help_msg)
-                            
-                            # Short pause to avoid picking up the start of our own speech
-                            time.sleep(0.5)
-                            continue
-                        
-                        if "uyku modu" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-                                
-                            help_msg = "Bilgisayarınızı uyku moduna alıyorum."
-                            window.after(0, result_text.set, help_msg)
-                            
-                            # Use a separate thread for speech to avoid blocking the main thread
-                            executor.submit(say_response, help_msg)
-                            
-                            # Give time for the speech to complete before sleep
-                            def sleep_computer():
-                                time.sleep(3)
-                                data = {"result": "xxx", "cmd_type": "uyku modu", "target": "bilgisayarı uyku moduna al"}
-                                try:
-                                    response = requests.post(url, json=data)
-                                    print("Sunucudan gelen cevap:", response.text)
-                                    print(response.content.decode('utf-8'))
-                                    print(response.json())
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-                                
-                            
-                            # Execute sleep in separate thread
-                            executor.submit(sleep_computer)
-                            
-                            # Short pause to avoid picking up the start of our own speech
-                            time.sleep(0.5)
-                            stop_listening_and_cleanup()
-                            break
-                        
-                        if "bilgisayarı kapat" in text.lower():
-                            with q.mutex:
-                                q.queue.clear()
-
-                            help_msg = "Tamamdır, bilgisayar kapanıyor. Görüşürüz!"
-                            window.after(0, result_text.set, help_msg)
-                            executor.submit(say_response, help_msg)  # sesli yanıt
-
-                            def shutdown_computer():
-                                time.sleep(3)
-                                data = {"result": "xxx", "cmd_type": "bilgisayarı kapat", "target": "bilgisayarı kapat"}
-                                try:
-                                    response = requests.post(url, json=data)
-                                    print("Sunucudan gelen cevap:", response.text)
-                                    print(response.content.decode('utf-8'))
-                                    print(response.json())
-                                except Exception as e:
-                                    print("İstek gönderilirken hata oluştu:", e)
-
-                            executor.submit(shutdown_computer)
-                            time.sleep(0.5)  # kendi sesimizi algılamamaya yardımcı
-                            stop_listening_and_cleanup()
-                            break
-
-                        # Komut bulunamadı
-                        help_msg = "Dediğinizi anlayamadım. Lütfen tekrar deneyin."
-                        window.after(0, result_text.set, help_msg)
-                        say_response(help_msg)
-                        
-                        # Kuyruğu temizle ve yeni yanıtı bekle
-                        with q.mutex:
-                            q.queue.clear()
-                        continue
-                        
+                decoded = decoder.accept(data)
+                if decoded is not None:
+                    text = decoded.text
+                    logging.info(f"Algılanan metin ({decoded.source}): {text}")
+                    window.after(0, result_text.set, text)
+                    
+                    # Niyeti bul ve işleyicisini çalıştır; işleyici sonraki bağlamı döndürür
+                    context = intent_engine.handle(normalize(text), context, mic=mic)
+                    if context == END:
+                        break
+                    
                 elif random.randint(1, 500) == 1:  # Ses verisinin işlenip işlenmediğini kontrol et (kararlılık için)
-                    partial = json.loads(rec.PartialResult())
-                    partial_text = partial.get("partial", "")
+                    partial_text = decoder.partial()
                     if partial_text:
                         logging.info(f"Kısmi algılama: {partial_text}")
             
@@ -1224,8 +1094,13 @@ def recognize():
         stop_listening_and_cleanup()
 
 # Butona tıklayınca konuşmayı başlat
-def start_recognition():
-    global passive_listening_active, is_listening
+def start_recognition(preroll_position=None):
+    global passive_listening_active, is_listening, session_start_stats
+    
+    # Dinleme zaten sürüyorsa ikinci bir döngü başlatma
+    if is_listening:
+        logging.info("Zaten dinleniyor, tekrar başlatılmıyor.")
+        return
     
     logging.info("Manuel dinleme başlatılıyor...")
     was_passive_active = passive_listening_active
@@ -1234,17 +1109,7 @@ def start_recognition():
         window.after(0, passive_indicator.config, {"bg": "#6b7280"})
         window.after(0, passive_label.config, {"text": "Pasif Dinleme: Bekleniyor", "fg": COLORS["text_secondary"]})
     
-    # Önce eski dinlemeyi tamamen kapat
-    is_listening = False
-    sd.stop()  # Varsa açık ses akışını durdur
-    
-    # Ses kuyruğunu temizle
-    with q.mutex:
-        q.queue.clear()
-    
-    # 1 saniye bekle
-    time.sleep(0.5)
-    
+    # Mikrofon akışı sürekli açık; bekleme yapmadan dinlemeye geç
     # Dinleme durum değişkenini ayarla
     is_listening = True
     window.after(0, listening_label.config, {"text": "Dinleniyor"})
@@ -1252,7 +1117,8 @@ def start_recognition():
     
     # Dinleme fonksiyonunu yeni bir thread'de başlat
     logging.info("Dinleme thread'i başlatılıyor...")
-    executor.submit(recognize)
+    session_start_stats = session_stats()
+    executor.submit(recognize, preroll_position)
 
 # "Dinleniyor..." animasyonu
 def animate_listening():
@@ -1417,8 +1283,7 @@ header_font = ("Segoe UI", 24, "bold")
 small_font = ("Segoe UI", 12)
 button_font = ("Segoe UI", 14, "bold")
 
-# Ayarlar nesnesini oluştur (ve duplicates sil)
-settings = Settings()
+# Ayarlar assistant_logic ile paylaşılır: komut dizini bağlı ve ayarlar.json izleniyor
 
 # Open settings dialog
 def open_settings():
@@ -1637,69 +1502,62 @@ footer = tk.Label(main_frame, text="© 2025 Sesli Asistan v1.0",
                  font=("Segoe UI", 9), bg=COLORS["bg_dark"], fg=COLORS["text_secondary"])
 footer.pack(pady=(20, 0))
 
-# Pasif dinleme için ses callback fonksiyonu
-def passive_callback(indata, frames, time, status):
-    global is_speaking
-    if status:
-        logging.warning(status)
-    # Konuşma sırasında gelen sesleri yoksay
-    if is_speaking:
-        return
-    passive_q.put(bytes(indata))
-
 def passive_listen_loop():
-    global passive_listening_active
+    global passive_listening_active, last_wake_grammar
     
     logging.info("Pasif dinleme başlatılıyor...")
+    rec = None
     try:
-        rec = vosk.KaldiRecognizer(model_en, 16000, '["jarvis", "carviz", "çervis"]')
-                
-        # Kuyruğu temizle
-        with passive_q.mutex:
-            passive_q.queue.clear()
-        
-        with sd.RawInputStream(device=audio_input_device, samplerate=16000, blocksize=8000, dtype='int16',
-                              channels=1, callback=passive_callback):
+        # Gramer ayarlardaki uyandırma kelimesinden kurulur
+        snapshot = settings.snapshot
+        wake_word = snapshot.wake_word
+        grammar = wake_grammar(wake_word)
+        model = models.get("en")
+        if last_wake_grammar not in (None, grammar):
+            # Uyandırma kelimesi değişti: eski kelimenin tanıyıcıları bir daha kullanılmaz
+            recognizer_pool.discard(model, 16000, last_wake_grammar)
+        last_wake_grammar = grammar
+        rec = recognizer_pool.acquire(model, 16000, grammar)
+        
+        with audio_hub.subscription("wake_word") as mic:
+            reader = BlockReader(mic, BLOCK_FRAMES)
             
-            wake_word = settings.get("wake_word")
+            detector = WakeWordDetector(rec, wake_word)
+            vad = EnergyVAD(audio_hub.sample_rate) if snapshot.vad_enabled else None
             logging.info(f"Pasif dinleme başlatıldı... ('{wake_word}' komutunu bekliyor)")
             window.after(0, result_text.set, f"Pasif dinleme aktif. '{wake_word}' diyerek beni çağırabilirsiniz.")
             
             while passive_listening_active:
-                if passive_q.empty():
-                    sd.sleep(10)
+                frames = reader.read_frames(timeout=0.1)
+                if frames is None:
                     continue
                 
-                data = passive_q.get()
-                if len(data) == 0:
+                # Wake word tespiti (sessiz bölümler VAD tarafından atlanır)
+                event = detector.accept_frames(frames, reader.position, vad)
+                if event is None:
                     continue
                 
-                if rec.AcceptWaveform(data):
-                    result = json.loads(rec.Result())
-                    text = result.get("text", "").lower()
-                    
-                    if text:
-                        logging.info(f"Pasif dinleme duydu: {text}")
-                        
-                        # Wake word tespiti
-                        if wake_word.lower() in text:
-                            logging.info(f"WAKE WORD ALGILANDI: {wake_word}")
-                            window.after(0, result_text.set, "Sizi dinliyorum ne yapmak istersiniz?")
-                            
-                            # Show border effect when wake word detected
-                            window.after(100, show_border_effect)
-                            
-                            # Sesli yanıt ver
-                            window.after(0, lambda: say_response("Sizi dinliyorum ne yapmak istersiniz?", settings.get("language")))
-                            
-                            # Ses kaydını durdur
-                            passive_listening_active = False
-                            window.after(0, passive_indicator.config, {"bg": "#6b7280"})
-                            window.after(0, passive_label.config, {"text": "Pasif Dinleme: Bekleniyor", "fg": COLORS["text_secondary"]})
-                            
-                            # Ana dinlemeyi başlat (1 saniye bekleyerek TTS çakışmasını önle)
-                            window.after(1500, start_recognition)
-                            break
+                logging.info(f"WAKE WORD ALGILANDI: {wake_word}")
+                window.after(0, result_text.set, prompts.LISTENING)
+                
+                # Show border effect when wake word detected
+                window.after(100, show_border_effect)
+                
+                # Ses kaydını durdur
+                passive_listening_active = False
+                window.after(0, passive_indicator.config, {"bg": "#6b7280"})
+                window.after(0, passive_label.config, {"text": "Pasif Dinleme: Bekleniyor", "fg": COLORS["text_secondary"]})
+                
+                if event.has_trailing_speech:
+                    # Komut uyandırma kelimesiyle aynı nefeste söylendi: ön tampondan çöz
+                    start_recognition(preroll_position=event.end_position)
+                else:
+                    # Sesli yanıt ver, bitince ana dinlemeyi başlat
+                    say_response(prompts.LISTENING, settings.snapshot.language)
+                    start_recognition()
+                break
+            if vad is not None:
+                logging.info(f"VAD: sesin %{vad.skipped_ratio * 100:.0f} kadarı tanıyıcıya gönderilmeden atlandı")
                 
     except Exception as e:
         # Exit silently if application is closing
@@ -1712,11 +1570,21 @@ def passive_listen_loop():
         passive_listening_active = False
         window.after(0, passive_indicator.config, {"bg": "#6b7280"})
         window.after(0, passive_label.config, {"text": "Pasif Dinleme: Hata", "fg": BOOTSTRAP_COLORS["danger"]})
+    finally:
+        recognizer_pool.release(rec)
+
+# Sabit yanıtları arka planda önceden seslendirip önbelleğe al
+def start_tts_warmup():
+    wake_word = settings.get("wake_word")
+    warm_up_tts(prompts.static_prompts(wake_word, settings.snapshot.commands))
 
 # Uygulama başlatıldığında ayarlara göre pasif dinlemeyi otomatik başlat
 def check_autostart_passive():
     # Uygulama başlatıldığında ses cihazı ayarlarını uygula
     apply_audio_device_settings()
+    # Mikrofon akışını aç ve ses seviyesi göstergesini bağla
+    audio_hub.add_tap("volume", volume_meter_tap)
+    audio_hub.start()
     # Pasif dinleme ayarı etkinse başlat
     if settings.get("passive_listening"):
         update_passive_listening_state()
@@ -1731,6 +1599,9 @@ def on_closing():
     is_listening = False
     try: sd.stop()
     except: pass
+    audio_hub.stop()
+    command_spool.close()
+    dispatcher.close()
     hide_border_effect()
     window.destroy()
 
@@ -1738,6 +1609,8 @@ def on_closing():
 window.protocol("WM_DELETE_WINDOW", on_closing)
 
 # Uygulama başlatıldığında çalışacak kodlar
+models.start(["en", "tr"])
+start_tts_warmup()
 window.after(1000, check_autostart_passive)
 window.after(1000, update_ui_from_settings)  # Update help text at startup
 
@@ -1780,7 +1653,24 @@ def apply_audio_device_settings():
     # Store for streams
     audio_input_device = input_idx
     audio_output_device = output_idx
+    set_output_device(audio_output_device)
+    audio_hub.set_device(audio_input_device)
+    audio_hub.set_preroll_seconds(settings.get("preroll_seconds"))
     logging.info(f"Selected devices: input={audio_input_device}, output={audio_output_device}")
     # Do not set sd.default.device to avoid recursion and type errors
 
+# Ayar değişikliklerini (pencereden veya ayarlar.json'dan) yeniden başlatmadan uygula
+def on_settings_change(event, key, value):
+    if event != "set":
+        return
+    # Bildirimler dosya izleme iş parçacığından da gelebilir; Tk işleri ana döngüde yapılır
+    if key in ("input_device", "output_device", "preroll_seconds"):
+        window.after(0, apply_audio_device_settings)
+    elif key == "passive_listening" or (key == "wake_word" and passive_listening_active):
+        window.after(0, update_passive_listening_state)
+    if key == "wake_word":
+        window.after(0, update_ui_from_settings)
+
+settings.subscribe(on_settings_change)
+
 window.mainloop()
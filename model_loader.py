@@ -0,0 +1,77 @@
+"""
+Background loading of Vosk models.
+Loading a model graph takes seconds, so models are loaded on worker threads
+in a given priority order (the small wake-word model first) while the rest
+of the application starts. Callers wait on a per-model future only when they
+actually need the model.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+
+def _default_loader(path):
+    import vosk
+    return vosk.Model(path)
+
+
+class ModelLoader:
+    def __init__(self, paths: dict, loader=None, max_workers: int = 2):
+        # name -> model directory
+        self.paths = dict(paths)
+        self._loader = loader or _default_loader
+        self._max_workers = max_workers
+        self._executor = None
+        self._futures = {name: Future() for name in self.paths}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self, order=None):
+        """Begin loading; models in order are submitted first, the rest follow."""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix="model-loader")
+        names = list(order or [])
+        names += [name for name in self.paths if name not in names]
+        for name in names:
+            self._executor.submit(self._load, name)
+        self._executor.shutdown(wait=False)
+        return self
+
+    def _load(self, name):
+        future = self._futures[name]
+        if not future.set_running_or_notify_cancel():
+            return
+        path = self.paths[name]
+        try:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model bulunamadı. Lütfen '{path}' dizinine modeli indiriniz.")
+            started = time.perf_counter()
+            model = self._loader(path)
+            logging.info(f"Model yüklendi: {name} ({time.perf_counter() - started:.1f} sn)")
+            future.set_result(model)
+        except BaseException as e:
+            logging.error(f"Model yüklenemedi ({name}): {e}")
+            future.set_exception(e)
+
+    def future(self, name) -> Future:
+        return self._futures[name]
+
+    def ready(self, name) -> bool:
+        future = self._futures[name]
+        return future.done() and future.exception() is None
+
+    def get(self, name, timeout: float = None):
+        """Return the loaded model, starting the loader if needed and waiting for it."""
+        if not self._started:
+            self.start()
+        future = self._futures[name]
+        if not future.done():
+            logging.info(f"Model hazır değil, bekleniyor: {name}")
+        return future.result(timeout)
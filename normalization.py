@@ -0,0 +1,113 @@
+"""
+Turkish-aware normalization of recognized text, computed once per utterance.
+str.lower() turns "I" into "i" and "İ" into "i" plus a combining dot, both
+wrong for Turkish; turkish_lower() maps I to ı and İ to i first.
+fold_diacritics() also maps ç ğ ı ö ş ü (and â î û) to their base letters,
+so "hayır", "hayir" and "HAYIR" compare equal; since ı folds to i, this
+also makes "Instagram" (Turkish-lowercased to "ınstagram") equal to the
+"instagram" a recognizer outputs. normalize() returns an Utterance with the
+raw text, the lowercased text, both token lists and the canonical folded
+text; results are memoized, so every matcher in the pipeline shares one
+object per recognition result.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+_LOWER_MAP = str.maketrans({"I": "ı", "İ": "i"})
+_FOLD_MAP = str.maketrans("çğıöşüâîû", "cgiosuaiu")
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def turkish_lower(text: str) -> str:
+    return text.translate(_LOWER_MAP).lower()
+
+
+def fold_diacritics(text: str) -> str:
+    folded = text.translate(_FOLD_MAP)
+    if folded.isascii():
+        return folded
+    return "".join(ch for ch in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(ch))
+
+
+def spoken_forms(phrase: str) -> set:
+    """
+    Lowercase spellings a recognizer may output for a configured phrase: the
+    Turkish one, and for names like "Instagram" the plain one ("instagram",
+    not "ınstagram").
+    """
+    return {turkish_lower(phrase), phrase.replace("İ", "i").lower()}
+
+
+class Utterance:
+    __slots__ = ("raw", "lower", "tokens", "folded_tokens", "folded")
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.lower = turkish_lower(raw)
+        self.tokens = tuple(_TOKEN_RE.findall(self.lower))
+        self.folded_tokens = tuple(fold_diacritics(token) for token in self.tokens)
+        # Canonical form: folded tokens joined by single spaces
+        self.folded = " ".join(self.folded_tokens)
+
+    def contains(self, phrase: str) -> bool:
+        """
+        Whether the phrase occurs as whole tokens, ignoring case and diacritics;
+        a word ending in "*" matches any token starting with it ("selam*").
+        """
+        words = phrase_pattern(phrase)
+        n = len(words)
+        if not n:
+            return False
+        tokens = self.folded_tokens
+        return any(all(token_matches(p, t) for p, t in zip(words, tokens[i:i + n]))
+                   for i in range(len(tokens) - n + 1))
+
+    def contains_any(self, phrases) -> bool:
+        return any(self.contains(phrase) for phrase in phrases)
+
+    def __str__(self):
+        return self.raw
+
+    def __repr__(self):
+        return f"Utterance({self.raw!r})"
+
+
+@lru_cache(maxsize=1024)
+def phrase_tokens(phrase: str) -> tuple:
+    """Folded tokens of a fixed phrase, e.g. an intent trigger."""
+    return tuple(fold_diacritics(token) for token in _TOKEN_RE.findall(turkish_lower(phrase)))
+
+
+@lru_cache(maxsize=1024)
+def phrase_pattern(phrase: str) -> tuple:
+    """Folded tokens of a trigger phrase; a trailing "*" on a word is kept."""
+    return tuple(phrase_tokens(word)[0] + "*" if word.endswith("*") else phrase_tokens(word)[0]
+                 for word in phrase.split() if phrase_tokens(word))
+
+
+def token_matches(pattern: str, token: str) -> bool:
+    return token.startswith(pattern[:-1]) if pattern.endswith("*") else token == pattern
+
+
+def canonical(phrase: str) -> str:
+    """Canonical form of a fixed phrase, comparable with Utterance.folded."""
+    return " ".join(phrase_tokens(phrase))
+
+
+@lru_cache(maxsize=256)
+def _normalize(text: str) -> Utterance:
+    return Utterance(text)
+
+
+def clear_cache():
+    """Forget the memoized utterances, e.g. so a benchmark pays for every normalization."""
+    _normalize.cache_clear()
+
+
+def normalize(text) -> Utterance:
+    """Utterance for text; an Utterance is returned unchanged."""
+    if isinstance(text, Utterance):
+        return text
+    return _normalize(text)
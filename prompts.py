@@ -0,0 +1,63 @@
+"""
+Spoken assistant prompts shared by main.py and mainpc.py.
+Templates are formatted with the wake word or a command keyword;
+static_prompts() enumerates every line that can be rendered ahead of time
+so the TTS cache can be warmed at startup.
+"""
+
+LISTENING = "Sizi dinliyorum ne yapmak istersiniz?"
+CHAT_MODE_ACTIVE = "Sohbet modu aktif. İstediğiniz zaman Görüşürüz veya Teşekkürler diyerek sonlandırabilirsiniz."
+WHAT_DO_YOU_WANT = "Ne istersiniz?"
+ASK_YES_NO = "Lütfen evet veya hayır deyin."
+CANCELLED = "İptal edildi"
+GREETING = "Merhaba! Nasılsınız? Size nasıl yardımcı olabilirim?"
+ASK_VIDEO = "İzlemek istediğin bir video var mı? Varsa söyle Youtube'da aratayım yoksa sadece aç diyebilirsin."
+HOW_ARE_YOU = "Ben bir yapay zeka asistanıyım, duygularım yok ama size yardımcı olmak için buradayım!"
+SLEEP_MODE = "Bilgisayarınızı uyku moduna alıyorum."
+SHUTDOWN = "Tamamdır, bilgisayar kapanıyor. Görüşürüz!"
+NOT_UNDERSTOOD = "Dediğinizi anlayamadım. Lütfen tekrar deneyin."
+
+# Templates
+GOODBYE = "Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
+YOUTUBE_ONLY = "Tamamdır sadece Youtube açıyorum. Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
+YOUTUBE_SEARCH = "Tamamdır, {query} aratıyorum. Görüşürüz, dilediğinde beni {wake_word} diyerek çağırabilirsin."
+COMMAND_OPENING = "Tamamdır, {keyword} açıyorum. Başka bir işlem ister misiniz?"
+
+# Chat mode responses (picked at random by generate_chat_response)
+CHAT_EXIT_RESPONSES = [
+    "Görüşürüz! İyi günler!",
+    "Hoşça kalın! Tekrar görüşmek üzere!",
+    "Teşekkür ederim, başka bir zaman görüşürüz.",
+    "İyi günler! Başka bir sorunuz olursa beni çağırabilirsiniz."
+]
+CHAT_GREETING_RESPONSES = [
+    "Merhaba! Size nasıl yardımcı olabilirim?",
+    "Selam! Bugün ne yapmak istersiniz?"
+]
+CHAT_DEFAULT_RESPONSES = [
+    "Anladım, başka nasıl yardımcı olabilirim?",
+    "Devam edin, sizi dinliyorum."
+]
+
+
+def static_prompts(wake_word, command_keywords=()):
+    """Return every prompt renderable without user input, most urgent first."""
+    prompts = [
+        LISTENING,
+        ASK_YES_NO,
+        WHAT_DO_YOU_WANT,
+        NOT_UNDERSTOOD,
+        CANCELLED,
+        GOODBYE.format(wake_word=wake_word),
+        CHAT_MODE_ACTIVE,
+        GREETING,
+        ASK_VIDEO,
+        HOW_ARE_YOU,
+        SLEEP_MODE,
+        SHUTDOWN,
+        YOUTUBE_ONLY.format(wake_word=wake_word),
+    ]
+    prompts += [COMMAND_OPENING.format(keyword=keyword) for keyword in command_keywords]
+    prompts += CHAT_EXIT_RESPONSES + CHAT_GREETING_RESPONSES + CHAT_DEFAULT_RESPONSES
+    # Deduplicate while keeping order
+    return list(dict.fromkeys(prompts))
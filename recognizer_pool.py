@@ -0,0 +1,84 @@
+"""
+Pool of reusable Vosk recognizers.
+Building a KaldiRecognizer sets up the decoding graph, which is noticeably
+slow for the full model. Recognizers are keyed by (model, sample rate,
+grammar); a released recognizer is Reset() and handed out again the next
+time listening starts instead of being constructed from scratch.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+def _default_factory(model, sample_rate, grammar):
+    import vosk
+    if grammar is None:
+        return vosk.KaldiRecognizer(model, sample_rate)
+    return vosk.KaldiRecognizer(model, sample_rate, grammar)
+
+
+class RecognizerPool:
+    def __init__(self, factory=None, max_idle_per_key: int = 2):
+        self._factory = factory or _default_factory
+        self.max_idle_per_key = max_idle_per_key
+        self._idle = defaultdict(list)
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, model, sample_rate: int = 16000, grammar: str = None):
+        """Return a recognizer in its initial state; release() it when done."""
+        key = (model, sample_rate, grammar)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                rec = idle.pop()
+                self.reused += 1
+                self._keys[id(rec)] = key
+                return rec
+        rec = self._factory(model, sample_rate, grammar)
+        with self._lock:
+            self.created += 1
+            self._keys[id(rec)] = key
+        return rec
+
+    def release(self, rec):
+        """Reset a recognizer and keep it for the next acquire() with the same key."""
+        if rec is None:
+            return
+        with self._lock:
+            key = self._keys.pop(id(rec), None)
+        if key is None:
+            return
+        try:
+            rec.Reset()
+        except Exception as e:
+            logging.error(f"Tanıyıcı sıfırlanamadı: {e}")
+            return
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_key:
+                idle.append(rec)
+
+    @contextmanager
+    def recognizer(self, model, sample_rate: int = 16000, grammar: str = None):
+        rec = self.acquire(model, sample_rate, grammar)
+        try:
+            yield rec
+        finally:
+            self.release(rec)
+
+    def clear(self, model=None):
+        """Drop idle recognizers, only those built on model when given."""
+        with self._lock:
+            for key in list(self._idle):
+                if model is None or key[0] is model:
+                    del self._idle[key]
+
+    def discard(self, model, sample_rate: int = 16000, grammar: str = None):
+        """Drop the idle recognizers of one key, e.g. a grammar that is no longer used."""
+        with self._lock:
+            self._idle.pop((model, sample_rate, grammar), None)
@@ -0,0 +1,248 @@
+"""
+Offline replay of recorded audio through the recognition pipeline.
+WAV files are pushed block by block through AudioHub.feed, the same fan-out
+the microphone callback uses, as fast as the recognizers keep up. The wake
+word is detected on the VAD-gated grammar recognizer; the command is then
+decoded from the pre-roll right after it, as when a command follows the
+wake word in one breath, by a HybridDecoder session and matched by the
+IntentEngine with the application's intent table, exactly like the first
+utterance of recognize() in main.py (handlers are not run).
+Per file it reports the real-time factor, the wake-word latency (wake word
+end to detection), the endpoint latency (utterance end to the block that
+completed the result, on the audio clock), the wall-clock processing time
+of that block (decoding plus intent matching) and how many commands the
+grammar pass resolved versus the full model fallback.
+
+    python replay.py recordings/ --json replay.json
+"""
+
+import sys
+import os
+import json
+import time
+import wave
+import logging
+import argparse
+from contextlib import ExitStack
+
+import numpy as np
+
+from audio_hub import AudioHub
+from audio_ring import BlockReader
+from audio_player import resample_linear
+from wake_word import WakeWordDetector, wake_grammar
+from vad import EnergyVAD
+from command_matcher import CommandMatcher
+from hybrid_decoder import HybridDecoder, CommandGrammar
+from intents import IntentEngine, build_engine
+
+SAMPLE_RATE = 16000
+
+
+class _ReplayStream:
+    """Stand-in for the input stream: audio arrives through AudioHub.feed instead."""
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def read_wav(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Read a WAV file as mono int16 PCM at sample_rate."""
+    with wave.open(path, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: yalnızca 16 bit PCM destekleniyor")
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return resample_linear(pcm, rate, sample_rate)
+
+
+class ReplaySession:
+    def __init__(self, wake_recognizer, decoder: HybridDecoder, engine: IntentEngine, model, wake_word: str,
+                 sample_rate: int = SAMPLE_RATE, block_frames: int = 8000, use_vad: bool = True,
+                 hybrid: bool = True, tail_silence: float = 1.0):
+        self.wake_recognizer = wake_recognizer
+        self.decoder = decoder
+        self.engine = engine
+        self.model = model
+        self.wake_word = wake_word
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames
+        self.use_vad = use_vad
+        self.hybrid = hybrid
+        self.tail_silence = tail_silence
+
+    def _ms(self, frames) -> float:
+        return frames * 1000.0 / self.sample_rate
+
+    def run(self, pcm: np.ndarray) -> dict:
+        """Replay one recording and return its metrics."""
+        pcm = np.concatenate([pcm, np.zeros(int(self.tail_silence * self.sample_rate), dtype=np.int16)])
+        hub = AudioHub(self.sample_rate, self.block_frames, stream_factory=lambda *args: _ReplayStream())
+        detector = WakeWordDetector(self.wake_recognizer, self.wake_word, self.sample_rate)
+        vad = EnergyVAD(self.sample_rate) if self.use_vad else None
+        wake_ring = hub.subscribe("wake_word")
+        wake_reader = BlockReader(wake_ring, self.block_frames)
+        command = ExitStack()
+        session = command_ring = command_reader = None
+        command_start = 0
+        interactions = []
+        current = None
+        decoder_before = self.decoder.stats()
+
+        started = time.perf_counter()
+        for offset in range(0, len(pcm), self.block_frames):
+            hub.feed(pcm[offset:offset + self.block_frames])
+            if command_ring is None:
+                frames = wake_reader.read_frames(timeout=0)
+                if frames is None:
+                    continue
+                event = detector.accept_frames(frames, wake_reader.position, vad)
+                if event is None:
+                    continue
+                current = {"wake_text": event.text,
+                           "wake_end_ms": self._ms(event.end_position),
+                           "wake_latency_ms": self._ms(hub.position - event.end_position)}
+                interactions.append(current)
+                hub.unsubscribe("wake_word", wake_ring)
+                # Decode the command from the pre-roll right after the wake word
+                command_start = event.end_position
+                session = command.enter_context(self.decoder.session(self.model, self.hybrid))
+                # Word timings give the utterance end for the endpoint latency
+                session.full.SetWords(True)
+                command_ring = hub.subscribe("command", start_position=command_start)
+                command_reader = BlockReader(command_ring, self.block_frames)
+            while command_ring is not None:
+                data = command_reader.read(timeout=0)
+                if data is None:
+                    break
+                block_started = time.perf_counter()
+                decoded = session.accept(data)
+                if decoded is None:
+                    continue
+                self._finish_command(decoded, current, block_started, command_start, hub.position)
+                current = None
+                command.close()
+                hub.unsubscribe("command", command_ring)
+                command_ring = None
+                detector.reset()
+                if vad is not None:
+                    vad.reset()
+                wake_ring = hub.subscribe("wake_word")
+                wake_reader = BlockReader(wake_ring, self.block_frames)
+        command.close()
+        elapsed = time.perf_counter() - started
+
+        decoder_after = self.decoder.stats()
+        grammar_hits = decoder_after["grammar_hits"] - decoder_before["grammar_hits"]
+        fallbacks = decoder_after["fallbacks"] - decoder_before["fallbacks"]
+        decoded = grammar_hits + fallbacks
+        audio_seconds = len(pcm) / self.sample_rate
+        return {"audio_seconds": audio_seconds, "processing_seconds": elapsed,
+                "rtf": elapsed / audio_seconds if audio_seconds else 0.0,
+                "vad_skipped_ratio": vad.skipped_ratio if vad is not None else 0.0,
+                "grammar_hits": grammar_hits, "fallbacks": fallbacks,
+                "grammar_ratio": grammar_hits / decoded if decoded else 0.0,
+                "fallback_ratio": fallbacks / decoded if decoded else 0.0,
+                "interactions": interactions}
+
+    def _finish_command(self, decoded, current, block_started, command_start, position):
+        match = self.engine.match(decoded.text)
+        processing_ms = (time.perf_counter() - block_started) * 1000
+        # Decoder time starts at the first pre-roll frame of the subscription
+        utterance_end = command_start + int(decoded.end * self.sample_rate) if decoded.end is not None else position
+        command_match = match.slots.get("command") if match is not None else None
+        current.update({"command_text": decoded.text,
+                        "source": decoded.source,
+                        "intent": match.name if match is not None else None,
+                        "keyword": command_match.keyword if command_match else None,
+                        "score": command_match.score if command_match else None,
+                        # Audio clock: how long after the utterance ended the result was available
+                        "endpoint_latency_ms": self._ms(position - utterance_end),
+                        # Wall clock: decoding the final block and matching the intent
+                        "processing_ms": processing_ms})
+
+
+def find_recordings(paths) -> list:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith(".wav"))
+        else:
+            files.append(path)
+    return files
+
+
+def report(results: dict):
+    print(f"{'dosya':<32}{'süre s':>8}{'RTF':>8}{'uyanma ms':>11}{'uç ms':>8}{'işlem ms':>10}"
+          f"{'kaynak':>9}  niyet")
+    grammar_hits = fallbacks = 0
+    for path, stats in results.items():
+        grammar_hits += stats["grammar_hits"]
+        fallbacks += stats["fallbacks"]
+        interactions = stats["interactions"] or [{}]
+        for i, item in enumerate(interactions):
+            name = os.path.basename(path) if i == 0 else ""
+            head = f"{stats['audio_seconds']:>8.1f}{stats['rtf']:>8.3f}" if i == 0 else " " * 16
+            wake = f"{item['wake_latency_ms']:.0f}" if "wake_latency_ms" in item else "-"
+            endpoint = f"{item['endpoint_latency_ms']:.0f}" if "endpoint_latency_ms" in item else "-"
+            processing = f"{item['processing_ms']:.1f}" if "processing_ms" in item else "-"
+            intent = item.get("intent") or "-"
+            if item.get("keyword"):
+                intent = f"{intent} ({item['keyword']})"
+            print(f"{name:<32}{head}{wake:>11}{endpoint:>8}{processing:>10}{item.get('source', '-'):>9}  {intent}")
+    decoded = grammar_hits + fallbacks
+    if decoded:
+        print(f"Gramer geçişi: {grammar_hits}/{decoded} (%{grammar_hits / decoded * 100:.0f}) doğrudan, "
+              f"{fallbacks} (%{fallbacks / decoded * 100:.0f}) tam model ile çözüldü")
+
+
+def main(argv=None):
+    from settings import Settings
+    from model_loader import ModelLoader
+    from recognizer_pool import RecognizerPool
+
+    parser = argparse.ArgumentParser(description="Kayıtlı ses dosyalarını tanıma hattından geçirir")
+    parser.add_argument("paths", nargs="+", help="16 kHz WAV dosyaları veya dizinleri")
+    parser.add_argument("--model-tr", default="models/vosk-model-small-tr-0.3")
+    parser.add_argument("--model-en", default="models/vosk-model-small-en-us-0.15")
+    parser.add_argument("--settings", default="ayarlar.json")
+    parser.add_argument("--wake-word")
+    parser.add_argument("--block-frames", type=int, default=8000)
+    parser.add_argument("--no-vad", action="store_true")
+    parser.add_argument("--no-hybrid", action="store_true", help="decode with the full model only")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    settings = Settings(args.settings)
+    matcher = CommandMatcher(settings.get_all_commands())
+    # The same intent table and grammar as recognize() in main.py
+    engine = build_engine(matcher.match)
+    pool = RecognizerPool()
+    decoder = HybridDecoder(pool, CommandGrammar(matcher, engine.vocabulary()), SAMPLE_RATE)
+    wake_word = args.wake_word or settings.get("wake_word")
+    models = ModelLoader({"tr": args.model_tr, "en": args.model_en}).start(["en", "tr"])
+
+    results = {}
+    for path in find_recordings(args.paths):
+        with pool.recognizer(models.get("en"), SAMPLE_RATE, wake_grammar(wake_word)) as wake_rec:
+            session = ReplaySession(wake_rec, decoder, engine, models.get("tr"), wake_word,
+                                    block_frames=args.block_frames, use_vad=not args.no_vad,
+                                    hybrid=not args.no_hybrid)
+            results[path] = session.run(read_wav(path))
+    report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -1,24 +1,45 @@
+"""
+Settings management using JSON storage and pydantic schema validation.
+Supports typed settings and command entries.
+Changes are written behind: mutations mark the settings dirty and a
+background thread writes the file atomically (temp file + rename) once no
+change has arrived for write_delay seconds. batch() groups several changes
+into one transaction with a single write.
+watch() polls the file's modification time, so edits made by another
+process (or by hand) are loaded and announced to subscribers as they happen.
+Readers on hot paths use Settings.snapshot, an immutable plain-attribute copy
+republished after every change, so they skip validation, locking and copying.
+"""
+
 import os
 import json
+import time
+import atexit
 import logging
+import threading
 import configparser
+from types import MappingProxyType
+from contextlib import contextmanager
 from pydantic import BaseModel, ValidationError, validator
 from typing import Literal, Dict
 
-"""
-Settings management using JSON storage and pydantic schema validation.
-Supports typed settings and command entries.
-"""
-
 class SettingsSchema(BaseModel):
     language: str = "tr"
     voice_speed: float = 1.0
     voice_pitch: float = 1.0
+    tts_backend: Literal["gtts", "espeak", "fake"] = "gtts"
     theme: Literal["dark", "light"] = "dark"
     wake_word: str = "ceren"
     passive_listening: bool = False
     input_device: str = ""
     output_device: str = ""
+    # Covers a command spoken right after the wake word plus the recognizer's
+    # endpoint delay, so the whole command is still kept when the wake event fires
+    preroll_seconds: float = 5.0
+    vad_enabled: bool = True
+    echo_gate: bool = True
+    echo_cancel: bool = False
+    hybrid_decoding: bool = True
     commands: Dict[str, Dict[str, str]] = {}
 
     @validator('language')
@@ -30,13 +51,73 @@ class SettingsSchema(BaseModel):
     class Config:
         validate_assignment = True
 
+class SettingsSnapshot:
+    """Read-only settings at one point in time; commands is an immutable mapping."""
+    __slots__ = tuple(SettingsSchema().dict())
+
+    def __init__(self, data: dict):
+        for key, value in data.items():
+            object.__setattr__(self, key, value)
+        object.__setattr__(self, "commands", MappingProxyType(
+            {keyword: MappingProxyType(details) for keyword, details in data["commands"].items()}))
+
+    def __setattr__(self, key, value):
+        raise AttributeError("SettingsSnapshot is read-only")
+
+    def __delattr__(self, key):
+        raise AttributeError("SettingsSnapshot is read-only")
+
+    def __repr__(self):
+        return f"SettingsSnapshot(language={self.language!r}, wake_word={self.wake_word!r}, commands={len(self.commands)})"
+
+
 class Settings:
-    def __init__(self, file_path: str = "ayarlar.json"):
+    def __init__(self, file_path: str = "ayarlar.json", write_delay: float = 0.5):
         self.config_file = file_path
         # ini_file located in the same directory as config_file
         ini_dir = os.path.dirname(os.path.abspath(file_path)) or os.getcwd()
         self.ini_file = os.path.join(ini_dir, "ayarlar.ini")
+        self.write_delay = write_delay
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        # Serializes snapshots and file writes so an older snapshot never overwrites a newer one
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._last_change = 0.0
+        self._writer = None
+        self._batch_depth = 0
+        self._batch_events = []
+        # (mtime, size) of the file as last read or written here; our own writes are not reloaded
+        self._disk_state = None
+        self._watcher = None
+        self._watch_stop = threading.Event()
         self.load()
+        self._publish()
+        atexit.register(self.flush)
+
+    def subscribe(self, callback):
+        """
+        Call callback(event, key, value) after every change: "set", "add_command",
+        "remove_command", or "reload" (value is the whole command table) when the
+        commands were changed on disk.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, event, key, value):
+        with self._lock:
+            if self._batch_depth:
+                self._batch_events.append((event, key, value))
+                return
+        for callback in list(self._subscribers):
+            try:
+                callback(event, key, value)
+            except Exception as e:
+                logging.error(f"Settings subscriber error: {e}")
 
     def load(self):
         # Migrate from INI if JSON not exists but INI exists
@@ -69,7 +150,9 @@ class Settings:
             return
         if os.path.exists(self.config_file):
             try:
-                data = json.load(open(self.config_file, encoding='utf-8'))
+                self._disk_state = self._stat_file()
+                with open(self.config_file, encoding='utf-8') as f:
+                    data = json.load(f)
                 self.schema = SettingsSchema.parse_obj(data)
             except (json.JSONDecodeError, ValidationError) as e:
                 logging.error(f"Settings load error: {e}, resetting to defaults")
@@ -79,29 +162,201 @@ class Settings:
             self.schema = SettingsSchema()
             self.save()
 
+    def _write(self, data):
+        tmp_file = self.config_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.config_file)
+        self._disk_state = self._stat_file()
+
+    def _stat_file(self):
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
     def save(self):
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(self.schema.dict(), f, ensure_ascii=False, indent=4)
+        """Write the settings file now."""
+        with self._write_lock:
+            with self._lock:
+                data = self.schema.dict()
+                self._dirty = False
+            self._write(data)
+
+    def flush(self):
+        """Write pending changes now, if there are any."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = self.schema.dict()
+                self._dirty = False
+            self._write(data)
+
+    def _schedule_save(self):
+        with self._lock:
+            self._dirty = True
+            self._last_change = time.monotonic()
+            if self._batch_depth:
+                return
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_behind, name="settings-writer", daemon=True)
+                self._writer.start()
+            self._changed.notify()
+
+    def _write_behind(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._dirty and not self._batch_depth)
+                # Debounce: wait until changes stop arriving
+                while True:
+                    remaining = self._last_change + self.write_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+            try:
+                self.flush()
+            except OSError as e:
+                logging.error(f"Settings write error: {e}")
+
+    @contextmanager
+    def batch(self):
+        """
+        Apply several changes as one transaction: one file write and the change
+        notifications afterwards; on an exception every change is rolled back.
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                backup = SettingsSchema.parse_obj(self.schema.dict())
+                was_dirty = self._dirty
+            self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.schema = backup
+                    self._publish()
+                    self._dirty = was_dirty
+                    self._batch_events = []
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            if self._batch_depth:
+                return
+            events, self._batch_events = self._batch_events, []
+            dirty = self._dirty
+        if dirty:
+            self._schedule_save()
+        for event in events:
+            self._notify(*event)
+
+    def watch(self, interval: float = 1.0):
+        """Start polling the file for changes made elsewhere; returns self."""
+        with self._lock:
+            if self._watcher is None:
+                self._watch_stop.clear()
+                self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                                 name="settings-watcher", daemon=True)
+                self._watcher.start()
+        return self
+
+    def stop_watching(self):
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            self._watch_stop.set()
+            watcher.join(timeout=2)
+
+    def _watch(self, interval):
+        while not self._watch_stop.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                logging.error(f"Settings watch error: {e}")
+
+    def check_for_changes(self) -> bool:
+        """Reload the file if it changed since it was last read or written; True if reloaded."""
+        state = self._stat_file()
+        if state is None or state == self._disk_state:
+            return False
+        return self.reload()
+
+    def reload(self) -> bool:
+        """Re-read the file and notify subscribers of every difference; True if applied."""
+        with self._write_lock:
+            state = self._stat_file()
+            try:
+                with open(self.config_file, encoding='utf-8') as f:
+                    schema = SettingsSchema.parse_obj(json.load(f))
+            except (OSError, json.JSONDecodeError, ValidationError) as e:
+                # Possibly caught mid-write by an editor; the next change is picked up again
+                logging.error(f"Settings reload error: {e}")
+                self._disk_state = state
+                return False
+            with self._lock:
+                self._disk_state = state
+                if self._dirty or self._batch_depth:
+                    # Our pending write will overwrite the file anyway
+                    logging.warning("Ayarlar dosyası dışarıdan değişti, kaydedilmemiş yerel değişiklikler korunuyor")
+                    return False
+                old = self.snapshot
+                self.schema = schema
+                self._publish()
+                new = self.snapshot
+        for key in SettingsSnapshot.__slots__:
+            value = getattr(new, key)
+            if key != "commands" and value != getattr(old, key):
+                self._notify("set", key, value)
+        if new.commands != old.commands:
+            self._notify("reload", None, self.get_all_commands())
+        return True
+
+    def _publish(self):
+        # Swapping the reference is atomic; readers keep whichever snapshot they hold
+        self.snapshot = SettingsSnapshot(self.schema.dict())
 
     def get(self, key: str):
-        return getattr(self.schema, key)
+        return getattr(self.snapshot, key)
 
     def set(self, key: str, value):
         try:
-            setattr(self.schema, key, value)
-            self.save()
+            with self._lock:
+                old = getattr(self.schema, key)
+                setattr(self.schema, key, value)
+                value = getattr(self.schema, key)
+                if value == old:
+                    return
+                self._publish()
+            self._schedule_save()
+            self._notify("set", key, value)
         except ValidationError as e:
             logging.error(f"Invalid setting {key}={value}: {e}")
             raise
 
     def get_all_commands(self):
-        return self.schema.commands.copy()
+        """Mutable copy of the command table; read-only callers can use snapshot.commands."""
+        with self._lock:
+            return self.schema.commands.copy()
 
     def add_command(self, keyword: str, cmd_type: str, target: str):
-        self.schema.commands[keyword] = {"type": cmd_type, "target": target}
-        self.save()
+        with self._lock:
+            self.schema.commands[keyword] = {"type": cmd_type, "target": target}
+            # Copied under the lock: a batch() rollback or a reload may swap the schema right after
+            details = dict(self.schema.commands[keyword])
+            self._publish()
+        self._schedule_save()
+        self._notify("add_command", keyword, details)
 
     def remove_command(self, keyword: str):
-        if keyword in self.schema.commands:
+        with self._lock:
+            if keyword not in self.schema.commands:
+                return
             self.schema.commands.pop(keyword)
-            self.save()
\ No newline at end of file
+            self._publish()
+        self._schedule_save()
+        self._notify("remove_command", keyword, None)
\ No newline at end of file
@@ -0,0 +1,118 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from audio_hub import AudioHub
+
+
+class FakeStream:
+    def __init__(self, device, callback):
+        self.device = device
+        self.callback = callback
+        self.closed = False
+
+    def stop(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def make_hub():
+    streams = []
+    def factory(device, sample_rate, block_frames, callback):
+        streams.append(FakeStream(device, callback))
+        return streams[-1]
+    return AudioHub(block_frames=4, buffer_seconds=0.01, stream_factory=factory), streams
+
+
+def test_fan_out_to_subscribers_and_taps():
+    hub, streams = make_hub()
+    seen = []
+    hub.add_tap("volume", lambda frames: seen.append(len(frames)))
+    with hub.subscription("wake_word") as wake, hub.subscription("command") as command:
+        assert len(streams) == 1
+        streams[0].callback(np.arange(4, dtype=np.int16).tobytes(), 4, None, None)
+        out = np.empty(4, dtype=np.int16)
+        assert wake.read_into(out, timeout=0) == 4
+        assert command.read_into(out, timeout=0) == 4
+    assert seen == [4]
+    assert hub.running
+
+
+def test_set_device_restarts_running_stream():
+    hub, streams = make_hub()
+    hub.start()
+    hub.set_device(3)
+    assert streams[0].closed
+    assert streams[-1].device == 3
+
+
+def test_set_device_does_not_hold_the_lock_while_the_stream_stops():
+    import threading
+
+    class BlockingStream(FakeStream):
+        # Like PortAudio: stop() waits for the callback running on the audio thread
+        def stop(self):
+            audio_thread = threading.Thread(target=self.callback,
+                                            args=(np.ones(4, dtype=np.int16).tobytes(), 4, None, None))
+            audio_thread.start()
+            audio_thread.join(timeout=1)
+            assert not audio_thread.is_alive()
+
+    streams = []
+    def factory(device, sample_rate, block_frames, callback):
+        streams.append(BlockingStream(device, callback))
+        return streams[-1]
+    hub = AudioHub(block_frames=4, buffer_seconds=0.01, stream_factory=factory)
+    with hub.subscription("command") as command:
+        hub.set_device(3)
+        assert command.available == 4
+    assert streams[0].closed and streams[-1].device == 3
+
+
+def test_stale_subscription_does_not_remove_newer_one():
+    hub, _ = make_hub()
+    with hub.subscription("command"):
+        newer = hub.subscribe("command")
+    hub.feed(np.ones(4, dtype=np.int16))
+    assert newer.available == 4
+
+
+def test_subscription_seeded_from_preroll():
+    hub, _ = make_hub()
+    hub.feed(np.arange(8, dtype=np.int16))
+    ring = hub.subscribe("command", start_position=5)
+    hub.feed(np.arange(8, 12, dtype=np.int16))
+    out = np.empty(7, dtype=np.int16)
+    assert ring.read_into(out, timeout=0) == 7
+    assert list(out) == [5, 6, 7, 8, 9, 10, 11]
+    assert ring.last_read_position == 5
+
+
+def test_echo_gate_silences_playback_and_tail():
+    from echo_gate import EchoGate
+    clock = [10.0]
+    gate = EchoGate(tail=0.25, lead=0.0, clock=lambda: clock[0])
+    hub = AudioHub(sample_rate=100, block_frames=100, buffer_seconds=10, echo_gate=gate,
+                   stream_factory=lambda *args: FakeStream(None, None))
+    ring = hub.subscribe("command")
+    block = np.full(100, 1000, dtype=np.int16)
+    # Block captured 9.0-10.0 s, playback starts at 9.5 s
+    clock[0] = 9.5
+    gate.playback_started()
+    hub.feed(block, now=10.0)
+    # Playback ends at 10.5 s; the tail guard covers frames up to 10.75 s
+    clock[0] = 10.5
+    gate.playback_stopped()
+    hub.feed(block, now=11.0)
+    hub.feed(block, now=12.0)
+    out = np.empty(300, dtype=np.int16)
+    assert ring.read_into(out, timeout=0) == 300
+    assert (out[:50] == 1000).all() and (out[50:175] == 0).all() and (out[175:] == 1000).all()
+    # Positions are kept: silenced frames stay in the stream
+    assert hub.position == 300
+    assert gate.suppressed_frames == 125 and gate.suppressed_blocks == 2
+    assert gate.stats(100)["suppressed_seconds"] == 1.25
+    # The caller's buffer is never modified
+    assert (block == 1000).all()
@@ -0,0 +1,96 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import numpy as np
+from audio_player import AudioPlayer, resample_linear
+from tts_backends import pcm_to_wav
+
+
+class FakeStream:
+    def __init__(self):
+        self.written = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def write(self, data):
+        self.release.wait()
+        self.written.append(data)
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_player(stream):
+    return AudioPlayer(sample_rate=16000, block_frames=100, stream_factory=lambda *args: stream)
+
+
+def test_play_writes_all_blocks():
+    stream = FakeStream()
+    player = make_player(stream)
+    item = player.play(np.ones(250, dtype=np.int16), 16000)
+    assert item.completed
+    assert sum(len(b) for b in stream.written) == 500
+    player.close()
+
+
+def test_play_file_is_decoded_once(tmp_path):
+    path = tmp_path / "a.wav"
+    path.write_bytes(pcm_to_wav(np.arange(80, dtype=np.int16).tobytes(), 8000))
+    player = make_player(FakeStream())
+    first = player.load(str(path))
+    assert len(first) == 160
+    assert player.load(str(path)) is first
+    player.close()
+
+
+def test_interrupt_drops_current_and_queued():
+    stream = FakeStream()
+    stream.release.clear()
+    player = make_player(stream)
+    first = player.enqueue([np.ones(1000, dtype=np.int16)], 16000)
+    second = player.enqueue([np.ones(1000, dtype=np.int16)], 16000)
+    player.interrupt()
+    stream.release.set()
+    assert first.wait(2) and second.wait(2)
+    assert not first.completed and not second.completed
+    assert len(stream.written) <= 1
+    player.close()
+
+
+def test_resample_linear_length():
+    pcm = np.zeros(160, dtype=np.int16)
+    assert len(resample_linear(pcm, 16000, 24000)) == 240
+
+
+def test_player_reports_playback_to_echo_gate():
+    from echo_gate import EchoGate
+    gate = EchoGate()
+    stream = FakeStream()
+    active_during_write = []
+    original_write = stream.write
+    stream.write = lambda data: (active_during_write.append(gate.active), original_write(data))
+    player = AudioPlayer(sample_rate=16000, block_frames=100, stream_factory=lambda *args: stream,
+                         echo_gate=gate)
+    player.play(np.zeros(250, dtype=np.int16), 16000)
+    player.close()
+    assert active_during_write == [True, True, True]
+    assert gate.playbacks == 1
+    # Only the tail guard remains after playback
+    gate.tail = 0
+    assert not gate.active
+
+
+def test_player_reports_output_latency_to_echo_canceller():
+    from echo_canceller import EchoCanceller
+    aec = EchoCanceller()
+    stream = FakeStream()
+    stream.latency = 0.08
+    player = AudioPlayer(sample_rate=16000, block_frames=100, stream_factory=lambda *args: stream,
+                         echo_canceller=aec)
+    player.play(np.zeros(250, dtype=np.int16), 16000)
+    player.close()
+    assert aec.output_latency == 0.08 and aec.total_delay == 0.08
@@ -0,0 +1,82 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import numpy as np
+from audio_ring import FrameRingBuffer, BlockReader, PreRollBuffer
+
+
+def test_write_read_wraparound():
+    ring = FrameRingBuffer(10)
+    out = np.empty(4, dtype=np.int16)
+    for start in range(0, 24, 4):
+        ring.write(np.arange(start, start + 4, dtype=np.int16).tobytes())
+        assert ring.read_into(out, timeout=0) == 4
+        assert list(out) == list(range(start, start + 4))
+    assert ring.overruns == 0
+
+
+def test_overrun_drops_oldest_frames():
+    ring = FrameRingBuffer(8)
+    ring.write(np.arange(12, dtype=np.int16))
+    out = np.empty(8, dtype=np.int16)
+    assert ring.read_into(out, timeout=0) == 8
+    assert list(out) == list(range(4, 12))
+    assert (ring.overruns, ring.dropped_frames) == (1, 4)
+    ring.write(np.arange(6, dtype=np.int16))
+    ring.write(np.arange(6, dtype=np.int16))
+    assert (ring.overruns, ring.dropped_frames) == (2, 8)
+
+
+def test_read_blocks_until_enough_frames():
+    ring = FrameRingBuffer(100)
+    reader = BlockReader(ring, 20)
+    assert reader.read(timeout=0.01) is None
+    timer = threading.Timer(0.05, ring.write, args=(np.ones(20, dtype=np.int16),))
+    timer.start()
+    data = reader.read(timeout=2)
+    assert data is not None and len(data) == 40
+    timer.join()
+
+
+def test_close_returns_partial_block():
+    ring = FrameRingBuffer(100)
+    ring.write(np.ones(5, dtype=np.int16))
+    ring.close()
+    out = np.empty(20, dtype=np.int16)
+    assert ring.read_into(out, timeout=1) == 5
+
+
+def test_reader_returns_partial_block_after_close():
+    ring = FrameRingBuffer(100)
+    reader = BlockReader(ring, 20)
+    ring.write(np.arange(5, dtype=np.int16))
+    ring.close()
+    data = reader.read(timeout=1)
+    # A byte view of the first five frames of the reader's block
+    assert len(data) == 10
+    assert list(reader.block[:5]) == [0, 1, 2, 3, 4]
+    assert reader.read(timeout=0) is None
+
+
+def test_preroll_since_position():
+    preroll = PreRollBuffer(10)
+    preroll.write(np.arange(8, dtype=np.int16))
+    preroll.write(np.arange(8, 14, dtype=np.int16))
+    assert preroll.position == 14
+    assert list(preroll.since(10)) == [10, 11, 12, 13]
+    # Older frames than the capacity are clamped
+    assert list(preroll.since(0)) == list(range(4, 14))
+    preroll.write(np.arange(14, 40, dtype=np.int16))
+    assert list(preroll.since(35)) == [35, 36, 37, 38, 39]
+
+
+def test_preroll_logs_frames_already_overwritten(caplog):
+    preroll = PreRollBuffer(10)
+    preroll.write(np.arange(14, dtype=np.int16))
+    with caplog.at_level("WARNING"):
+        assert list(preroll.since(10)) == [10, 11, 12, 13]
+    assert not caplog.records
+    with caplog.at_level("WARNING"):
+        assert list(preroll.since(1)) == list(range(4, 14))
+    assert "3 karesi" in caplog.text
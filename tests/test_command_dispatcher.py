@@ -0,0 +1,75 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from command_dispatcher import CommandDispatcher
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        Handler.received.append((body, self.client_address[1]))
+        reply = json.dumps({"status": "ok", "cmd_type": body["cmd_type"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.received = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/endpoint"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_submit_returns_future_and_reuses_connection(server):
+    dispatcher = CommandDispatcher(server, max_workers=1)
+    first = dispatcher.submit("url", "https://www.youtube.com/", result="xxx")
+    assert first.result(timeout=5) == {"status": "ok", "cmd_type": "url"}
+    dispatcher.submit("exe", "calc.exe").result(timeout=5)
+    dispatcher.close()
+    (body, port1), (_, port2) = Handler.received
+    assert body == {"cmd_type": "url", "target": "https://www.youtube.com/", "result": "xxx"}
+    # Keep-alive: both requests came over the same client connection
+    assert port1 == port2
+
+
+def test_delay_postpones_sending(server):
+    dispatcher = CommandDispatcher(server)
+    started = time.perf_counter()
+    future = dispatcher.submit("uyku modu", "bilgisayarı uyku moduna al", delay=0.2)
+    assert not Handler.received
+    future.result(timeout=5)
+    assert time.perf_counter() - started >= 0.2
+    dispatcher.close()
+
+
+def test_unreachable_endpoint_fails_without_blocking():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    dispatcher = CommandDispatcher(f"http://127.0.0.1:{port}/endpoint", retries=1, backoff=0.01,
+                                   connect_timeout=0.5)
+    started = time.perf_counter()
+    future = dispatcher.submit("url", "https://www.google.com")
+    assert time.perf_counter() - started < 0.1
+    with pytest.raises(Exception):
+        future.result(timeout=5)
+    dispatcher.close()
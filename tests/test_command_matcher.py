@@ -0,0 +1,78 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from command_matcher import AhoCorasick, CommandMatcher
+from settings import Settings
+
+COMMANDS = {
+    "google": {"type": "url", "target": "https://www.google.com"},
+    "youtube": {"type": "url", "target": "https://www.youtube.com"},
+    "müzik": {"type": "url", "target": "https://music.apple.com"},
+    "müzik listesi": {"type": "url", "target": "https://music.apple.com/library"},
+}
+
+
+def test_aho_corasick_finds_overlapping_words():
+    automaton = AhoCorasick(["he", "she", "hers", "his"])
+    assert sorted(automaton.find_all("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_exact_match_prefers_longest_keyword():
+    matcher = CommandMatcher(COMMANDS)
+    match = matcher.match("Müzik listesi aç")
+    assert match.keyword == "müzik listesi"
+    assert match.exact
+    assert matcher.match("youtube'u aç").keyword == "youtube"
+
+
+def test_fuzzy_match_uses_cutoff():
+    matcher = CommandMatcher(COMMANDS)
+    match = matcher.match("yutube")
+    assert match.keyword == "youtube"
+    assert not match.exact
+    assert match.details["target"] == "https://www.youtube.com"
+    assert matcher.match("hava durumu") is None
+    assert matcher.match("yutube", score_cutoff=99) is None
+
+
+def test_index_follows_settings_changes(tmp_path):
+    settings = Settings(file_path=str(tmp_path / "settings.json"))
+    matcher = CommandMatcher().attach(settings)
+    assert matcher.match("hesap makinesi") is None
+    settings.add_command("hesap makinesi", "exe", "calc.exe")
+    assert matcher.match("hesap makinesi aç").details == {"type": "exe", "target": "calc.exe"}
+    settings.remove_command("hesap makinesi")
+    assert matcher.match("hesap makinesi aç") is None
+    assert len(matcher) == 0
+
+
+def test_keyword_matched_against_token_windows():
+    matcher = CommandMatcher(COMMANDS)
+    # Whole-sentence ratio would be far below the cutoff
+    match = matcher.match("yutube açar mısın lütfen")
+    assert match.keyword == "youtube"
+    assert match.window == "yutube"
+    assert matcher.match("you tube aç").window == "you tube"
+
+
+def test_rank_returns_scored_matches_best_first():
+    matcher = CommandMatcher(COMMANDS)
+    ranked = matcher.rank("müzk listesi", score_cutoff=60)
+    assert [m.keyword for m in ranked][:2] == ["müzik listesi", "müzik"]
+    assert ranked[0].score >= ranked[1].score
+    assert matcher.rank("hava durumu") == []
+
+
+def test_keyword_changes_swap_in_a_prebuilt_automaton():
+    matcher = CommandMatcher(COMMANDS)
+    before = matcher._automaton
+    matcher.add("hesap makinesi", {"type": "exe", "target": "calc.exe"})
+    # Built by add() itself, not by the next lookup
+    assert matcher._automaton is not before
+    assert list(matcher._automaton.find_all("hesap makinesi")) == [(0, "hesap makinesi")]
+    # A lookup that still sees the automaton from before a removal skips the removed keyword
+    stale = matcher._automaton
+    matcher.remove("hesap makinesi")
+    matcher._automaton = stale
+    assert matcher.exact("hesap makinesi aç") is None
+    assert matcher.exact("youtube aç").keyword == "youtube"
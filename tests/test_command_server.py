@@ -0,0 +1,106 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+
+import pytest
+import requests
+from command_dispatcher import CommandDispatcher
+from command_spool import CommandSpool
+from command_server import CommandServer, serve_in_background
+
+
+@pytest.fixture
+def server():
+    server = serve_in_background()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def endpoint(server, path="/endpoint"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_single_command_is_executed_dry(server):
+    reply = requests.post(endpoint(server), json={"cmd_type": "uyku modu", "target": "x"}, timeout=5)
+    assert reply.status_code == 200
+    assert reply.json()["action"] == "bilgisayar uyku moduna alınacak"
+    assert server.executed == [{"cmd_type": "uyku modu", "target": "x"}]
+
+
+def test_unknown_command_is_rejected(server):
+    reply = requests.post(endpoint(server, "/komut"), json={"cmd_type": "format c", "target": "x"}, timeout=5)
+    assert reply.status_code == 400
+    assert server.executed == []
+
+
+def test_batch_reports_each_command(server):
+    reply = requests.post(endpoint(server, "/endpoint/batch"), timeout=5, json={"commands": [
+        {"cmd_type": "url", "target": "https://www.google.com"},
+        {"cmd_type": "format c", "target": "x"},
+    ]})
+    assert [r["status"] for r in reply.json()["results"]] == ["ok", "error"]
+    assert len(server.executed) == 1
+
+
+def test_spool_delivers_through_local_server(server, tmp_path):
+    dispatcher = CommandDispatcher(endpoint(server))
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher)
+    for target in ("a", "b", "c"):
+        spool.enqueue("exe", target, result="xxx")
+    assert spool.flush(timeout=5)
+    spool.close()
+    dispatcher.close()
+    assert [c["target"] for c in server.executed] == ["a", "b", "c"]
+
+
+def test_spool_drops_commands_the_batch_reply_rejects(server, tmp_path):
+    dispatcher = CommandDispatcher(endpoint(server))
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher, linger=0.2)
+    spool.enqueue("url", "a")
+    spool.enqueue("format c", "x")
+    spool.enqueue("exe", "b")
+    assert spool.flush(timeout=5)
+    spool.close()
+    dispatcher.close()
+    assert [c["target"] for c in server.executed] == ["a", "b"]
+    assert server.requests == 1
+    assert (spool.delivered, spool.dropped) == (2, 1)
+
+
+def test_repeated_command_id_runs_once(server):
+    command = {"cmd_type": "bilgisayarı kapat", "target": "x", "command_id": "42"}
+    first = requests.post(endpoint(server), json=command, timeout=5).json()
+    again = requests.post(endpoint(server, "/endpoint/batch"), json={"commands": [command]}, timeout=5).json()
+    assert again["results"] == [first]
+    assert len(server.executed) == 1 and server.duplicates == 1
+
+
+def test_concurrent_retries_of_one_command_id_run_once():
+    server = CommandServer(("127.0.0.1", 0), latency=0.3)
+    command = {"cmd_type": "exe", "target": "calc.exe", "command_id": "7"}
+    replies = []
+    threads = [threading.Thread(target=lambda: replies.append(server.execute(command))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.server_close()
+    assert len(replies) == 3 and all(reply == replies[0] for reply in replies)
+    assert len(server.executed) == 1 and server.duplicates == 2
+
+
+def test_spool_retry_after_read_timeout_is_not_executed_twice(tmp_path):
+    # The first POST outlives the read timeout but still runs on the server
+    server = serve_in_background(latency=0.5)
+    dispatcher = CommandDispatcher(endpoint(server), read_timeout=0.2, retries=0)
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher, retry_interval=1.0)
+    spool.enqueue("bilgisayarı kapat", "bilgisayarı kapat")
+    assert spool.flush(timeout=5)
+    spool.close()
+    dispatcher.close()
+    server.shutdown()
+    server.server_close()
+    assert server.requests == 2
+    assert len(server.executed) == 1 and server.duplicates == 1
@@ -0,0 +1,161 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from command_dispatcher import CommandDispatcher
+from command_spool import CommandSpool
+
+
+def make_server(port=0, batch=True, batch_status=404):
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if self.path.endswith("/batch") and not batch:
+                self.send_response(batch_status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            received.append((self.path, body))
+            reply = b'{"status": "ok"}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, received
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def dispatcher_for(port):
+    return CommandDispatcher(f"http://127.0.0.1:{port}/endpoint", retries=0, connect_timeout=0.5)
+
+
+def test_burst_is_coalesced_into_one_batch(tmp_path):
+    httpd, received = make_server()
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher_for(httpd.server_address[1]), linger=0.2)
+    for i in range(5):
+        spool.enqueue("url", f"https://example.com/{i}", result="xxx")
+    assert spool.flush(timeout=5)
+    spool.close()
+    httpd.shutdown()
+    [(path, body)] = received
+    assert path == "/endpoint/batch"
+    assert [c["target"] for c in body["commands"]] == [f"https://example.com/{i}" for i in range(5)]
+
+
+def test_falls_back_to_single_posts_without_batch_endpoint(tmp_path):
+    httpd, received = make_server(batch=False)
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher_for(httpd.server_address[1]), linger=0.2)
+    spool.enqueue("url", "a")
+    spool.enqueue("exe", "b")
+    assert spool.flush(timeout=5)
+    spool.close()
+    httpd.shutdown()
+    assert [(path, body["target"]) for path, body in received] == [("/endpoint", "a"), ("/endpoint", "b")]
+
+
+def test_not_implemented_batch_endpoint_falls_back_to_single_posts(tmp_path):
+    httpd, received = make_server(batch=False, batch_status=501)
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher_for(httpd.server_address[1]), linger=0.2)
+    spool.enqueue("url", "a")
+    spool.enqueue("exe", "b")
+    assert spool.flush(timeout=5)
+    spool.close()
+    httpd.shutdown()
+    assert [body["target"] for _, body in received] == ["a", "b"]
+
+
+def test_rejected_batch_is_resent_one_by_one(tmp_path):
+    httpd, received = make_server(batch=False, batch_status=400)
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher_for(httpd.server_address[1]), linger=0.2)
+    spool.enqueue("url", "a")
+    spool.enqueue("exe", "b")
+    assert spool.flush(timeout=5)
+    spool.close()
+    httpd.shutdown()
+    assert [(path, body["target"]) for path, body in received] == [("/endpoint", "a"), ("/endpoint", "b")]
+
+
+def test_commands_survive_outage_and_restart(tmp_path):
+    port = free_port()
+    db = str(tmp_path / "spool.db")
+    spool = CommandSpool(db, dispatcher_for(port), retry_interval=0.05)
+    spool.enqueue("uyku modu", "bilgisayarı uyku moduna al")
+    assert not spool.flush(timeout=0.3)
+    spool.close()
+
+    httpd, received = make_server(port)
+    spool = CommandSpool(db, dispatcher_for(port))
+    assert spool.flush(timeout=5)
+    spool.close()
+    httpd.shutdown()
+    assert [body["cmd_type"] for _, body in received] == ["uyku modu"]
+
+
+def test_expired_commands_are_dropped(tmp_path):
+    port = free_port()
+    spool = CommandSpool(str(tmp_path / "spool.db"), dispatcher_for(port), max_age=0.1, retry_interval=0.05)
+    spool.enqueue("bilgisayarı kapat", "bilgisayarı kapat")
+    assert spool.flush(timeout=2)
+    assert spool.dropped == 1
+    spool.close()
+
+
+def test_spools_sharing_a_journal_only_drain_their_own_url(tmp_path):
+    httpd, received = make_server()
+    db = str(tmp_path / "spool.db")
+    other = CommandSpool(db, dispatcher_for(free_port()), retry_interval=10)
+    other.enqueue("url", "elsewhere")
+    spool = CommandSpool(db, dispatcher_for(httpd.server_address[1]))
+    spool.enqueue("url", "here")
+    assert spool.flush(timeout=5)
+    assert other.pending_count() == 1
+    spool.close()
+    other.close()
+    httpd.shutdown()
+    assert [body["target"] for _, body in received] == ["here"]
+
+
+def test_close_waits_for_the_post_in_flight(tmp_path):
+    import sqlite3
+    import time
+
+    class SlowDispatcher:
+        url = "http://127.0.0.1:9/endpoint"
+
+        def __init__(self):
+            self.started = threading.Event()
+
+        def send(self, payload):
+            self.started.set()
+            # Longer than close() used to wait for the worker
+            time.sleep(2.5)
+            return {"status": "ok"}
+
+    dispatcher = SlowDispatcher()
+    path = str(tmp_path / "spool.db")
+    spool = CommandSpool(path, dispatcher, linger=0)
+    spool.enqueue("url", "https://example.com")
+    assert dispatcher.started.wait(5)
+    spool.close()
+    assert spool.delivered == 1
+    with sqlite3.connect(path) as db:
+        assert db.execute("SELECT COUNT(*) FROM commands").fetchone()[0] == 0
@@ -0,0 +1,119 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from echo_canceller import EchoCanceller, PlaybackReference
+
+SR = 16000
+
+
+def make_room(seconds, seed=0, delay=160):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SR)
+    reference = np.convolve(rng.standard_normal(n), np.hanning(8), mode="same")
+    reference *= 0.3 / np.abs(reference).max()
+    taps = rng.standard_normal(256) * np.exp(-np.arange(256) / 40)
+    h = np.concatenate([np.zeros(delay), 0.3 * taps / np.sqrt(np.sum(taps ** 2))])
+    echo = np.convolve(reference, h)[:n]
+    return reference, echo
+
+
+def run(aec, capture, reference, chunk=8000):
+    out = np.concatenate([aec.cancel(capture[i:i + chunk], reference[i:i + chunk])
+                          for i in range(0, len(capture), chunk)])
+    assert len(out) == len(capture)
+    # Compensate the one sub-block output delay
+    return out[aec.block:]
+
+
+def test_converges_on_echo_path():
+    reference, echo = make_room(4)
+    aec = EchoCanceller(SR, block=256, filter_length=1024)
+    out = run(aec, echo, reference)
+    tail = slice(2 * SR, len(out))
+    erle = 10 * np.log10(np.sum(echo[tail] ** 2) / np.sum(out[tail] ** 2))
+    assert erle > 20
+
+
+def test_near_end_speech_survives_double_talk():
+    reference, echo = make_room(4)
+    near = np.zeros_like(echo)
+    t = np.arange(SR) / SR
+    near[3 * SR:] = 0.5 * np.sin(2 * np.pi * 440 * t)
+    aec = EchoCanceller(SR, block=256, filter_length=1024)
+    out = run(aec, echo + near, reference)
+    talk = slice(3 * SR, len(out))
+    residual = out[talk] - near[talk][:len(out[talk])]
+    assert np.sum(residual ** 2) < 0.05 * np.sum(near[talk] ** 2)
+    assert aec.stats()["double_talk"] > 0
+
+
+def test_silent_reference_is_a_delay_line():
+    aec = EchoCanceller(SR, block=160, filter_length=640)
+    capture = np.random.default_rng(1).standard_normal(1000).astype(np.float32)
+    out = aec.cancel(capture, np.zeros(1000))
+    assert np.array_equal(out[160:], capture[:840])
+    assert aec.stats()["adapted"] == 0
+
+
+def test_playback_reference_timeline():
+    clock = [100.0]
+    ref = PlaybackReference(SR, seconds=1, clock=lambda: clock[0])
+    ref.push(np.full(160, 16384, dtype=np.int16), SR)
+    # Queued behind the first block even though written at the same time
+    ref.push(np.full(160, -16384, dtype=np.int16), SR)
+    clock[0] = 100.1
+    ref.push(np.full(80, 16384, dtype=np.int16), SR)
+    out = ref.read(0, 1700)
+    assert (out[:160] == 0.5).all() and (out[160:320] == -0.5).all()
+    assert (out[320:1600] == 0).all() and (out[1600:1680] == 0.5).all() and (out[1680:] == 0).all()
+
+
+def test_process_aligns_capture_with_played_reference():
+    clock = [50.0]
+    aec = EchoCanceller(SR, block=256, filter_length=1024, clock=lambda: clock[0])
+    reference, echo = make_room(4)
+    to_pcm = lambda x: (x * 32768).astype(np.int16)
+    step = 1600
+    out = []
+    for i in range(0, len(reference), step):
+        # The player writes a block, then the microphone delivers the block captured meanwhile
+        aec.playback(to_pcm(reference[i:i + step]), SR)
+        clock[0] += step / SR
+        out.append(aec.process(to_pcm(echo[i:i + step]), position=i, now=clock[0]))
+    out = np.concatenate(out).astype(np.float64)[aec.block:] / 32768
+    tail = slice(2 * SR, len(out))
+    assert 10 * np.log10(np.sum(echo[tail] ** 2) / np.sum(out[tail] ** 2)) > 15
+
+
+def run_with_latency(reference, echo, output_latency, input_latency, compensate=True, step=1600):
+    """ERLE of real-time playback and capture through process(), with the streams' latencies simulated."""
+    clock = [50.0]
+    # 64 ms filter
+    aec = EchoCanceller(SR, block=256, filter_length=1024, clock=lambda: clock[0])
+    if compensate:
+        aec.set_stream_latency(output=output_latency, input=input_latency)
+    to_pcm = lambda x: (x * 32768).astype(np.int16)
+    # A block is heard output_latency after it was written, and delivered input_latency after capture
+    lag = int(output_latency * SR)
+    captured = np.concatenate([np.zeros(lag), echo])[:len(echo)]
+    events = sorted([(i / SR, 0, i) for i in range(0, len(reference), step)] +
+                    [((i + step) / SR + input_latency, 1, i) for i in range(0, len(reference), step)])
+    out = []
+    for t, kind, i in events:
+        clock[0] = 50.0 + t
+        if kind == 0:
+            aec.playback(to_pcm(reference[i:i + step]), SR)
+        else:
+            out.append(aec.process(to_pcm(captured[i:i + step]), position=i, now=clock[0]))
+    out = np.concatenate(out).astype(np.float64)[aec.block:] / 32768
+    tail = slice(2 * SR, len(out))
+    return 10 * np.log10(np.sum(captured[tail] ** 2) / np.sum(out[tail] ** 2))
+
+
+def test_stream_latencies_longer_than_the_filter_are_compensated():
+    reference, echo = make_room(4)
+    # 150 ms between writing the reference and capturing its echo
+    assert run_with_latency(reference, echo, 0.1, 0.05) > 15
+    # Misaligned, the filter cannot model the echo, but it must not diverge either
+    assert -3 < run_with_latency(reference, echo, 0.1, 0.05, compensate=False) < 3
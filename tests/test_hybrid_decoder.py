@@ -0,0 +1,123 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+from command_matcher import CommandMatcher
+from hybrid_decoder import CommandGrammar, HybridDecoder
+from intents import build_engine
+from recognizer_pool import RecognizerPool
+
+COMMANDS = {"youtube": {"type": "url", "target": "https://www.youtube.com/"}}
+
+
+class FakeRecognizer:
+    """Each block is a dict: "fast" / "full" -> (endpoint reached, result so far)."""
+
+    def __init__(self, model, rate, grammar):
+        self.grammar = grammar
+        self.name = "full" if grammar is None else "fast"
+        self.current = {"text": ""}
+        self.words = False
+        self.flushes = 0
+        self.resets = 0
+
+    def SetWords(self, words):
+        self.words = words
+
+    def AcceptWaveform(self, block):
+        final, self.current = block[self.name]
+        return final
+
+    def Result(self):
+        return json.dumps(self.current)
+
+    def FinalResult(self):
+        self.flushes += 1
+        return json.dumps(self.current)
+
+    def PartialResult(self):
+        return json.dumps({"partial": self.current.get("text", "")})
+
+    def Reset(self):
+        self.resets += 1
+        self.current = {"text": ""}
+
+
+def grammar_result(text, conf=1.0):
+    return {"text": text, "result": [{"word": word, "conf": conf} for word in text.split()]}
+
+
+def make_decoder(commands=COMMANDS):
+    matcher = CommandMatcher(commands)
+    grammar = CommandGrammar(matcher, build_engine(matcher.match).vocabulary())
+    return HybridDecoder(RecognizerPool(factory=FakeRecognizer), grammar), matcher
+
+
+def test_grammar_lists_commands_and_intent_phrases():
+    decoder, matcher = make_decoder({"Müzik Listesi": {"type": "url", "target": "x"},
+                                     "Instagram": {"type": "url", "target": "y"}})
+    words = json.loads(decoder.grammar.json)
+    assert words[-1] == "[unk]"
+    for phrase in ("müzik listesi", "evet", "hayır", "bilgisayarı kapat", "video", "konuş", "instagram"):
+        assert phrase in words
+
+
+def test_confident_grammar_hit_resolves_immediately():
+    decoder, _ = make_decoder()
+    with decoder.session("tr") as session:
+        assert session.fast.words
+        assert session.accept({"fast": (False, grammar_result("")), "full": (False, {"text": "you"})}) is None
+        decoded = session.accept({"fast": (True, grammar_result("youtube aç")),
+                                  "full": (False, {"text": "you tüp"})})
+        assert (decoded.text, decoded.source) == ("youtube aç", "grammar")
+        # The free-form pass is not waited for, its half-decoded utterance is dropped
+        assert session.full.resets == 1 and session.full.flushes == 0
+        # The free-form pass reaching its endpoint first flushes the grammar pass
+        decoded = session.accept({"fast": (False, grammar_result("evet")), "full": (True, {"text": "evet"})})
+        assert decoded.source == "grammar" and session.fast.flushes == 1
+    assert decoder.stats()["grammar_hits"] == 2
+
+
+def test_unknown_or_unsure_grammar_result_falls_back_to_full_model():
+    decoder, _ = make_decoder()
+    with decoder.session("tr") as session:
+        decoded = session.accept({"fast": (True, grammar_result("youtube [unk] [unk]")),
+                                  "full": (False, {"text": "youtube da kedi videosu"})})
+        assert (decoded.text, decoded.source) == ("youtube da kedi videosu", "full")
+        assert session.full.flushes == 1
+        decoded = session.accept({"fast": (True, grammar_result("evet", conf=0.4)),
+                                  "full": (True, {"text": "eğer"})})
+        assert (decoded.text, decoded.source) == ("eğer", "full")
+        # Noise: neither pass heard words
+        assert session.accept({"fast": (True, grammar_result("")), "full": (True, {"text": ""})}) is None
+    assert decoder.stats()["fallbacks"] == 2
+
+
+def test_grammar_rebuilt_when_commands_change():
+    decoder, matcher = make_decoder()
+    pool = decoder.pool
+    with decoder.session("tr") as session:
+        old_grammar, old_fast = session.fast.grammar, session.fast
+    with decoder.session("tr") as session:
+        assert session.fast is old_fast
+    assert decoder.grammar.builds == 1
+
+    matcher.add("perdeyi kapat", {"type": "url", "target": "x"})
+    with decoder.session("tr") as session:
+        assert "perdeyi kapat" in json.loads(session.fast.grammar)
+        assert session.fast is not old_fast
+    assert decoder.grammar.builds == 2
+    # Recognizers for the stale grammar left the pool
+    assert pool.acquire("tr", 16000, old_grammar) is not old_fast
+
+
+def test_hybrid_off_uses_full_model_only():
+    decoder, _ = make_decoder()
+    with decoder.session("tr", hybrid=False) as session:
+        assert session.fast is None
+        assert session.accept({"full": (False, {"text": "you"})}) is None
+        assert session.partial() == "you"
+        decoded = session.accept({"full": (True, {"text": "youtube aç"})})
+        assert (decoded.text, decoded.source) == ("youtube aç", "full")
+    assert decoder.pool.created == 1
@@ -0,0 +1,77 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from command_matcher import CommandMatcher
+from intents import IntentEngine, build_engine, END
+
+COMMANDS = {"youtube": {"type": "url", "target": "https://www.youtube.com/"}}
+
+
+def test_whole_tokens_and_priorities():
+    engine = build_engine(CommandMatcher(COMMANDS).match)
+    # "dur" is a token, not a substring of "durum"
+    assert engine.match("hava durumu nasıl").name == "not_understood"
+    assert engine.match("dur").name == "cancel"
+    # Cancel outranks a command, a command outranks small talk
+    assert engine.match("youtube iptal").name == "cancel"
+    command = engine.match("merhaba youtube aç")
+    assert command.name == "command" and command.slots["command"].keyword == "youtube"
+    assert engine.match("merhaba nasılsın").name == "greeting"
+    # Prefix tokens and multi-word phrases
+    assert engine.match("bir videoyu açar mısın").name == "video"
+    assert engine.match("konuşalım mı").name == "chat"
+    match = engine.match("lütfen bilgisayarı kapat şimdi")
+    assert match.name == "shutdown" and (match.start, match.end) == (1, 3)
+    assert match.slots["rest"] == "şimdi"
+    assert engine.match("bilgisayarı aç").name == "not_understood"
+
+
+def test_contexts_and_fallbacks():
+    engine = build_engine()
+    assert engine.match("evet", "confirm").name == "confirm_yes"
+    assert engine.match("hayır teşekkürler", "confirm").name == "confirm_no"
+    assert engine.match("belki", "confirm").name == "confirm_repeat"
+    # Top-level intents are inactive while waiting for a search query
+    query = engine.match("merhaba şarkısı", "search")
+    assert query.name == "search_query" and query.slots["query"] == "merhaba şarkısı"
+    assert engine.match("hayir", "search").name == "search_no"
+    # Turkish casefolding: "HAYIR" is "hayır", not "hayir" with a dotted i
+    assert engine.match("HAYIR", "confirm").name == "confirm_no"
+    # Cancelling works in every context, e.g. over the reply to a command
+    for context in (None, "confirm", "search"):
+        assert engine.match("iptal", context).name == "cancel"
+
+
+def test_handlers_drive_the_dialogue():
+    engine = IntentEngine()
+    engine.add("video", ["video*"], priority=1)
+    engine.add("no", ["hayır"], context="search")
+    engine.add_fallback("query", "search")
+    calls = []
+
+    @engine.on("video")
+    def ask(match, mic):
+        calls.append(("video", mic))
+        return "search"
+
+    engine.on("query", lambda match, mic: calls.append(("query", match.slots["query"])) or END)
+
+    context = engine.handle("video aç", None, mic="mic")
+    context = engine.handle("kedi videoları", context, mic="mic")
+    assert context == END
+    assert calls == [("video", "mic"), ("query", "kedi videoları")]
+    # Nothing matches and there is no fallback at the top level
+    assert engine.handle("merhaba") is None
+
+
+def test_stems_keep_inflected_forms():
+    engine = build_engine()
+    assert engine.match("selamlar").name == "greeting"
+    assert engine.match("merhabalar").name == "greeting"
+    assert engine.match("biraz sohbete ne dersin").name == "chat"
+    assert engine.match("uyku moduna geç").name == "sleep"
+    assert engine.match("bilgisayarı kapatır mısın").name == "shutdown"
+    assert engine.match("nasılsınız").name == "how_are_you"
+    assert engine.match("iptal et").name == "cancel"
+    # A stem still needs its own token: "dur" does not fire on "durum"
+    assert engine.match("hava durumu").name == "not_understood"
@@ -0,0 +1,36 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import pytest
+from model_loader import ModelLoader
+
+
+def test_models_load_in_background_in_priority_order(tmp_path):
+    for name in ("tr", "en"):
+        (tmp_path / name).mkdir()
+    order = []
+    release = threading.Event()
+
+    def loader(path):
+        order.append(os.path.basename(path))
+        release.wait(2)
+        return f"model:{os.path.basename(path)}"
+
+    models = ModelLoader({"tr": str(tmp_path / "tr"), "en": str(tmp_path / "en")}, loader, max_workers=1)
+    models.start(["en", "tr"])
+    assert not models.ready("en")
+    release.set()
+    assert models.get("en", timeout=2) == "model:en"
+    assert models.get("tr", timeout=2) == "model:tr"
+    assert order == ["en", "tr"]
+    assert models.ready("tr")
+
+
+def test_missing_model_fails_its_future_only(tmp_path):
+    (tmp_path / "en").mkdir()
+    models = ModelLoader({"tr": str(tmp_path / "missing"), "en": str(tmp_path / "en")}, lambda path: path)
+    with pytest.raises(FileNotFoundError):
+        models.get("tr", timeout=2)
+    assert models.get("en", timeout=2) == str(tmp_path / "en")
+    assert not models.ready("tr")
@@ -0,0 +1,55 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from normalization import normalize, turkish_lower, fold_diacritics, Utterance
+from command_matcher import CommandMatcher
+
+
+def test_turkish_casefolding_and_folding():
+    assert turkish_lower("İPTAL ISPARTA") == "iptal ısparta"
+    # Default str.lower leaves a combining dot after the i
+    assert "İPTAL".lower() != "iptal"
+    assert fold_diacritics("hayır şöyle güç") == "hayir soyle guc"
+    assert fold_diacritics("café") == "cafe"
+
+
+def test_utterance_is_memoized_and_tokenized():
+    utterance = normalize("HAYIR, Youtube'u aç!")
+    assert normalize("HAYIR, Youtube'u aç!") is utterance
+    assert normalize(utterance) is utterance
+    assert utterance.tokens == ("hayır", "youtube", "u", "aç")
+    assert utterance.folded_tokens == ("hayir", "youtube", "u", "ac")
+    assert utterance.contains("hayir") and utterance.contains("Youtube")
+    assert not Utterance("hava durumu").contains("dur")
+    assert Utterance("sana teşekkürler hoşça kal").contains_any(["bay bay", "HOŞÇA KAL"])
+
+
+def test_stems_match_inflected_tokens():
+    import prompts
+    from text_helpers import is_exit_command, generate_chat_response
+    assert Utterance("selamlar").contains("selam*")
+    assert not Utterance("selam").contains("selamlar*")
+    assert is_exit_command("çıkışı yapalım")
+    assert is_exit_command("teşekkür ederim")
+    assert is_exit_command("hoşça kalın")
+    assert not is_exit_command("heyecanlıyım")
+    assert generate_chat_response("selamlar")[0] in prompts.CHAT_GREETING_RESPONSES
+    assert generate_chat_response("çıkışa geçelim")[1] is True
+
+
+def test_matcher_accepts_utterances():
+    matcher = CommandMatcher({"İnternet": {"type": "url", "target": "https://www.google.com"}})
+    assert "internet" in matcher
+    match = matcher.match(normalize("İNTERNET AÇ"))
+    # Matched on the canonical form, reported as configured for the spoken reply
+    assert match.keyword == "İnternet" and match.exact
+
+
+def test_keywords_match_in_canonical_form():
+    matcher = CommandMatcher({"Instagram": {"type": "url", "target": "https://www.instagram.com"},
+                              "Müzik Listesi": {"type": "url", "target": "x"}})
+    # Vosk outputs "instagram"; Turkish lowercasing alone would give "ınstagram"
+    match = matcher.match("instagram aç")
+    assert (match.keyword, match.exact) == ("Instagram", True)
+    assert matcher.match("muzik listesini ac").keyword == "Müzik Listesi"
+    assert "müzik listesi" in matcher and "MUZIK LISTESI" in matcher
@@ -0,0 +1,12 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import prompts
+
+
+def test_static_prompts_include_templates():
+    result = prompts.static_prompts("jarvis", {"youtube": {}, "müzik": {}})
+    assert result[0] == prompts.LISTENING
+    assert "Görüşürüz, dilediğinde beni jarvis diyerek çağırabilirsin." in result
+    assert prompts.COMMAND_OPENING.format(keyword="müzik") in result
+    assert len(result) == len(set(result))
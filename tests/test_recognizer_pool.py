@@ -0,0 +1,47 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from recognizer_pool import RecognizerPool
+
+
+class FakeRecognizer:
+    def __init__(self, model, rate, grammar):
+        self.key = (model, rate, grammar)
+        self.resets = 0
+
+    def Reset(self):
+        self.resets += 1
+
+
+def test_released_recognizer_is_reset_and_reused():
+    pool = RecognizerPool(factory=FakeRecognizer)
+    model = object()
+    with pool.recognizer(model) as rec:
+        pass
+    assert rec.resets == 1
+    with pool.recognizer(model) as again:
+        assert again is rec
+    assert (pool.created, pool.reused) == (1, 1)
+
+
+def test_recognizers_are_keyed_by_model_rate_and_grammar():
+    pool = RecognizerPool(factory=FakeRecognizer)
+    model, other = object(), object()
+    rec = pool.acquire(model, 16000, '["jarvis"]')
+    pool.release(rec)
+    assert pool.acquire(model, 16000) is not rec
+    assert pool.acquire(other, 16000, '["jarvis"]') is not rec
+    assert pool.acquire(model, 8000, '["jarvis"]') is not rec
+    assert pool.acquire(model, 16000, '["jarvis"]') is rec
+
+
+def test_concurrent_sessions_get_distinct_recognizers():
+    pool = RecognizerPool(factory=FakeRecognizer, max_idle_per_key=1)
+    model = object()
+    first, second = pool.acquire(model), pool.acquire(model)
+    assert first is not second
+    pool.release(first)
+    pool.release(second)
+    # Only max_idle_per_key recognizers are kept around
+    assert pool.acquire(model) is first
+    assert pool.acquire(model) is not second
@@ -0,0 +1,102 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import wave
+import numpy as np
+from command_matcher import CommandMatcher
+from hybrid_decoder import CommandGrammar, HybridDecoder
+from intents import build_engine
+from recognizer_pool import RecognizerPool
+from replay import ReplaySession, read_wav
+
+
+class ScriptedRecognizer:
+    """Returns a final result once a given number of frames has been fed."""
+
+    def __init__(self, after_frames, result):
+        self.after_frames = after_frames
+        self.result = result
+        self.fed = 0
+        self.done = False
+        self.words = False
+
+    def SetWords(self, enabled):
+        self.words = enabled
+
+    def Reset(self):
+        self.fed = 0
+
+    def AcceptWaveform(self, data):
+        self.fed += len(data) // 2
+        if not self.done and self.fed >= self.after_frames:
+            self.done = True
+            return True
+        return False
+
+    def Result(self):
+        return json.dumps(self.result)
+
+    def FinalResult(self):
+        return json.dumps(self.result if self.fed >= self.after_frames else {"text": ""})
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+
+WAKE_RESULT = {"text": "jarvis", "result": [{"word": "jarvis", "start": 0.2, "end": 0.75}]}
+
+
+def words(text, start=0.1, step=0.45, conf=1.0):
+    return {"text": text, "result": [{"word": word, "start": start + i * step, "end": start + (i + 1) * step - 0.05,
+                                      "conf": conf} for i, word in enumerate(text.split())]}
+
+
+def make_session(fast_result, full_result, after_frames=24000):
+    """Wake word detected after 1 s; both decoder passes reach an endpoint after after_frames."""
+    matcher = CommandMatcher({"youtube": {"type": "url", "target": "https://www.youtube.com"}})
+    engine = build_engine(matcher.match)
+    scripted = {"fast": fast_result, "full": full_result}
+    pool = RecognizerPool(factory=lambda model, rate, grammar: ScriptedRecognizer(
+        after_frames, scripted["full" if grammar is None else "fast"]))
+    decoder = HybridDecoder(pool, CommandGrammar(matcher, engine.vocabulary()))
+    wake = ScriptedRecognizer(16000, WAKE_RESULT)
+    return ReplaySession(wake, decoder, engine, "tr", "jarvis", use_vad=False, tail_silence=0)
+
+
+def test_replay_decodes_with_the_grammar_pass_and_intent_table():
+    session = make_session(words("youtube aç"), {"text": "you tüp aç"})
+    stats = session.run(np.zeros(16000 * 4, dtype=np.int16))
+
+    assert stats["audio_seconds"] == 4
+    assert stats["rtf"] > 0
+    [interaction] = stats["interactions"]
+    # Detected at the end of the second 0.5 s block, 0.25 s after the wake word ended
+    assert interaction["wake_latency_ms"] == 250
+    assert (interaction["source"], interaction["intent"], interaction["keyword"]) == ("grammar", "command", "youtube")
+    # Command decoding starts at 0.75 s, so the utterance ends at 1.7 s; the
+    # result arrives with the third full block read from the pre-roll, at 2.5 s
+    assert interaction["endpoint_latency_ms"] == 800
+    assert interaction["processing_ms"] >= 0
+    assert (stats["grammar_hits"], stats["fallbacks"], stats["grammar_ratio"]) == (1, 0, 1.0)
+
+
+def test_replay_counts_full_model_fallbacks():
+    session = make_session(words("youtube [unk] [unk]"), words("bugün hava nasıl"))
+    stats = session.run(np.zeros(16000 * 4, dtype=np.int16))
+
+    [interaction] = stats["interactions"]
+    assert (interaction["source"], interaction["intent"]) == ("full", "not_understood")
+    assert (stats["grammar_hits"], stats["fallbacks"], stats["fallback_ratio"]) == (0, 1, 1.0)
+
+
+def test_read_wav_downmixes_and_resamples(tmp_path):
+    path = tmp_path / "stereo.wav"
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(8000)
+        wf.writeframes(np.full(8000 * 2, 1000, dtype=np.int16).tobytes())
+    pcm = read_wav(str(path))
+    assert len(pcm) == 16000
+    assert pcm.dtype == np.int16
@@ -3,6 +3,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 import os
 import json
+import time
 import configparser
 import pytest
 from settings import Settings, SettingsSchema
@@ -38,4 +39,126 @@ def test_add_remove_command(tmp_path):
     assert cmds["testcmd"]["target"] == "http://example.com"
     # Remove command and verify
     settings.remove_command("testcmd")
-    assert "testcmd" not in settings.get_all_commands()
\ No newline at end of file
+    assert "testcmd" not in settings.get_all_commands()
+
+def test_add_command_notifies_with_the_value_it_wrote(tmp_path):
+    settings = Settings(file_path=str(tmp_path / "settings.json"))
+    events = []
+    settings.subscribe(lambda event, key, value: events.append((event, key, value)))
+    schedule_save = settings._schedule_save
+
+    def reload_in_between():
+        # A reload swapping the schema after the lock is released
+        settings.schema = SettingsSchema()
+        schedule_save()
+
+    settings._schedule_save = reload_in_between
+    settings.add_command("hesap makinesi", "exe", "calc.exe")
+    assert events == [("add_command", "hesap makinesi", {"type": "exe", "target": "calc.exe"})]
+
+
+def test_changes_are_written_behind_atomically(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings = Settings(file_path=str(settings_file), write_delay=0.05)
+    settings.set("wake_word", "jarvis")
+    settings.add_command("google", "url", "https://www.google.com")
+    # Nothing is written on the caller's thread
+    assert json.load(open(settings_file, encoding="utf-8"))["wake_word"] == "ceren"
+    settings.flush()
+    data = json.load(open(settings_file, encoding="utf-8"))
+    assert data["wake_word"] == "jarvis"
+    assert "google" in data["commands"]
+    assert not os.path.exists(str(settings_file) + ".tmp")
+
+
+def test_background_writer_coalesces_changes(tmp_path):
+    import time
+    settings_file = tmp_path / "settings.json"
+    settings = Settings(file_path=str(settings_file), write_delay=0.05)
+    for speed in (1.1, 1.2, 1.3):
+        settings.set("voice_speed", speed)
+    deadline = time.time() + 2
+    while time.time() < deadline:
+        if json.load(open(settings_file, encoding="utf-8"))["voice_speed"] == 1.3:
+            break
+        time.sleep(0.02)
+    assert json.load(open(settings_file, encoding="utf-8"))["voice_speed"] == 1.3
+
+
+def test_batch_notifies_after_commit_and_rolls_back_on_error(tmp_path):
+    settings = Settings(file_path=str(tmp_path / "settings.json"))
+    events = []
+    settings.subscribe(lambda event, key, value: events.append((event, key)))
+    with settings.batch():
+        settings.set("theme", "light")
+        settings.set("wake_word", "jarvis")
+        assert events == []
+    assert events == [("set", "theme"), ("set", "wake_word")]
+
+    with pytest.raises(Exception):
+        with settings.batch():
+            settings.set("wake_word", "ceren")
+            settings.set("language", "invalid_lang")
+    assert settings.get("wake_word") == "jarvis"
+    assert len(events) == 2
+
+
+def test_external_edits_are_reloaded_and_own_writes_ignored(tmp_path):
+    settings_file = tmp_path / "settings.json"
+    settings = Settings(file_path=str(settings_file))
+    events = []
+    settings.subscribe(lambda event, key, value: events.append((event, key, value)))
+    settings.set("theme", "light")
+    settings.flush()
+    assert not settings.check_for_changes()
+
+    data = json.load(open(settings_file, encoding="utf-8"))
+    data["wake_word"] = "jarvis"
+    data["commands"] = {"google": {"type": "url", "target": "https://www.google.com"}}
+    with open(settings_file, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert settings.check_for_changes()
+    assert settings.get("wake_word") == "jarvis"
+    assert events[1:] == [("set", "wake_word", "jarvis"), ("reload", None, data["commands"])]
+    assert not settings.check_for_changes()
+
+
+def test_watched_settings_follow_another_writer(tmp_path):
+    from command_matcher import CommandMatcher
+    settings_file = str(tmp_path / "settings.json")
+    reader = Settings(file_path=settings_file).watch(interval=0.02)
+    matcher = CommandMatcher().attach(reader)
+    writer = Settings(file_path=settings_file, write_delay=0.01)
+    writer.add_command("hava durumu", "url", "https://www.mgm.gov.tr")
+    writer.flush()
+    deadline = time.monotonic() + 2
+    while "hava durumu" not in matcher and time.monotonic() < deadline:
+        time.sleep(0.02)
+    reader.stop_watching()
+    assert matcher.match("hava durumu nasıl").keyword == "hava durumu"
+
+
+def test_snapshot_is_immutable_and_republished(tmp_path):
+    settings = Settings(file_path=str(tmp_path / "settings.json"))
+    settings.add_command("google", "url", "https://www.google.com")
+    before = settings.snapshot
+    with pytest.raises(AttributeError):
+        before.wake_word = "jarvis"
+    with pytest.raises(TypeError):
+        before.commands["google"]["target"] = "x"
+
+    settings.set("wake_word", "jarvis")
+    assert settings.snapshot.wake_word == "jarvis" and settings.get("wake_word") == "jarvis"
+    # Holders of the old snapshot keep a consistent view
+    assert before.wake_word == "ceren"
+    assert before.commands["google"]["type"] == "url"
+
+    settings.set("wake_word", "jarvis")
+    unchanged = settings.snapshot
+    assert settings.snapshot is unchanged
+    with pytest.raises(Exception):
+        with settings.batch():
+            settings.set("theme", "light")
+            assert settings.snapshot.theme == "light"
+            settings.set("language", "invalid_lang")
+    assert settings.snapshot.theme == "dark"
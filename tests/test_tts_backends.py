@@ -0,0 +1,34 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import io
+import wave
+from tts_backends import FakeBackend, GTTSBackend, get_backend, pcm_to_wav
+
+
+def test_fake_backend_streams_chunks():
+    backend = FakeBackend(seconds_per_char=0.01, chunk_frames=800)
+    chunks = list(backend.stream("merhaba", "tr"))
+    # 7 chars * 0.01 s * 16000 Hz = 1120 frames -> two chunks
+    assert [len(c) for c in chunks] == [1600, 640]
+    assert backend.calls == [("merhaba", "tr", 1.0, 1.0)]
+
+
+def test_synthesize_returns_wav():
+    backend = FakeBackend()
+    wav = backend.synthesize("selam", "tr")
+    with wave.open(io.BytesIO(wav), 'rb') as wf:
+        assert wf.getframerate() == backend.sample_rate
+        assert wf.getnchannels() == 1
+        assert wf.getnframes() == 800
+
+
+def test_pcm_to_wav_roundtrip():
+    pcm = b"\x01\x00\x02\x00"
+    with wave.open(io.BytesIO(pcm_to_wav(pcm, 8000)), 'rb') as wf:
+        assert wf.readframes(2) == pcm
+
+
+def test_unknown_backend_falls_back_to_gtts():
+    assert isinstance(get_backend("nope"), GTTSBackend)
+    assert isinstance(get_backend("fake"), FakeBackend)
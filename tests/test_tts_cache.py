@@ -0,0 +1,41 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from tts_cache import TTSCache
+
+
+def test_put_get_survives_reload(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    assert cache.get("Merhaba", "tr", 1.0, 1.0) is None
+    path = cache.put("Merhaba", "tr", 1.0, 1.0, b"mp3data")
+    assert cache.get("Merhaba", "tr", 1.0, 1.0) == path
+    # Different voice parameters are different entries
+    assert cache.get("Merhaba", "tr", 1.5, 1.0) is None
+
+    reloaded = TTSCache(str(tmp_path))
+    assert reloaded.get("Merhaba", "tr", 1.0, 1.0) == path
+    assert open(path, 'rb').read() == b"mp3data"
+
+
+def test_lru_eviction(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=10)
+    cache.put("a", "tr", 1.0, 1.0, b"12345")
+    cache.put("b", "tr", 1.0, 1.0, b"12345")
+    # Touch "a" so "b" becomes least recently used
+    time.sleep(0.01)
+    cache.get("a", "tr", 1.0, 1.0)
+    cache.put("c", "tr", 1.0, 1.0, b"12345")
+    assert cache.get("a", "tr", 1.0, 1.0) is not None
+    assert cache.get("b", "tr", 1.0, 1.0) is None
+    assert cache.total_size() <= 10
+
+
+def test_purge_expired_and_orphans(tmp_path):
+    (tmp_path / "legacy.mp3").write_bytes(b"old")
+    cache = TTSCache(str(tmp_path), ttl=0.01)
+    assert not (tmp_path / "legacy.mp3").exists()
+    path = cache.put("a", "tr", 1.0, 1.0, b"x")
+    time.sleep(0.02)
+    assert cache.purge_expired() == 1
+    assert not os.path.exists(path)
@@ -0,0 +1,58 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from vad import EnergyVAD
+
+RATE = 16000
+BLOCK = 8000
+
+
+def noise(n, seed=0):
+    return (np.random.default_rng(seed).normal(0, 30, n)).astype(np.int16)
+
+
+def voiced(n):
+    t = np.arange(n) / RATE
+    return (8000 * np.sin(2 * np.pi * 200 * t)).astype(np.int16)
+
+
+def run(vad, signal):
+    segments, ended = [], []
+    for pos in range(0, len(signal), BLOCK):
+        segs, end = vad.process(signal[pos:pos + BLOCK], pos)
+        segments.extend((p, s.copy()) for p, s in segs)
+        ended.append(end)
+    return segments, ended
+
+
+def test_silence_is_skipped():
+    vad = EnergyVAD(RATE)
+    segments, ended = run(vad, noise(RATE * 5))
+    assert segments == []
+    assert not any(ended)
+    assert vad.skipped_ratio == 1.0
+
+
+def test_speech_forwarded_with_padding_and_positions():
+    signal = np.concatenate([noise(RATE * 2), voiced(RATE), noise(RATE * 3, seed=1)])
+    vad = EnergyVAD(RATE, pre_padding_ms=300, hangover_ms=600)
+    segments, ended = run(vad, signal)
+    first, last = segments[0][0], segments[-1][0] + len(segments[-1][1])
+    # Pre-padding before the onset and hangover after the offset
+    assert 2 * RATE - int(0.3 * RATE) - 320 <= first <= 2 * RATE - int(0.3 * RATE) + 320
+    assert 3 * RATE + int(0.6 * RATE) <= last <= 3 * RATE + int(0.6 * RATE) + 640
+    # Every forwarded run is the audio captured at its position
+    for pos, seg in segments:
+        assert np.array_equal(seg, signal[pos:pos + len(seg)])
+    assert sum(ended) == 1
+    assert 0.5 < vad.skipped_ratio < 0.8
+
+
+def test_noise_floor_adapts_to_louder_background():
+    vad = EnergyVAD(RATE)
+    loud_noise = (np.random.default_rng(2).normal(0, 1000, RATE * 10)).astype(np.int16)
+    segments, _ = run(vad, loud_noise)
+    # Only the first seconds may pass before the floor catches up
+    assert all(pos < RATE * 8 for pos, _ in segments)
+    assert vad.noise_floor_db > -40
@@ -0,0 +1,93 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+from wake_word import WakeWordDetector, wake_grammar
+
+
+class FakeRecognizer:
+    def __init__(self, results):
+        self.results = list(results)
+        self.words = False
+
+    def SetWords(self, enabled):
+        self.words = enabled
+
+    def AcceptWaveform(self, data):
+        # None entries stand for blocks that do not complete an utterance
+        if self.results[0] is None:
+            self.results.pop(0)
+            return False
+        return True
+
+    def Result(self):
+        return json.dumps(self.results.pop(0))
+
+
+def block(frames):
+    return b"\x00\x00" * frames
+
+
+def test_wake_word_end_maps_to_capture_position():
+    result = {"text": "jarvis [unk] [unk]", "result": [
+        {"word": "jarvis", "start": 0.1, "end": 0.6},
+        {"word": "[unk]", "start": 0.7, "end": 1.0},
+        {"word": "[unk]", "start": 1.0, "end": 1.2},
+    ]}
+    rec = FakeRecognizer([None, result])
+    detector = WakeWordDetector(rec, "Jarvis")
+    assert rec.words
+    # Blocks of 0.5 s captured starting at absolute position 1000
+    assert detector.accept(block(8000), 1000) is None
+    event = detector.accept(block(8000), 9000)
+    assert event.end_position == 1000 + int(0.6 * 16000)
+    assert event.has_trailing_speech
+
+
+def test_wake_word_alone_has_no_trailing_speech():
+    result = {"text": "jarvis", "result": [{"word": "jarvis", "start": 0.1, "end": 0.4}]}
+    detector = WakeWordDetector(FakeRecognizer([result]), "jarvis")
+    event = detector.accept(block(8000), 0)
+    assert event is not None and not event.has_trailing_speech
+
+
+def test_upper_case_wake_word_uses_english_casing():
+    result = {"text": "iris", "result": [{"word": "iris", "start": 0.1, "end": 0.4}]}
+    detector = WakeWordDetector(FakeRecognizer([result]), "IRIS")
+    assert detector.wake_word == "iris"
+    assert detector.accept(block(8000), 0) is not None
+    assert WakeWordDetector(FakeRecognizer([]), "JARVIS").wake_word == "jarvis"
+
+
+def test_grammar_is_built_from_the_wake_word():
+    assert json.loads(wake_grammar("Ceren")) == ["ceren", "[unk]"]
+    assert json.loads(wake_grammar("JARVIS")) == ["jarvis", "[unk]"]
+
+
+def test_other_words_do_not_trigger():
+    result = {"text": "[unk]", "result": [{"word": "[unk]", "start": 0.1, "end": 0.4}]}
+    detector = WakeWordDetector(FakeRecognizer([result]), "jarvis")
+    assert detector.accept(block(8000), 0) is None
+
+
+def test_vad_keeps_silence_from_recognizer():
+    import numpy as np
+    from vad import EnergyVAD
+
+    class CountingRecognizer(FakeRecognizer):
+        fed = 0
+
+        def AcceptWaveform(self, data):
+            self.fed += len(data) // 2
+            return False
+
+        def FinalResult(self):
+            return json.dumps({"text": ""})
+
+    rec = CountingRecognizer([])
+    detector = WakeWordDetector(rec, "jarvis")
+    vad = EnergyVAD(16000)
+    silence = np.zeros(8000, dtype=np.int16)
+    for i in range(10):
+        assert detector.accept_frames(silence, i * 8000, vad) is None
+    assert rec.fed == 0
@@ -0,0 +1,53 @@
+"""
+Pure text helpers for the command and chat loops: chat replies, exit
+detection and Turkish number words. Importing this module has no side
+effects, unlike assistant_logic, so benchmarks and tests can use it
+without loading settings or starting the spool and the player.
+"""
+
+import random
+
+from normalization import normalize, turkish_lower
+import prompts
+
+# Chat response generator
+# Whole-token phrases; "*" stems also catch inflected forms ("çıkışı", "selamlar")
+EXIT_PHRASES = ["görüşürüz*", "hoşça kal*", "teşekkür*", "çıkış*", "bay bay"]
+GREETING_PHRASES = ["merhaba*", "selam*", "hey", "nasılsın*"]
+
+def generate_chat_response(query):
+    """Generate a simple AI chat response based on the query (str or normalized Utterance)."""
+    utterance = normalize(query)
+    # Exit check
+    if utterance.contains_any(EXIT_PHRASES):
+        return random.choice(prompts.CHAT_EXIT_RESPONSES), True
+    # Greetings
+    if utterance.contains_any(GREETING_PHRASES):
+        return random.choice(prompts.CHAT_GREETING_RESPONSES), False
+    # Default
+    return random.choice(prompts.CHAT_DEFAULT_RESPONSES), False
+
+# Add Turkish number conversion helper
+def turkish_number_to_digit(text):
+    number_dict = {
+        'sıfır': 0, 'bir': 1, 'iki': 2, 'üç': 3, 'dört': 4, 
+        'beş': 5, 'altı': 6, 'yedi': 7, 'sekiz': 8, 'dokuz': 9,
+        'on': 10, 'yirmi': 20, 'otuz': 30, 'kırk': 40, 'elli': 50, 
+        'altmış': 60, 'yetmiş': 70, 'seksen': 80, 'doksan': 90,
+        'yüz': 100, 'bin': 1000
+    }
+    text = turkish_lower(text)
+    if text in number_dict:
+        return number_dict[text]
+    if text.isdigit():
+        return int(text)
+    words = text.split()
+    if len(words) == 2 and words[0] in number_dict and words[1] in number_dict:
+        tens, units = number_dict[words[0]], number_dict[words[1]]
+        if tens % 10 == 0 and tens < 100 and units < 10:
+            return tens + units
+    return None
+
+# Add exit command checker
+def is_exit_command(query):
+    return normalize(query).contains_any(EXIT_PHRASES)
@@ -0,0 +1,134 @@
+"""
+Text-to-speech backends.
+Every backend yields mono 16-bit PCM chunks as soon as they are produced so
+playback can start before the whole utterance has been synthesized.
+"""
+
+import io
+import math
+import wave
+import shutil
+import logging
+import subprocess
+
+try:
+    import miniaudio
+    MINIAUDIO_AVAILABLE = True
+except ImportError:
+    MINIAUDIO_AVAILABLE = False
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap mono int16 PCM in a WAV container."""
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buf.getvalue()
+
+
+def decode_mp3(data: bytes, sample_rate: int) -> bytes:
+    """Decode an MP3 fragment to mono int16 PCM at the given rate."""
+    if MINIAUDIO_AVAILABLE:
+        decoded = miniaudio.decode(data, output_format=miniaudio.SampleFormat.SIGNED16,
+                                   nchannels=1, sample_rate=sample_rate)
+        return decoded.samples.tobytes()
+    if shutil.which("mpg123"):
+        result = subprocess.run(["mpg123", "-q", "-s", "--mono", "-r", str(sample_rate), "-"],
+                                input=data, capture_output=True, check=True)
+        return result.stdout
+    raise RuntimeError("MP3 çözücü bulunamadı (miniaudio veya mpg123 gereklidir)")
+
+
+class TTSBackend:
+    name = "base"
+    sample_rate = 24000
+
+    def stream(self, text: str, lang: str, speed: float = 1.0, pitch: float = 1.0):
+        """Yield mono int16 PCM chunks (bytes) for the given text."""
+        raise NotImplementedError
+
+    def synthesize(self, text: str, lang: str, speed: float = 1.0, pitch: float = 1.0) -> bytes:
+        """Return the whole utterance as a WAV file."""
+        pcm = b"".join(self.stream(text, lang, speed, pitch))
+        return pcm_to_wav(pcm, self.sample_rate)
+
+
+class GTTSBackend(TTSBackend):
+    """Google TTS; each sentence-sized MP3 part is decoded and yielded as it arrives."""
+    name = "gtts"
+    sample_rate = 24000
+
+    def stream(self, text, lang, speed=1.0, pitch=1.0):
+        from gtts import gTTS
+        for mp3_part in gTTS(text=text, lang=lang, slow=speed < 1.0).stream():
+            yield decode_mp3(mp3_part, self.sample_rate)
+
+
+class EspeakBackend(TTSBackend):
+    """Offline synthesis through espeak-ng, read from its stdout while it runs."""
+    name = "espeak"
+    sample_rate = 22050
+    chunk_bytes = 4096
+
+    def __init__(self, executable: str = None):
+        self.executable = executable or shutil.which("espeak-ng") or shutil.which("espeak")
+        if not self.executable:
+            raise RuntimeError("espeak-ng bulunamadı")
+
+    def stream(self, text, lang, speed=1.0, pitch=1.0):
+        words_per_minute = str(int(175 * speed))
+        pitch_value = str(max(0, min(99, int(50 * pitch))))
+        proc = subprocess.Popen([self.executable, "-v", lang, "-s", words_per_minute, "-p", pitch_value,
+                                 "--stdout", text], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            header = proc.stdout.read(44)
+            if len(header) < 44 or header[:4] != b"RIFF":
+                raise RuntimeError("espeak-ng geçersiz ses çıktısı üretti")
+            self.sample_rate = int.from_bytes(header[24:28], "little")
+            while True:
+                chunk = proc.stdout.read(self.chunk_bytes)
+                if not chunk:
+                    break
+                yield chunk[:len(chunk) - len(chunk) % 2]
+        finally:
+            proc.stdout.close()
+            proc.wait()
+
+
+class FakeBackend(TTSBackend):
+    """Deterministic tone generator for tests; records every request."""
+    name = "fake"
+    sample_rate = 16000
+
+    def __init__(self, seconds_per_char: float = 0.01, chunk_frames: int = 1600):
+        self.seconds_per_char = seconds_per_char
+        self.chunk_frames = chunk_frames
+        self.calls = []
+
+    def stream(self, text, lang, speed=1.0, pitch=1.0):
+        self.calls.append((text, lang, speed, pitch))
+        total = int(len(text) * self.seconds_per_char * self.sample_rate / speed)
+        freq = 220.0 * pitch
+        for start in range(0, total, self.chunk_frames):
+            frames = range(start, min(start + self.chunk_frames, total))
+            samples = (int(8000 * math.sin(2 * math.pi * freq * n / self.sample_rate)) for n in frames)
+            yield b"".join(s.to_bytes(2, "little", signed=True) for s in samples)
+
+
+BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    EspeakBackend.name: EspeakBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def get_backend(name: str) -> TTSBackend:
+    """Instantiate a backend by name, falling back to gTTS when unavailable."""
+    try:
+        return BACKENDS[name]()
+    except (KeyError, RuntimeError) as e:
+        logging.error(f"TTS backend '{name}' kullanılamıyor ({e}), gtts kullanılıyor")
+        return GTTSBackend()
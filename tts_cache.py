@@ -0,0 +1,151 @@
+"""
+Persistent, content-addressed cache for synthesized speech.
+Entries are keyed by text, language, voice speed, pitch and TTS backend and tracked in
+an index file so that least recently used entries can be evicted when the
+cache grows past its size limit, and stale entries purged after a TTL.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+INDEX_FILE = "index.json"
+
+
+class TTSCache:
+    def __init__(self, cache_dir: str, max_bytes: int = 100 * 1024 * 1024, ttl: float = 7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._dirty = False
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+        self.purge_expired()
+
+    @staticmethod
+    def make_key(text: str, lang: str, speed: float = 1.0, pitch: float = 1.0, backend: str = "") -> str:
+        payload = json.dumps([text, lang, round(float(speed), 3), round(float(pitch), 3), backend], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load_index(self):
+        entries = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    entries = json.load(f).get("entries", {})
+            except (OSError, ValueError) as e:
+                logging.error(f"TTS cache index load error: {e}, rebuilding")
+        # Drop entries whose audio file vanished
+        self._entries = {
+            key: entry for key, entry in entries.items()
+            if os.path.isfile(os.path.join(self.cache_dir, entry["file"]))
+        }
+        # Remove files not tracked by the index (e.g. left over from older versions)
+        known = {entry["file"] for entry in self._entries.values()}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name != INDEX_FILE and name not in known and os.path.isfile(path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._dirty = len(self._entries) != len(entries)
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"entries": self._entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def flush(self):
+        """Write pending index updates (access times) to disk."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def path_for(self, key: str):
+        entry = self._entries.get(key)
+        return os.path.join(self.cache_dir, entry["file"]) if entry else None
+
+    def get(self, text: str, lang: str, speed: float = 1.0, pitch: float = 1.0, backend: str = ""):
+        """Return the cached audio path for the given voice parameters, or None."""
+        key = self.make_key(text, lang, speed, pitch, backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            path = os.path.join(self.cache_dir, entry["file"])
+            if not os.path.isfile(path):
+                self._entries.pop(key, None)
+                self._dirty = True
+                return None
+            entry["last_used"] = time.time()
+            self._dirty = True
+            return path
+
+    def put(self, text: str, lang: str, speed: float, pitch: float, data: bytes,
+            ext: str = "wav", backend: str = "") -> str:
+        """Store synthesized audio and return its path."""
+        key = self.make_key(text, lang, speed, pitch, backend)
+        file_name = f"{key}.{ext}"
+        path = os.path.join(self.cache_dir, file_name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            old = self._entries.get(key)
+            if old and old["file"] != file_name:
+                self._remove_file(old["file"])
+            self._entries[key] = {
+                "file": file_name,
+                "size": len(data),
+                "text": text,
+                "lang": lang,
+                "created": now,
+                "last_used": now,
+            }
+            self._evict()
+            self._save_index()
+        return path
+
+    def total_size(self) -> int:
+        with self._lock:
+            return sum(entry["size"] for entry in self._entries.values())
+
+    def _remove_file(self, file_name):
+        try:
+            os.remove(os.path.join(self.cache_dir, file_name))
+        except OSError:
+            pass
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self._entries, key=lambda k: self._entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries.pop(key)
+            self._remove_file(entry["file"])
+            total -= entry["size"]
+            logging.info(f"TTS cache evicted: {entry['text'][:40]}")
+
+    def purge_expired(self):
+        """Remove entries that have not been used within the TTL."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry["last_used"] < cutoff]
+            for key in expired:
+                self._remove_file(self._entries.pop(key)["file"])
+            if expired or self._dirty:
+                self._save_index()
+        return len(expired)
@@ -0,0 +1,126 @@
+"""
+Lightweight voice-activity detection for the always-on wake-word listener.
+Each capture block is split into short frames; frame energy and zero-crossing
+rate are computed in one vectorized pass and compared against an adaptive
+noise floor. Only speech plus some padding on both sides is forwarded to the
+recognizer, so silence costs a few NumPy operations instead of a Vosk decode.
+"""
+
+import numpy as np
+
+
+class EnergyVAD:
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, threshold_db: float = 9.0,
+                 zcr_max: float = 0.25, noise_alpha: float = 0.1, pre_padding_ms: int = 300,
+                 hangover_ms: int = 600, initial_floor_db: float = -60.0, min_floor_db: float = -80.0):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.zcr_max = zcr_max
+        self.noise_alpha = noise_alpha
+        self.min_floor_db = min_floor_db
+        self.noise_floor_db = initial_floor_db
+        self.pre_padding = int(sample_rate * pre_padding_ms / 1000)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        # Frames of hangover still owed from the previous block
+        self._hang = 0
+        # Unforwarded tail of the previous block, prepended when speech starts
+        self._tail = np.zeros(self.pre_padding, dtype=np.int16)
+        self._tail_len = 0
+        self._tail_position = 0
+        self._was_active = False
+        self.total_frames = 0
+        self.forwarded_frames = 0
+
+    def reset(self):
+        self._hang = 0
+        self._tail_len = 0
+        self._was_active = False
+
+    def _frame_features(self, block: np.ndarray):
+        n_frames = -(-len(block) // self.frame_len)
+        padded = np.zeros(n_frames * self.frame_len, dtype=np.float32)
+        padded[:len(block)] = block
+        frames = padded.reshape(n_frames, self.frame_len) / 32768.0
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return energy_db, zcr
+
+    def _update_noise_floor(self, energy_db, speech):
+        quiet = energy_db[~speech]
+        # A block without quiet frames still pulls the floor up towards its
+        # quietest frame, so a louder steady background stops counting as speech
+        target = float(np.median(quiet)) if len(quiet) else float(energy_db.min())
+        if target < self.noise_floor_db:
+            # Follow drops in background level immediately
+            self.noise_floor_db = target
+        else:
+            self.noise_floor_db += self.noise_alpha * (target - self.noise_floor_db)
+        self.noise_floor_db = max(self.noise_floor_db, self.min_floor_db)
+
+    def process(self, block: np.ndarray, position: int = 0):
+        """
+        Gate one block captured at an absolute position.
+        Returns (segments, segment_ended): segments is a list of
+        (absolute position, int16 array) runs to forward, in order;
+        segment_ended is True when speech stopped within this block.
+        """
+        n = len(block)
+        self.total_frames += n
+        energy_db, zcr = self._frame_features(block)
+        above = energy_db > self.noise_floor_db + self.threshold_db
+        loud = energy_db > self.noise_floor_db + 2 * self.threshold_db
+        speech = above & ((zcr < self.zcr_max) | loud)
+        self._update_noise_floor(energy_db, speech)
+
+        n_frames = len(speech)
+        # Extend every speech frame forward by the hangover (vectorized dilation)
+        active = np.convolve(speech.astype(np.int8), np.ones(self.hangover_frames + 1, dtype=np.int8))[:n_frames] > 0
+        if self._hang:
+            active[:self._hang] = True
+        speech_idx = np.flatnonzero(speech)
+        if len(speech_idx):
+            self._hang = max(0, int(speech_idx[-1]) + self.hangover_frames + 1 - n_frames)
+        else:
+            self._hang = max(0, self._hang - n_frames)
+        # Extend speech onsets backwards by the pre-padding
+        pre_frames = -(-self.pre_padding // self.frame_len)
+        if pre_frames:
+            active |= np.convolve(speech[::-1].astype(np.int8), np.ones(pre_frames + 1, dtype=np.int8))[:n_frames][::-1] > 0
+
+        segments = []
+        if active.any():
+            if active[0] and not self._was_active and self._tail_len:
+                segments.append((self._tail_position, self._tail[:self._tail_len].copy()))
+                self.forwarded_frames += self._tail_len
+            # Contiguous runs of active frames, as sample ranges
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+            for start_frame, end_frame in zip(edges[::2], edges[1::2]):
+                start = start_frame * self.frame_len
+                end = min(end_frame * self.frame_len, n)
+                segments.append((position + start, block[start:end]))
+                self.forwarded_frames += end - start
+        segment_ended = self._was_active and not active[-1]
+        self._was_active = bool(active[-1])
+
+        # Remember the unforwarded tail for pre-padding a speech start in the next block
+        if not active[-1] and self.pre_padding:
+            inactive_tail = n_frames - (int(np.flatnonzero(active)[-1]) + 1 if active.any() else 0)
+            keep = min(self.pre_padding, inactive_tail * self.frame_len, n)
+            self._tail[:keep] = block[n - keep:]
+            self._tail_len = keep
+            self._tail_position = position + n - keep
+        else:
+            self._tail_len = 0
+        return segments, segment_ended
+
+    @property
+    def skipped_ratio(self) -> float:
+        if not self.total_frames:
+            return 0.0
+        return 1.0 - self.forwarded_frames / self.total_frames
+
+    def stats(self) -> dict:
+        return {"total_frames": self.total_frames, "forwarded_frames": self.forwarded_frames,
+                "skipped_ratio": self.skipped_ratio, "noise_floor_db": self.noise_floor_db}
@@ -0,0 +1,104 @@
+"""
+Wake-word detection on top of a grammar-constrained Vosk recognizer.
+Word timestamps reported by Vosk are mapped back to absolute capture
+positions so the command recognizer can pick up right where the wake word
+ended, using the audio hub's pre-roll history. The grammar is built from
+the configured wake word (wake_grammar), so a changed wake word needs a
+recognizer built for the new grammar; Vosk drops grammar words the English
+model's vocabulary does not contain, with a warning in its log.
+"""
+
+import json
+import logging
+from collections import deque
+
+from audio_ring import waveform_view
+
+def wake_grammar(wake_word: str) -> str:
+    """Vosk grammar for the wake-word recognizer: the configured wake word, anything else is "[unk]"."""
+    return json.dumps([wake_word.lower(), "[unk]"], ensure_ascii=False)
+
+
+class WakeEvent:
+    def __init__(self, text, end_position, trailing_words):
+        self.text = text
+        self.end_position = end_position
+        # Words recognized after the wake word in the same utterance
+        self.trailing_words = trailing_words
+
+    @property
+    def has_trailing_speech(self) -> bool:
+        return bool(self.trailing_words)
+
+
+class WakeWordDetector:
+    def __init__(self, recognizer, wake_word: str, sample_rate: int = 16000, history_blocks: int = 256):
+        self.recognizer = recognizer
+        # English model: Turkish casing would turn "JARVIS" into "jarvıs"
+        self.wake_word = wake_word.lower()
+        self.sample_rate = sample_rate
+        recognizer.SetWords(True)
+        # (recognizer frame offset, absolute position, frames) of recently fed blocks
+        self._blocks = deque(maxlen=history_blocks)
+        self._rec_frames = 0
+
+    def reset(self):
+        self.recognizer.Reset()
+        self._blocks.clear()
+        self._rec_frames = 0
+
+    def _to_position(self, seconds: float) -> int:
+        frame = int(seconds * self.sample_rate)
+        for rec_start, abs_start, n in reversed(self._blocks):
+            if frame >= rec_start:
+                return abs_start + min(frame - rec_start, n)
+        return self._blocks[0][1]
+
+    def accept(self, data, position: int, end_of_segment: bool = False):
+        """
+        Feed one block captured at the given absolute position; return a WakeEvent or None.
+        end_of_segment forces a final result, e.g. when the VAD closes a speech segment.
+        """
+        n = len(data) // 2
+        if n:
+            self._blocks.append((self._rec_frames, position, n))
+            self._rec_frames += n
+        if n and self.recognizer.AcceptWaveform(data):
+            result = json.loads(self.recognizer.Result())
+        elif end_of_segment:
+            result = json.loads(self.recognizer.FinalResult())
+        else:
+            return None
+        text = result.get("text", "").lower()
+        if not text:
+            return None
+        logging.info(f"Pasif dinleme duydu: {text}")
+        words = result.get("result", [])
+        for i, word in enumerate(words):
+            if word["word"].lower() == self.wake_word:
+                trailing = [w["word"] for w in words[i + 1:]]
+                return WakeEvent(text, self._to_position(word["end"]), trailing)
+        # Without word timings fall back to the end of the current block
+        recognized_words = text.split()
+        if not words and self.wake_word in recognized_words:
+            trailing = recognized_words[recognized_words.index(self.wake_word) + 1:]
+            return WakeEvent(text, position + n, trailing)
+        return None
+
+    def accept_frames(self, frames, position: int, vad=None):
+        """
+        Feed an int16 block, optionally gated by a VAD so only speech (plus
+        padding) reaches the recognizer. Returns the first WakeEvent or None.
+        """
+        if vad is None:
+            return self.accept(waveform_view(frames), position)
+        segments, segment_ended = vad.process(frames, position)
+        if not segments:
+            return self.accept(b"", position, end_of_segment=True) if segment_ended else None
+        for i, (segment_position, segment) in enumerate(segments):
+            last = i == len(segments) - 1
+            event = self.accept(waveform_view(segment), segment_position,
+                                end_of_segment=last and segment_ended)
+            if event is not None:
+                return event
+        return None